@@ -0,0 +1,5 @@
+"""Offline benchmarks for PRD Maker's hot paths.
+
+Run ``python -m benchmarks`` from the repository root. No API keys or
+network are needed: all model calls go to the fake provider.
+"""
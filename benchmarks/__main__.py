@@ -0,0 +1,18 @@
+import logging
+import sys
+
+from . import bench_documents, bench_llm, bench_steps, bench_storage
+from .runner import main
+
+SUITES = {
+    "storage": bench_storage.run,
+    "documents": bench_documents.run,
+    "llm": bench_llm.run,
+    "steps": bench_steps.run,
+}
+
+# Session state used outside `streamlit run` logs a warning on every access,
+# which would dominate the timings
+logging.disable(logging.WARNING)
+
+sys.exit(main(SUITES))
@@ -0,0 +1,14 @@
+"""Rendering and parsing of PRD documents with many user stories."""
+
+from src.prd_maker.core.prd_parser import parse_prd
+
+from .fixtures import sample_prd_document
+from .runner import Runner
+
+
+def run(runner: Runner) -> None:
+    for stories in runner.sizes(10, 1_000, 10_000):
+        document = sample_prd_document(stories)
+        markdown = document.to_markdown()
+        runner.measure(f"documents.to_markdown[stories={stories}]", document.to_markdown, stories=stories)
+        runner.measure(f"documents.parse_prd[stories={stories}]", lambda: parse_prd(markdown), stories=stories)
@@ -0,0 +1,27 @@
+"""LLMManager orchestration overhead against the instant fake provider."""
+
+from src.prd_maker.core.response_cache import ResponseCache
+
+from .fixtures import _generated_fields, offline_llm_manager, qa_history
+from .runner import Runner
+
+
+def run(runner: Runner) -> None:
+    manager = offline_llm_manager()
+    description = _generated_fields()["project_description"]
+
+    for count in runner.sizes(12, 100, 1_000):
+        history = qa_history(count)
+        runner.measure(f"llm.planning_summary_prompt[answers={count}]",
+                       lambda: manager._planning_summary_prompt(description, history), number=50, answers=count)
+
+    history = qa_history(12)
+    runner.measure("llm.generate_planning_summary[uncached]",
+                   lambda: manager.generate_planning_summary(description, history, use_cache=False), number=10)
+    runner.measure("llm.stream_planning_summary[uncached]",
+                   lambda: "".join(manager.stream_planning_summary(description, history, use_cache=False)), number=10)
+
+    manager.cache = ResponseCache(disk_dir=None)
+    manager.generate_planning_summary(description, history)
+    runner.measure("llm.generate_planning_summary[memory cache hit]",
+                   lambda: manager.generate_planning_summary(description, history), number=50)
@@ -0,0 +1,35 @@
+"""Full script rerun time of the app at each step, via Streamlit's AppTest."""
+
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from src.prd_maker.models.project import ProjectStep
+
+from .fixtures import sample_project
+from .runner import Runner
+
+APP_SCRIPT = str(Path(__file__).with_name("step_app.py"))
+
+# Step -> the render function it exercises (answer questions reuses the planning session)
+STEP_RENDERERS = {
+    ProjectStep.PROJECT_IDEA: "render_project_idea_step",
+    ProjectStep.PROJECT_DESCRIPTION: "render_project_description_step",
+    ProjectStep.PLANNING_SESSION: "render_planning_session_step",
+    ProjectStep.PLANNING_SUMMARY: "render_planning_summary_step",
+    ProjectStep.PRD_DOCUMENT: "render_prd_document_step",
+    ProjectStep.TECH_STACK_ANALYSIS: "render_tech_stack_analysis_step",
+}
+
+
+def run(runner: Runner) -> None:
+    for step, renderer in STEP_RENDERERS.items():
+        name = f"steps.{renderer}"
+        if not runner.wanted(name):
+            continue
+        app = AppTest.from_file(APP_SCRIPT, default_timeout=60)
+        app.session_state.current_project = sample_project(0, step)
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"{renderer} failed: {app.exception[0].value}")
+        runner.measure(name, app.run, repeat=7, step=step.value)
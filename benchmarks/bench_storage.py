@@ -0,0 +1,110 @@
+"""ProjectStorage save/list/load at growing numbers of stored projects, per backend.
+
+``save_project`` is the write-behind save of the interactive reruns;
+``flush_project`` also writes the change, as on a step transition.
+``list_page`` is the first page of the sidebar and ``search_page`` the
+first page of a name prefix search.
+The revision benchmarks record a one-line edit of a long PRD and rebuild
+a revision at the end of the longest delta chain.
+"""
+
+import os
+import tempfile
+
+import streamlit as st
+
+from src.prd_maker.core.project_storage import ProjectStorage
+from src.prd_maker.core.revisions import RevisionLog
+from src.prd_maker.core.storage_backends import SessionStateBackend, SQLiteBackend
+
+from .fixtures import sample_project
+from .runner import Runner
+
+OPERATIONS = ("save_project", "flush_project", "list_projects", "list_page", "search_page", "load_project")
+
+
+def _fill_storage(count: int) -> None:
+    for i in range(count):
+        ProjectStorage.save_project(sample_project(i))
+
+
+def _run_backend(runner: Runner, prefix: str, make_backend) -> None:
+    for count in runner.sizes(10, 1_000, 10_000):
+        if not any(runner.wanted(f"{prefix}.{op}[projects={count}]") for op in OPERATIONS):
+            continue
+        backend = make_backend()
+        ProjectStorage.use_backend(backend)
+        try:
+            _fill_storage(count)
+            project = sample_project(count // 2)
+
+            def save() -> None:
+                project.planning_summary += "."
+                ProjectStorage.save_project(project)
+
+            def flush() -> None:
+                project.planning_summary += "."
+                ProjectStorage.save_project(project, flush=True)
+
+            runner.measure(f"{prefix}.save_project[projects={count}]", save, number=20, projects=count)
+            runner.measure(f"{prefix}.flush_project[projects={count}]", flush, number=20, projects=count)
+            runner.measure(f"{prefix}.list_projects[projects={count}]", ProjectStorage.list_projects, projects=count)
+            runner.measure(f"{prefix}.list_page[projects={count}]",
+                           lambda: ProjectStorage.list_projects_page(5), number=20, projects=count)
+            runner.measure(f"{prefix}.search_page[projects={count}]",
+                           lambda: ProjectStorage.list_projects_page(5, name_prefix="projekt testowy 9"),
+                           number=20, projects=count)
+            runner.measure(f"{prefix}.load_project[projects={count}]",
+                           lambda: ProjectStorage.load_project(project.id), number=20, projects=count)
+        finally:
+            ProjectStorage.use_backend(None)
+            backend.close()
+
+
+def _long_prd_project(index: int, size_kb: int):
+    project = sample_project(index)
+    project.prd_document *= size_kb * 1024 // len(project.prd_document) + 1
+    return project
+
+
+def _run_revisions(runner: Runner, directory: str) -> None:
+    for size_kb in runner.sizes(10, 100):
+        names = [f"storage.sqlite.{op}[prd_kb={size_kb}]" for op in ("record_revision", "rebuild_revision")]
+        if not any(runner.wanted(name) for name in names):
+            continue
+        backend = SQLiteBackend(os.path.join(directory, f"revisions-{size_kb}.db"))
+        try:
+            log = RevisionLog(backend)
+            edits = iter(range(1_000_000))
+
+            def record(project) -> int:
+                project.prd_document += f"\nedit {next(edits)}"
+                return log.record(project, {"prd_document"})
+
+            project = _long_prd_project(0, size_kb)
+            log.record(project)
+            runner.measure(names[0], lambda: record(project), number=20, prd_kb=size_kb)
+
+            # The last revision before the next full copy has the longest delta chain
+            chained = _long_prd_project(1, size_kb)
+            log.record(chained)
+            for _ in range(log.snapshot_interval):
+                number = record(chained)
+            runner.measure(names[1], lambda: log.texts_at(chained.id, number), number=5, prd_kb=size_kb)
+        finally:
+            backend.close()
+
+
+def run(runner: Runner) -> None:
+    def session_backend() -> SessionStateBackend:
+        st.session_state.clear()
+        return SessionStateBackend()
+
+    _run_backend(runner, "storage", session_backend)
+    st.session_state.clear()
+
+    with tempfile.TemporaryDirectory() as directory:
+        databases = iter(range(1_000_000))
+        _run_backend(runner, "storage.sqlite",
+                     lambda: SQLiteBackend(os.path.join(directory, f"projects-{next(databases)}.db")))
+        _run_revisions(runner, directory)
@@ -0,0 +1,101 @@
+"""Sample data and an offline LLMManager shared by the benchmark suites."""
+
+from functools import lru_cache
+from typing import Dict, List
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.models.prd import PRDDocument, UserStory
+from src.prd_maker.models.project import Project, ProjectStep
+
+PROJECT_IDEA = (
+    "Aplikacja webowa do nauki słówek z języków obcych, która przypomina o powtórkach "
+    "w optymalnych odstępach czasu i pozwala importować własne zestawy słówek."
+)
+
+
+def offline_llm_manager(story_count: int = 12) -> LLMManager:
+    """LLMManager whose only model is the instant fake provider, without a cache."""
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]))
+    model_key = manager.register_model(ModelConfig(
+        name="bench",
+        provider="fake",
+        model_params={"story_count": story_count},
+    ))
+    manager.set_current_model(model_key)
+    return manager
+
+
+@lru_cache(maxsize=None)
+def _generated_fields() -> Dict[str, object]:
+    manager = offline_llm_manager()
+    description = manager.generate_project_description(PROJECT_IDEA)
+    questions = manager.generate_questions(description)
+    answers = manager.generate_draft_answers(description, questions)
+    planning_questions = [{"question": q, "id": i} for i, q in enumerate(questions)]
+    planning_answers = [
+        {"question_id": i, "question": q, "answer": a}
+        for i, (q, a) in enumerate(zip(questions, answers))
+    ]
+    summary = manager.generate_planning_summary(description, planning_answers)
+    prd = manager.generate_prd_document(summary)
+    return {
+        "project_description": description,
+        "planning_questions": planning_questions,
+        "planning_answers": planning_answers,
+        "planning_summary": summary,
+        "prd_document": prd,
+        "prd_source_summary": summary,
+        "tech_stack_proposal": "Frontend: React, TypeScript\nBackend: FastAPI, PostgreSQL\nHosting: Fly.io",
+        "tech_stack_analysis": manager.analyze_tech_stack(prd, "React, FastAPI, PostgreSQL"),
+    }
+
+
+def sample_project(index: int = 0, step: ProjectStep = ProjectStep.TECH_STACK_ANALYSIS) -> Project:
+    """A project with every step filled in, positioned at ``step``."""
+    steps = list(ProjectStep)
+    fields = _generated_fields()
+    return Project(
+        id=f"bench-{index:06d}",
+        name=f"Projekt testowy {index}",
+        ai_model="fake_bench",
+        project_idea=PROJECT_IDEA,
+        project_description=fields["project_description"],
+        planning_questions=[dict(q) for q in fields["planning_questions"]],
+        planning_answers=[dict(a) for a in fields["planning_answers"]],
+        planning_summary=fields["planning_summary"],
+        prd_document=fields["prd_document"],
+        prd_source_summary=fields["prd_source_summary"],
+        tech_stack_proposal=fields["tech_stack_proposal"],
+        tech_stack_analysis=fields["tech_stack_analysis"],
+        current_step=step,
+        completed_steps=steps[:steps.index(step)],
+    )
+
+
+def qa_history(count: int) -> List[Dict[str, str]]:
+    """Planning Q&A pairs for prompt assembly benchmarks."""
+    answers = _generated_fields()["planning_answers"]
+    return [dict(answers[i % len(answers)], question_id=i) for i in range(count)]
+
+
+def sample_prd_document(story_count: int) -> PRDDocument:
+    """A PRDDocument with ``story_count`` user stories."""
+    document = PRDDocument(
+        title="Dokument wymagań produktu (PRD) - Projekt testowy",
+        product_overview="Aplikacja webowa do nauki słówek.",
+        user_problem="Użytkownicy zapominają słówek bez regularnych powtórek.",
+        functional_requirements="\n".join(f"{i}. Wymaganie {i}" for i in range(1, 21)),
+        product_boundaries="W zakresie MVP: aplikacja webowa.",
+        success_metrics="- Retencja tygodniowa 60%",
+    )
+    document.user_stories = [
+        UserStory(
+            id=f"US-{i:03d}",
+            title=f"Historyjka {i}",
+            description=f"Jako użytkownik chcę wykonać akcję {i}, aby osiągnąć cel {i}.",
+            acceptance_criteria=[f"Kryterium {j} historyjki {i}" for j in range(1, 4)],
+        )
+        for i in range(1, story_count + 1)
+    ]
+    return document
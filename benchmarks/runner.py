@@ -0,0 +1,197 @@
+"""Timing, baseline storage and comparison for the benchmark suites."""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+@dataclass
+class BenchmarkResult:
+    """Per-call timings of one benchmark, in seconds."""
+    name: str
+    repeats: int
+    median: float
+    min: float
+    p95: float
+    mean: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class Runner:
+    """Runs benchmark functions and collects their results."""
+
+    def __init__(self, quick: bool = False, name_filter: Optional[str] = None):
+        self.quick = quick
+        self.name_filter = name_filter
+        self.results: Dict[str, BenchmarkResult] = {}
+
+    def sizes(self, *sizes: int) -> List[int]:
+        """Sizes to benchmark; quick runs skip the largest one."""
+        return list(sizes[:-1]) if self.quick and len(sizes) > 1 else list(sizes)
+
+    def wanted(self, name: str) -> bool:
+        return self.name_filter is None or self.name_filter in name
+
+    def measure(self, name: str, func: Callable[[], Any], repeat: int = 7, number: int = 1,
+                warmup: int = 1, **params: Any) -> Optional[BenchmarkResult]:
+        """Time ``number`` calls of ``func`` ``repeat`` times and record per-call stats."""
+        if not self.wanted(name):
+            return None
+        if self.quick:
+            repeat = max(3, repeat // 2)
+        for _ in range(warmup):
+            func()
+
+        timings = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for _ in range(number):
+                    func()
+                timings.append((time.perf_counter() - started) / number)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        ordered = sorted(timings)
+        result = BenchmarkResult(
+            name=name,
+            repeats=repeat,
+            median=statistics.median(ordered),
+            min=ordered[0],
+            p95=ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+            mean=statistics.mean(ordered),
+            params=params,
+        )
+        self.results[name] = result
+        print(f"  {name:<48} {_format_seconds(result.median):>10}  (min {_format_seconds(result.min)})")
+        return result
+
+
+def _format_seconds(value: float) -> str:
+    if value >= 1:
+        return f"{value:.2f} s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value * 1e6:.1f} µs"
+
+
+def save_results(results: Dict[str, BenchmarkResult], path: Path) -> None:
+    """Write results as a JSON baseline."""
+    data = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: asdict(result) for name, result in sorted(results.items())},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def environment_mismatch(baseline: Dict[str, Any]) -> Optional[str]:
+    """Why a baseline's timings are not comparable with this process, or None if they are.
+    
+    Interpreter releases change the speed of the same code noticeably, so a
+    baseline is only used on the Python minor version and machine type it
+    was recorded on.
+    """
+    recorded = baseline.get("python") or "unknown"
+    if recorded.split(".")[:2] != list(platform.python_version_tuple()[:2]):
+        return f"it was recorded on Python {recorded}, this is Python {platform.python_version()}"
+    machine = baseline.get("machine") or "unknown"
+    if machine != platform.machine():
+        return f"it was recorded on {machine}, this is {platform.machine()}"
+    return None
+
+
+def compare(results: Dict[str, BenchmarkResult], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Print current vs baseline timings and return the names of regressions.
+    
+    The fastest run is compared: it is the least affected by noise from
+    other processes, so it is the most stable signal for a slowdown.
+    """
+    regressions = []
+    print()
+    print(f"{'benchmark (fastest run)':<50}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<50}{'-':>12}{_format_seconds(result.min):>12}{'new':>10}")
+            continue
+        ratio = result.min / previous["min"] if previous["min"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<50}{_format_seconds(previous['min']):>12}"
+              f"{_format_seconds(result.min):>12}{(ratio - 1) * 100:>+9.0f}%{flag}")
+    return regressions
+
+
+def build_parser(suites: List[str]) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run PRD Maker benchmarks offline")
+    parser.add_argument("--suite", action="append", choices=suites,
+                        help="Suite to run (repeatable; default: all)")
+    parser.add_argument("-k", dest="name_filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest sizes and use fewer repeats")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help=f"Baseline JSON to compare against (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument("--save", nargs="?", type=Path, const=DEFAULT_BASELINE,
+                        help="Save the results as the new baseline (default path: the baseline file)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown of the fastest run before a benchmark counts as a regression")
+    return parser
+
+
+def main(suites: Dict[str, Callable[[Runner], None]], argv: Optional[List[str]] = None) -> int:
+    args = build_parser(list(suites)).parse_args(argv)
+    runner = Runner(quick=args.quick, name_filter=args.name_filter)
+    for suite in args.suite or list(suites):
+        print(f"[{suite}]")
+        suites[suite](runner)
+
+    regressions = []
+    mismatch = None
+    if args.baseline.exists():
+        baseline = load_baseline(args.baseline)
+        mismatch = environment_mismatch(baseline)
+        if mismatch is None:
+            regressions = compare(runner.results, baseline["results"], args.tolerance)
+    if args.save:
+        # Keep saved entries of benchmarks that were not run this time, if they are comparable
+        merged = {}
+        if args.save.exists():
+            previous = load_baseline(args.save)
+            if environment_mismatch(previous) is None:
+                merged = {name: BenchmarkResult(**data) for name, data in previous["results"].items()}
+        merged.update(runner.results)
+        save_results(merged, args.save)
+        print(f"\nSaved results to {args.save}")
+        return 0
+    if mismatch is not None:
+        print(f"\nNot comparing with {args.baseline}: {mismatch}. "
+              f"Record a baseline on this interpreter with --save first.", file=sys.stderr)
+        return 2
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
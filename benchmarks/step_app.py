@@ -0,0 +1,16 @@
+"""Streamlit script used by the step rendering benchmarks."""
+
+import streamlit as st
+
+from benchmarks.fixtures import offline_llm_manager
+from src.prd_maker.core.project_storage import ProjectStorage
+from src.prd_maker.core.storage_backends import SessionStateBackend
+from src.prd_maker.ui.main import main_page
+
+# Keep benchmark projects out of the app's database
+ProjectStorage.use_backend(SessionStateBackend())
+
+if "llm_manager" not in st.session_state:
+    st.session_state.llm_manager = offline_llm_manager()
+
+main_page()
@@ -0,0 +1,264 @@
+"""Command line interface for running PRD Maker without the Streamlit UI."""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config.settings import config
+from .core.async_runner import get_async_runner
+from .core.llm_manager import LLMManager
+from .core.response_cache import ResponseCache
+from .models.project import Project, ProjectStep
+
+# Pipeline stages in execution order; each one is checkpointed when done
+STAGES = [
+    "project_description",
+    "planning_questions",
+    "planning_answers",
+    "planning_summary",
+    "prd_document",
+]
+
+
+class BatchRunner:
+    """Runs the full PRD pipeline for many ideas with resumable checkpoints."""
+
+    def __init__(self, llm_manager: LLMManager, output_dir: Path, checkpoint_dir: Path,
+                 concurrency: int = 4):
+        self.llm_manager = llm_manager
+        self.output_dir = output_dir
+        self.checkpoint_dir = checkpoint_dir
+        self.concurrency = concurrency
+        self.stage_timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.completed = 0
+        self.skipped = 0
+        self.failures: Dict[str, str] = {}
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def load_ideas(path: Path) -> List[Dict[str, Any]]:
+        """Read ideas from JSONL; each line is an object with at least ``idea``.
+
+        ``id`` and ``name`` are optional. Without an ``id`` a stable one is
+        derived from the idea text so reruns find their checkpoints.
+        """
+        ideas = []
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if not entry.get("idea", "").strip():
+                    raise ValueError(f"{path}:{line_number}: missing 'idea'")
+                entry.setdefault("id", str(uuid.uuid5(uuid.NAMESPACE_URL, entry["idea"])))
+                entry.setdefault("name", entry["idea"].strip().split("\n")[0][:60])
+                ideas.append(entry)
+        return ideas
+
+    async def run(self, ideas: List[Dict[str, Any]]) -> float:
+        """Process all ideas and return the wall-clock time in seconds."""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(entry: Dict[str, Any]) -> None:
+            async with semaphore:
+                await self.process(entry)
+
+        await asyncio.gather(*(bounded(entry) for entry in ideas))
+        return time.perf_counter() - started
+
+    async def process(self, entry: Dict[str, Any]) -> None:
+        """Run the remaining stages for one idea and write its project file."""
+        output_path = self.output_dir / f"{entry['id']}.json"
+        if output_path.exists():
+            self.skipped += 1
+            return
+
+        checkpoint = self._load_checkpoint(entry)
+        stages = checkpoint["stages"]
+        try:
+            for stage in STAGES:
+                if stage in stages:
+                    continue
+                stage_started = time.perf_counter()
+                stages[stage] = await self._run_stage(stage, entry, stages)
+                elapsed = time.perf_counter() - stage_started
+                checkpoint["timings"][stage] = elapsed
+                self.stage_timings[stage].append(elapsed)
+                self._save_checkpoint(checkpoint)
+            project = self._build_project(entry, stages)
+            self._write_atomic(output_path, project.model_dump_json(indent=2))
+        except Exception as e:
+            self.failures[entry["id"]] = f"{type(e).__name__}: {e}"
+            print(f"[failed] {entry['name']}: {e}", file=sys.stderr)
+            return
+
+        self.completed += 1
+        print(f"[done] {entry['name']} -> {output_path}")
+
+    async def _run_stage(self, stage: str, entry: Dict[str, Any], stages: Dict[str, Any]) -> Any:
+        llm = self.llm_manager
+        if stage == "project_description":
+            return await llm.agenerate_project_description(entry["idea"])
+        if stage == "planning_questions":
+            questions = await llm.agenerate_questions(stages["project_description"])
+            return [{"question": q, "id": i} for i, q in enumerate(questions)]
+        if stage == "planning_answers":
+            questions = [q["question"] for q in stages["planning_questions"]]
+            answers = await llm.agenerate_draft_answers(stages["project_description"], questions)
+            return [
+                {"question_id": q["id"], "question": q["question"], "answer": answer}
+                for q, answer in zip(stages["planning_questions"], answers)
+            ]
+        if stage == "planning_summary":
+            return await llm.agenerate_planning_summary(
+                stages["project_description"], stages["planning_answers"]
+            )
+        if stage == "prd_document":
+            return await llm.agenerate_prd_document(stages["planning_summary"])
+        raise ValueError(f"Unknown stage: {stage}")
+
+    def _build_project(self, entry: Dict[str, Any], stages: Dict[str, Any]) -> Project:
+        steps = list(ProjectStep)
+        return Project(
+            id=entry["id"],
+            name=entry["name"],
+            ai_model=self.llm_manager.current_model_key or "",
+            project_idea=entry["idea"],
+            project_description=stages["project_description"],
+            planning_questions=stages["planning_questions"],
+            planning_answers=stages["planning_answers"],
+            planning_summary=stages["planning_summary"],
+            prd_document=stages["prd_document"],
+            prd_source_summary=stages["planning_summary"],
+            current_step=ProjectStep.PRD_DOCUMENT,
+            completed_steps=steps[:steps.index(ProjectStep.PRD_DOCUMENT)],
+        )
+
+    def _checkpoint_path(self, entry: Dict[str, Any]) -> Path:
+        return self.checkpoint_dir / f"{entry['id']}.json"
+
+    def _load_checkpoint(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        path = self._checkpoint_path(entry)
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("idea") == entry["idea"]:
+                return checkpoint
+        return {"id": entry["id"], "idea": entry["idea"], "stages": {}, "timings": {}}
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        self._write_atomic(
+            self.checkpoint_dir / f"{checkpoint['id']}.json",
+            json.dumps(checkpoint, ensure_ascii=False, indent=2)
+        )
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _usage_line(self) -> str:
+        usage = self.llm_manager.usage_totals
+        return (
+            f"Tokens: {usage.input_tokens} input ({usage.cache_read_tokens} read from prompt cache, "
+            f"{usage.cache_write_tokens} written to it), {usage.output_tokens} output"
+        )
+
+    def report(self, elapsed: float) -> str:
+        """Summarize throughput and per-stage latency."""
+        lines = [
+            f"Completed: {self.completed}, skipped (already done): {self.skipped}, "
+            f"failed: {len(self.failures)}",
+            f"Wall-clock time: {elapsed:.1f} s",
+            f"Throughput: {self.completed / elapsed * 3600 if elapsed else 0:.1f} PRDs/hour",
+            self._usage_line(),
+            "",
+            f"{'stage':<22}{'calls':>7}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'max s':>9}",
+        ]
+        for stage, timings in self.stage_timings.items():
+            if not timings:
+                lines.append(f"{stage:<22}{0:>7}")
+                continue
+            ordered = sorted(timings)
+            p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+            lines.append(
+                f"{stage:<22}{len(timings):>7}{statistics.mean(timings):>9.2f}"
+                f"{statistics.median(timings):>9.2f}{p95:>9.2f}{ordered[-1]:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Entry point of the ``batch`` command."""
+    llm_manager = LLMManager(cache=ResponseCache.from_config(config))
+    available = llm_manager.list_models()
+    if not available:
+        print("No AI models available. Please configure API keys or start Ollama and pull a model.", file=sys.stderr)
+        return 1
+    try:
+        llm_manager.set_current_model(args.model or available[0])
+    except ValueError as e:
+        print(f"{e}. Available models: {', '.join(available)}", file=sys.stderr)
+        return 1
+
+    output_dir = Path(args.output_dir)
+    runner = BatchRunner(
+        llm_manager,
+        output_dir=output_dir,
+        checkpoint_dir=Path(args.checkpoint_dir) if args.checkpoint_dir else output_dir / ".checkpoints",
+        concurrency=args.concurrency,
+    )
+    ideas = runner.load_ideas(Path(args.input))
+    print(f"Processing {len(ideas)} ideas with {llm_manager.current_model_key} "
+          f"(concurrency {args.concurrency})")
+
+    # On the shared loop, where the pooled async HTTP connections live
+    elapsed = get_async_runner().run(runner.run(ideas))
+    print()
+    print(runner.report(elapsed))
+    if args.metrics_file:
+        llm_manager.telemetry.write_prometheus(args.metrics_file)
+        print(f"LLM call metrics written to {args.metrics_file}")
+    return 1 if runner.failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="prd-maker", description="PRD Maker command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser(
+        "batch",
+        help="Generate first-draft PRDs for many ideas from a JSONL file"
+    )
+    batch.add_argument("input", help="JSONL file with one {\"idea\": ..., \"name\": ...} object per line")
+    batch.add_argument("--output-dir", default="data/batch", help="Directory for Project JSON files")
+    batch.add_argument("--checkpoint-dir", help="Directory for stage checkpoints (default: OUTPUT_DIR/.checkpoints)")
+    batch.add_argument("--concurrency", type=int, default=config.llm_max_concurrency,
+                       help="Number of ideas processed at the same time")
+    batch.add_argument("--model", help="Model key to use (default: first available model)")
+    batch.add_argument("--metrics-file", default=config.metrics_file,
+                       help="Write per-call LLM metrics in Prometheus text format to this file")
+    batch.set_defaults(func=run_batch)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
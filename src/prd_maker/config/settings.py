@@ -1,12 +1,40 @@
 """Application configuration and settings."""
 
+import json
 import os
-from typing import Optional, Dict, Any
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_FALLBACK_CHAIN = [
+    "anthropic_claude-3-sonnet-20240229",
+    "openai_gpt-4",
+    "ollama_mistral",
+]
+
+# Default per-model limits by provider, shared by all sessions of the process
+DEFAULT_RATE_LIMITS = {
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 30000, "max_in_flight": 8},
+    "anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000, "max_in_flight": 4},
+    "ollama": {"max_in_flight": 2},
+}
+
+# Default model routing constraints per pipeline step (LLMManager operation):
+# "fastest" picks the quickest model whose p95 latency stays under
+# max_p95_seconds, "highest_tier" the best model available
+DEFAULT_STEP_ROUTES = {
+    "questions": {"prefer": "fastest", "max_p95_seconds": 5},
+    "draft_answers": {"prefer": "fastest", "max_p95_seconds": 10},
+    "project_description": {"prefer": "fastest", "max_p95_seconds": 15},
+    "tech_stack_chunk": {"prefer": "fastest", "max_p95_seconds": 30, "min_tier": 2},
+    "planning_summary": {"prefer": "highest_tier"},
+    "prd_document": {"prefer": "highest_tier"},
+    "prd_section": {"prefer": "highest_tier"},
+    "tech_stack": {"prefer": "highest_tier"},
+}
+
 
 @dataclass
 class ModelConfig:
@@ -16,6 +44,38 @@ class ModelConfig:
     api_key: Optional[str] = None
     base_url: Optional[str] = None
     model_params: Optional[Dict[str, Any]] = None
+    
+    # Per-model overrides of AppConfig's resilience defaults
+    timeout: Optional[float] = None
+    max_retries: Optional[int] = None
+    
+    # Per-model overrides of AppConfig.rate_limits for the model's provider
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_in_flight: Optional[int] = None
+    
+    # Estimated price in USD per 1000 tokens, for call telemetry
+    input_cost_per_1k: float = 0.0
+    output_cost_per_1k: float = 0.0
+    
+    # Quality tier for step routing: 1 light, 2 standard, 3 top
+    tier: int = 2
+    
+    # Providers that cannot be used without an API key
+    KEYED_PROVIDERS = ("openai", "anthropic")
+    
+    @property
+    def key(self) -> str:
+        """Identifier used to select the model (e.g. ``openai_gpt-4``)."""
+        return f"{self.provider}_{self.name}"
+    
+    def is_available(self) -> bool:
+        """Check whether the model has the credentials it needs."""
+        return self.provider not in self.KEYED_PROVIDERS or bool(self.api_key)
+    
+    def estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Estimated price of a call in USD."""
+        return (input_tokens * self.input_cost_per_1k + output_tokens * self.output_cost_per_1k) / 1000
 
 
 @dataclass
@@ -32,54 +92,228 @@ class AppConfig:
     # Storage settings
     use_local_storage: bool = True
     storage_key: str = "prd_maker_data"
+    # Project storage backend: "sqlite" (durable, shared by all sessions)
+    # or "session" (kept in the browser session only)
+    storage_backend: str = "sqlite"
+    storage_path: str = "data/prd_maker.db"
+    # Saves of a project within this window are written together in the
+    # background (0 writes every save immediately)
+    storage_save_debounce_seconds: float = 2.0
+    # Revision history: a text is stored in full again after at most this
+    # many deltas, which bounds the work of rebuilding a revision
+    revision_snapshot_interval: int = 64
+    
+    # Maximum number of concurrent provider calls in batch helpers
+    llm_max_concurrency: int = 4
+    
+    # Resilience defaults for provider calls
+    request_timeout: float = 60.0
+    max_retries: int = 2
+    retry_backoff_base: float = 0.5
+    retry_backoff_max: float = 8.0
+    circuit_failure_threshold: int = 3
+    circuit_reset_seconds: float = 30.0
+    
+    # Model keys tried in order when the selected model fails
+    fallback_chain: List[str] = field(default_factory=lambda: list(DEFAULT_FALLBACK_CHAIN))
+    
+    # Rate limits per provider (requests_per_minute, tokens_per_minute,
+    # max_in_flight); calls over the limit wait in a FIFO queue
+    rate_limits: Dict[str, Dict[str, float]] = field(default_factory=lambda: {
+        provider: dict(limits) for provider, limits in DEFAULT_RATE_LIMITS.items()
+    })
+    
+    # Map-reduce tech stack analysis: PRDs above the threshold are split
+    # into chunks of roughly tech_stack_chunk_tokens and analysed concurrently
+    tech_stack_chunk_threshold_tokens: int = 8000
+    tech_stack_chunk_tokens: int = 3000
+    
+    # Route each pipeline step to a model by live latency/error statistics
+    # and the step's constraints instead of using the selected model
+    model_routing: bool = False
+    step_routes: Dict[str, Dict[str, Any]] = field(default_factory=lambda: {
+        step: dict(route) for step, route in DEFAULT_STEP_ROUTES.items()
+    })
+    
+    # Longest a generation started from the UI may run before it is
+    # aborted; 0 disables the deadline
+    generation_deadline_seconds: float = 300.0
+    
+    # Speculative pre-generation of the next step (opt-in per session)
+    speculative_generation: bool = False
+    speculation_workers: int = 4
+    
+    # Provider-side prompt prefix caching: Anthropic cache_control
+    # breakpoints, and how long Ollama keeps a model loaded between calls
+    prompt_caching: bool = True
+    ollama_keep_alive: Optional[str] = "30m"
+    
+    # Ollama server of the built-in local models
+    ollama_base_url: str = "http://localhost:11434"
+    
+    # LLM response cache settings
+    cache_enabled: bool = True
+    cache_dir: Optional[str] = "data/cache/llm"
+    cache_ttl_seconds: int = 7 * 24 * 3600
+    cache_max_memory_entries: int = 256
+    cache_max_disk_entries: int = 5000
+    
+    # Per-call LLM telemetry: Prometheus text file (e.g. for the node_exporter
+    # textfile collector) and/or an HTTP port serving /metrics
+    metrics_file: Optional[str] = None
+    metrics_port: Optional[int] = None
     
     def __post_init__(self):
         if self.models is None:
             self.models = self._get_default_models()
     
     def _get_default_models(self) -> Dict[str, ModelConfig]:
-        """Get default model configurations."""
-        return {
+        """Get default model configurations, extended by MODELS_FILE if set."""
+        models = self._get_builtin_models()
+        models_file = os.getenv("MODELS_FILE")
+        if models_file:
+            models.update(load_models_file(models_file))
+        return models
+    
+    def _get_builtin_models(self) -> Dict[str, ModelConfig]:
+        """Get built-in model configurations."""
+        models = {
             "gpt-4": ModelConfig(
                 name="gpt-4",
                 provider="openai",
                 api_key=os.getenv("OPENAI_API_KEY"),
-                model_params={"temperature": 0.7}
+                model_params={"temperature": 0.7},
+                input_cost_per_1k=0.03,
+                output_cost_per_1k=0.06,
+                tier=3
             ),
             "gpt-3.5-turbo": ModelConfig(
                 name="gpt-3.5-turbo",
                 provider="openai",
                 api_key=os.getenv("OPENAI_API_KEY"),
-                model_params={"temperature": 0.7}
+                model_params={"temperature": 0.7},
+                input_cost_per_1k=0.0005,
+                output_cost_per_1k=0.0015,
+                tier=1
             ),
             "claude-3-sonnet": ModelConfig(
                 name="claude-3-sonnet-20240229",
                 provider="anthropic",
                 api_key=os.getenv("ANTHROPIC_API_KEY"),
-                model_params={"temperature": 0.7}
+                model_params={"temperature": 0.7},
+                input_cost_per_1k=0.003,
+                output_cost_per_1k=0.015,
+                tier=3
             ),
             "claude-3-haiku": ModelConfig(
                 name="claude-3-haiku-20240307",
                 provider="anthropic",
                 api_key=os.getenv("ANTHROPIC_API_KEY"),
-                model_params={"temperature": 0.7}
+                model_params={"temperature": 0.7},
+                input_cost_per_1k=0.00025,
+                output_cost_per_1k=0.00125,
+                tier=1
             ),
             "llama2": ModelConfig(
                 name="llama2",
                 provider="ollama",
-                base_url="http://localhost:11434",
-                model_params={"temperature": 0.7}
+                base_url=self.ollama_base_url,
+                model_params={"temperature": 0.7},
+                tier=1
             ),
-            "codellama": ModelConfig(
-                name="codellama",
+            "mistral": ModelConfig(
+                name="mistral",
                 provider="ollama",
-                base_url="http://localhost:11434",
-                model_params={"temperature": 0.7}
+                base_url=self.ollama_base_url,
+                model_params={"temperature": 0.7},
+                tier=1
             ),
         }
+        if os.getenv("FAKE_LLM", "false").lower() == "true":
+            # Offline model with deterministic responses for tests and load runs
+            models["fake"] = ModelConfig(
+                name="offline",
+                provider="fake",
+                model_params={
+                    "time_to_first_token": float(os.getenv("FAKE_LLM_TIME_TO_FIRST_TOKEN", "0.5")),
+                    "tokens_per_second": float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50")),
+                    "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+                    "timeout_rate": float(os.getenv("FAKE_LLM_TIMEOUT_RATE", "0")),
+                    "seed": int(os.getenv("FAKE_LLM_SEED", "0")),
+                }
+            )
+        return models
+
+
+def load_models_file(path: str) -> Dict[str, ModelConfig]:
+    """Load additional model configurations from a JSON file.
+    
+    The file maps model aliases to ModelConfig fields. ``api_key_env`` may be
+    given instead of ``api_key`` to read the key from the environment.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    
+    models = {}
+    for alias, entry in data.items():
+        entry = dict(entry)
+        api_key_env = entry.pop("api_key_env", None)
+        if api_key_env:
+            entry["api_key"] = os.getenv(api_key_env)
+        models[alias] = ModelConfig(**entry)
+    return models
+
+
+def _env_overrides(name: str, defaults: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Read per-provider or per-step settings from a JSON object in the environment.
+    
+    Entries listed there replace the defaults; ``{}`` for an entry removes
+    its settings.
+    """
+    settings = {entry: dict(values) for entry, values in defaults.items()}
+    value = os.getenv(name)
+    if value:
+        settings.update(json.loads(value))
+    return settings
+
+
+def _env_list(name: str, default: List[str]) -> List[str]:
+    """Read a comma-separated list from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 
 # Global configuration instance
 config = AppConfig(
-    debug=os.getenv("DEBUG", "false").lower() == "true"
+    debug=os.getenv("DEBUG", "false").lower() == "true",
+    storage_backend=os.getenv("STORAGE_BACKEND", "sqlite"),
+    storage_path=os.getenv("STORAGE_PATH", "data/prd_maker.db"),
+    storage_save_debounce_seconds=float(os.getenv("STORAGE_SAVE_DEBOUNCE_SECONDS", "2")),
+    revision_snapshot_interval=int(os.getenv("REVISION_SNAPSHOT_INTERVAL", "64")),
+    llm_max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "60")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+    circuit_failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3")),
+    circuit_reset_seconds=float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30")),
+    tech_stack_chunk_threshold_tokens=int(os.getenv("TECH_STACK_CHUNK_THRESHOLD_TOKENS", "8000")),
+    tech_stack_chunk_tokens=int(os.getenv("TECH_STACK_CHUNK_TOKENS", "3000")),
+    generation_deadline_seconds=float(os.getenv("LLM_GENERATION_DEADLINE", "300")),
+    speculative_generation=os.getenv("SPECULATIVE_GENERATION", "false").lower() == "true",
+    speculation_workers=int(os.getenv("SPECULATION_WORKERS", "4")),
+    prompt_caching=os.getenv("PROMPT_CACHING", "true").lower() == "true",
+    ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m") or None,
+    ollama_base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+    cache_enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+    cache_dir=os.getenv("LLM_CACHE_DIR", "data/cache/llm") or None,
+    cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    cache_max_memory_entries=int(os.getenv("LLM_CACHE_MAX_MEMORY_ENTRIES", "256")),
+    cache_max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "5000")),
+    fallback_chain=_env_list("LLM_FALLBACK_CHAIN", DEFAULT_FALLBACK_CHAIN),
+    rate_limits=_env_overrides("LLM_RATE_LIMITS", DEFAULT_RATE_LIMITS),
+    model_routing=os.getenv("LLM_ROUTING", "false").lower() == "true",
+    step_routes=_env_overrides("LLM_STEP_ROUTES", DEFAULT_STEP_ROUTES),
+    metrics_file=os.getenv("LLM_METRICS_FILE") or None,
+    metrics_port=int(os.getenv("LLM_METRICS_PORT")) if os.getenv("LLM_METRICS_PORT") else None,
 )
\ No newline at end of file
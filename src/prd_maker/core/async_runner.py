@@ -0,0 +1,130 @@
+"""Background event loop for running async LLM work from synchronous code."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Coroutine, Any, Iterator, Optional, TypeVar
+from .cancellation import POLL_INTERVAL, current_cancellation, wait_for
+
+T = TypeVar("T")
+
+
+class AsyncRunner:
+    """Runs coroutines on one long-lived event loop in a daemon thread.
+    
+    Pooled provider clients keep async HTTP connections bound to the loop
+    that opened them, so all synchronous callers (Streamlit scripts,
+    background workers) share this loop instead of calling asyncio.run.
+    """
+    
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="prd-maker-async", daemon=True)
+        self._thread.start()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+    
+    @property
+    def in_loop_thread(self) -> bool:
+        """Whether the caller runs on the runner's event loop."""
+        return threading.current_thread() is self._thread
+    
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Schedule a coroutine and return a concurrent future for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+    
+    def run(self, coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None,
+            poll: Optional[Callable[[], None]] = None) -> T:
+        """Run a coroutine to completion and return its result.
+        
+        The coroutine is cancelled if the caller's cancellation token fires.
+        ``poll`` is called from the calling thread about every POLL_INTERVAL
+        while it waits and once more when it is done, e.g. to draw progress
+        reported from the loop.
+        """
+        if self.in_loop_thread:
+            raise RuntimeError("AsyncRunner.run() cannot be called from its own event loop")
+        future = self.submit(coroutine)
+        try:
+            if poll is None:
+                return wait_for(future, timeout)
+            end = time.monotonic() + timeout if timeout is not None else None
+            while True:
+                wait = POLL_INTERVAL if end is None else min(POLL_INTERVAL, max(0.0, end - time.monotonic()))
+                try:
+                    result = wait_for(future, wait)
+                except TimeoutError:
+                    if future.done() or (end is not None and time.monotonic() >= end):
+                        raise
+                    poll()
+                    continue
+                poll()
+                return result
+        except BaseException:
+            future.cancel()
+            raise
+    
+    def iterate(self, iterator: AsyncIterator[T], poll: Optional[Callable[[], None]] = None) -> Iterator[T]:
+        """Consume an async iterator on the loop, yielding its items to the calling thread.
+        
+        Closing the returned generator, or a fired cancellation token,
+        cancels the iteration on the loop. ``poll`` is called from the
+        calling thread before each item and about every POLL_INTERVAL while
+        it waits for one.
+        """
+        items: "queue.Queue[tuple]" = queue.Queue()
+        
+        async def pump():
+            try:
+                async for item in iterator:
+                    items.put((True, item))
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                items.put((False, e))
+            else:
+                items.put((False, None))
+            finally:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        
+        token = current_cancellation()
+        future = self.submit(pump())
+        wait = POLL_INTERVAL if token is not None or poll is not None else None
+        try:
+            while True:
+                if token is not None:
+                    token.raise_if_cancelled()
+                if poll is not None:
+                    poll()
+                try:
+                    has_item, value = items.get(timeout=wait)
+                except queue.Empty:
+                    continue
+                if has_item:
+                    yield value
+                elif value is not None:
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+
+
+_runner: Optional[AsyncRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncRunner:
+    """Get the process-wide async runner, starting it on first use."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = AsyncRunner()
+    return _runner
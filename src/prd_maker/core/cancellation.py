@@ -0,0 +1,123 @@
+"""Cancellation tokens and deadlines for LLM generations."""
+
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Longest a blocked caller waits before re-checking its token
+POLL_INTERVAL = 0.1
+
+
+class GenerationCancelled(BaseException):
+    """A generation was stopped before it finished.
+
+    Like asyncio.CancelledError this is not an Exception, so the generic
+    error handlers around LLM calls (retries, fallbacks, error messages)
+    let it through. ``partial`` holds the text streamed before the stop.
+    """
+
+    def __init__(self, message: str = "Generation cancelled", partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+class DeadlineExceeded(GenerationCancelled):
+    """A generation ran past its deadline."""
+
+
+class CancellationToken:
+    """Signals that the generations started under it should stop.
+
+    A token is cancelled explicitly with ``cancel()``, when its deadline
+    passes, or when the optional ``should_stop`` callback returns True
+    (e.g. because the page that started the generation was left).
+    The token is thread-safe and may be checked from any thread.
+    """
+
+    def __init__(self, timeout: Optional[float] = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason: Optional[str] = None
+        self._should_stop = should_stop
+        self._event = threading.Event()
+        self._expired = False
+
+    def cancel(self, reason: str = "Generation cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._expired = True
+            self.cancel("Generation exceeded its deadline")
+        elif self._should_stop is not None and self._should_stop():
+            self.cancel("Generation stopped")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def error(self, partial: str = "") -> GenerationCancelled:
+        error_type = DeadlineExceeded if self._expired else GenerationCancelled
+        return error_type(self.reason or "Generation cancelled", partial)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise self.error()
+
+
+cancellation_var: ContextVar[Optional[CancellationToken]] = ContextVar("llm_cancellation", default=None)
+
+
+def current_cancellation() -> Optional[CancellationToken]:
+    """The token of the generation running in this context, if any."""
+    return cancellation_var.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make LLM calls inside the block stop when ``token`` is cancelled.
+
+    The token follows the calls onto the async runner, so provider
+    requests and streams running there are aborted as well.
+    """
+    reset = cancellation_var.set(token)
+    try:
+        yield token
+    finally:
+        cancellation_var.reset(reset)
+
+
+def wait_for(future: "Future[T]", timeout: Optional[float] = None) -> T:
+    """``future.result(timeout)`` that gives up when the current token is cancelled.
+
+    On cancellation the future is cancelled too, which aborts a coroutine
+    running on the async runner.
+    """
+    token = current_cancellation()
+    if token is None:
+        return future.result(timeout)
+    end = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        if token.cancelled:
+            future.cancel()
+            raise token.error()
+        wait = POLL_INTERVAL if end is None else min(POLL_INTERVAL, max(0.0, end - time.monotonic()))
+        try:
+            return future.result(wait)
+        except TimeoutError:
+            # Only a timeout of the wait itself, not one raised by the work
+            if future.done() or (end is not None and time.monotonic() >= end):
+                raise
@@ -0,0 +1,83 @@
+"""Sorted, paginated catalogue of project summaries."""
+
+import bisect
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ProjectPage:
+    """One page of project summaries, most recently updated first."""
+    projects: List[Dict[str, Any]] = field(default_factory=list)
+    # Pass to the next request for the following page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(summary: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after ``summary`` in catalogue order."""
+    return json.dumps([summary["updated_at"].isoformat(), summary["id"]])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    updated_at, project_id = json.loads(cursor)
+    return datetime.fromisoformat(updated_at), project_id
+
+
+def matches(summary: Dict[str, Any], name_prefix: str = "", step: Optional[str] = None,
+            is_template: Optional[bool] = None) -> bool:
+    """Whether a summary passes the catalogue filters."""
+    if step is not None and summary["current_step"] != step:
+        return False
+    if is_template is not None and summary["is_template"] != is_template:
+        return False
+    return not name_prefix or summary["name"].casefold().startswith(name_prefix.casefold())
+
+
+class ProjectCatalogue:
+    """Project summaries kept sorted by (updated_at, id), updated one project at a time.
+
+    Saving or deleting a project moves a single entry, so listing a page
+    never rebuilds or sorts the summaries of all projects.
+    """
+
+    def __init__(self, summaries: Optional[List[Dict[str, Any]]] = None):
+        self._summaries: Dict[str, Dict[str, Any]] = {summary["id"]: summary for summary in summaries or []}
+        self._keys: List[Tuple[datetime, str]] = sorted(self._key(summary) for summary in self._summaries.values())
+
+    @staticmethod
+    def _key(summary: Dict[str, Any]) -> Tuple[datetime, str]:
+        return summary["updated_at"], summary["id"]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def upsert(self, summary: Dict[str, Any]) -> None:
+        self.remove(summary["id"])
+        self._summaries[summary["id"]] = summary
+        bisect.insort(self._keys, self._key(summary))
+
+    def remove(self, project_id: str) -> None:
+        summary = self._summaries.pop(project_id, None)
+        if summary is not None:
+            index = bisect.bisect_left(self._keys, self._key(summary))
+            del self._keys[index]
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """All summaries, most recently updated first."""
+        return [self._summaries[project_id] for _, project_id in reversed(self._keys)]
+
+    def page(self, limit: int, cursor: Optional[str] = None, name_prefix: str = "",
+             step: Optional[str] = None, is_template: Optional[bool] = None) -> ProjectPage:
+        """Up to ``limit`` matching summaries after ``cursor``, most recently updated first."""
+        end = bisect.bisect_left(self._keys, decode_cursor(cursor)) if cursor else len(self._keys)
+        projects: List[Dict[str, Any]] = []
+        for index in range(end - 1, -1, -1):
+            summary = self._summaries[self._keys[index][1]]
+            if not matches(summary, name_prefix, step, is_template):
+                continue
+            if len(projects) == limit:
+                return ProjectPage(projects, encode_cursor(projects[-1]))
+            projects.append(summary)
+        return ProjectPage(projects)
@@ -0,0 +1,111 @@
+"""Splitting of large markdown documents into prompt-sized chunks."""
+
+import re
+from typing import List
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def split_sections(markdown: str, level: int = 2) -> List[str]:
+    """Split markdown before every heading of exactly the given level.
+    
+    Text before the first such heading becomes its own leading section.
+    """
+    sections: List[List[str]] = [[]]
+    for line in markdown.splitlines(keepends=True):
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) == level and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return ["".join(lines) for lines in sections if "".join(lines).strip()]
+
+
+def section_heading(section: str) -> str:
+    """Title of the first heading in a section, or an empty string."""
+    for line in section.splitlines():
+        match = HEADING_PATTERN.match(line)
+        if match:
+            return match.group(2)
+    return ""
+
+
+def _is_section(text: str, level: int) -> bool:
+    """Check whether text starts with a heading of the given level."""
+    first_line = text.lstrip("\n").split("\n", 1)[0]
+    match = HEADING_PATTERN.match(first_line)
+    return bool(match) and len(match.group(1)) == level
+
+
+def chunk_markdown(markdown: str, max_tokens: int) -> List[str]:
+    """Split markdown into chunks of at most ``max_tokens`` along its sections.
+    
+    Consecutive small ``##`` sections are packed together. Oversized
+    sections are split along ``###`` subsections (then paragraphs), with
+    the section heading repeated so every chunk keeps its context.
+    """
+    pieces: List[str] = []
+    sections = split_sections(markdown, level=2)
+    if len(sections) > 1 and not _is_section(sections[0], level=2) \
+            and estimate_tokens(sections[0] + sections[1]) <= max_tokens:
+        # Keep a document preamble (e.g. the title) with the first section
+        sections = [sections[0] + sections[1]] + sections[2:]
+    for section in sections:
+        if estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+        else:
+            pieces.extend(_split_oversized(section, max_tokens))
+    return _pack(pieces, max_tokens)
+
+
+def _split_oversized(section: str, max_tokens: int) -> List[str]:
+    lines = section.splitlines(keepends=True)
+    heading = lines[0] if lines and HEADING_PATTERN.match(lines[0]) else ""
+    body = "".join(lines[1:]) if heading else section
+    budget = max(max_tokens - estimate_tokens(heading), 1)
+    
+    parts = split_sections(body, level=3)
+    if len(parts) <= 1:
+        parts = [p + "\n\n" for p in re.split(r"\n\s*\n", body) if p.strip()]
+    
+    pieces = []
+    for part in parts:
+        if estimate_tokens(part) > budget:
+            pieces.extend(_cut_text(part, budget * 4))
+        else:
+            pieces.append(part)
+    return [heading + chunk for chunk in _pack(pieces, budget)]
+
+
+def _cut_text(text: str, max_chars: int) -> List[str]:
+    """Cut a single oversized paragraph near ``max_chars``, at a line break if possible."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n", max_chars // 2, max_chars) + 1 or text.rfind(" ", max_chars // 2, max_chars)
+        if cut == -1:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+def _pack(pieces: List[str], max_tokens: int) -> List[str]:
+    """Greedily join consecutive pieces while they fit in ``max_tokens``."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
@@ -0,0 +1,149 @@
+"""Process-wide pool of LLM provider clients shared by all sessions."""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from ..config.settings import AppConfig, ModelConfig, config
+from .async_runner import get_async_runner
+from .providers import build_chat_model
+from .rate_limiter import RateLimit, RateLimiter
+from .resilience import CircuitBreaker, ResiliencePolicy
+
+
+class ClientPool:
+    """Thread-safe cache of chat clients keyed by their configuration.
+    
+    Every session asking for the same model gets the same client object, so
+    keep-alive HTTP connections (and their TLS sessions) are reused across
+    users. OpenAI clients additionally share one HTTP connection pool for
+    synchronous calls and one for async calls, which run on the
+    process-wide AsyncRunner loop.
+    Circuit breakers and rate limiters live here too, so a provider outage
+    seen by one session is known to all of them and all sessions share
+    one quota per model.
+    """
+    
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self._clients: Dict[str, BaseChatModel] = {}
+        self._http_clients: Dict[str, Any] = {}
+        self._async_http_clients: Dict[str, Any] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._limiters: Dict[str, Optional[RateLimiter]] = {}
+        self._lock = threading.Lock()
+    
+    def get_client(self, model_config: ModelConfig, timeout: Optional[float] = None,
+                   app_config: Optional[AppConfig] = None) -> BaseChatModel:
+        """Return the shared client for a model, building it on first use."""
+        app_config = app_config or config
+        pool_key = self._pool_key(model_config, timeout, app_config)
+        client = self._clients.get(pool_key)
+        if client is not None:
+            return client
+        
+        with self._lock:
+            client = self._clients.get(pool_key)
+            if client is None:
+                client = build_chat_model(
+                    model_config,
+                    timeout=timeout,
+                    app_config=app_config,
+                    **self._shared_transport(model_config)
+                )
+                self._clients[pool_key] = client
+            return client
+    
+    def get_breaker(self, model_key: str, policy: ResiliencePolicy) -> CircuitBreaker:
+        """Return the shared circuit breaker for a model."""
+        breaker = self._breakers.get(model_key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    model_key,
+                    CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+                )
+        return breaker
+    
+    def get_limiter(self, model_key: str, limit: RateLimit) -> Optional[RateLimiter]:
+        """Return the shared rate limiter for a model, or None if it is unlimited."""
+        if model_key in self._limiters:
+            return self._limiters[model_key]
+        with self._lock:
+            if model_key not in self._limiters:
+                self._limiters[model_key] = None if limit.unlimited else RateLimiter(limit)
+            return self._limiters[model_key]
+    
+    def __len__(self) -> int:
+        return len(self._clients)
+    
+    def close(self) -> None:
+        """Drop all clients and close shared HTTP connection pools."""
+        with self._lock:
+            self._clients.clear()
+            for http_client in self._http_clients.values():
+                http_client.close()
+            self._http_clients.clear()
+            async_http_clients = list(self._async_http_clients.values())
+            self._async_http_clients.clear()
+        if async_http_clients:
+            # Async connections belong to the runner's loop and are closed there
+            runner = get_async_runner()
+            closing = [runner.submit(http_client.aclose()) for http_client in async_http_clients]
+            if not runner.in_loop_thread:
+                for future in closing:
+                    future.result()
+    
+    def _shared_transport(self, model_config: ModelConfig) -> Dict[str, Any]:
+        """Client constructor overrides that share HTTP connections.
+        
+        Caller must hold the lock. Anthropic's SDK already shares its default
+        HTTP client per base URL and Ollama clients are shared per model, so
+        only OpenAI needs explicit connection pools. The async pool is only
+        used on the AsyncRunner loop, since its connections are bound to
+        the loop that opened them.
+        """
+        if model_config.provider != "openai":
+            return {}
+        
+        import httpx
+        
+        transport_key = f"openai:{model_config.base_url or ''}"
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+        )
+        http_client = self._http_clients.get(transport_key)
+        if http_client is None:
+            http_client = self._http_clients[transport_key] = httpx.Client(limits=limits, timeout=None)
+        http_async_client = self._async_http_clients.get(transport_key)
+        if http_async_client is None:
+            http_async_client = self._async_http_clients[transport_key] = httpx.AsyncClient(
+                limits=limits, timeout=None
+            )
+        return {"http_client": http_client, "http_async_client": http_async_client}
+    
+    @staticmethod
+    def _pool_key(model_config: ModelConfig, timeout: Optional[float], app_config: AppConfig) -> str:
+        """Identify a client by everything that affects its construction."""
+        api_key_hash: Optional[str] = None
+        if model_config.api_key:
+            api_key_hash = hashlib.sha256(model_config.api_key.encode("utf-8")).hexdigest()
+        provider_settings = None
+        if model_config.provider == "ollama":
+            provider_settings = [app_config.ollama_base_url, app_config.ollama_keep_alive]
+        return json.dumps(
+            [
+                model_config.provider,
+                model_config.name,
+                model_config.base_url,
+                api_key_hash,
+                model_config.model_params or {},
+                timeout,
+                provider_settings,
+            ],
+            sort_keys=True,
+            default=str,
+        )
@@ -0,0 +1,345 @@
+"""Deterministic offline chat model for tests, CI and load generation.
+
+The fake provider needs no API key or network. It recognizes the prompts
+built by LLMManager and answers each with a realistic-shaped response, and
+its latency, throughput and failure behaviour are configurable through
+``model_params``.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+
+QUESTIONS = [
+    "Kim są główni użytkownicy produktu i jakie mają potrzeby?",
+    "Jaki jest najważniejszy problem, który produkt ma rozwiązać w MVP?",
+    "Które funkcjonalności są niezbędne w pierwszej wersji, a które można odłożyć?",
+    "Czy użytkownicy muszą zakładać konta i w jaki sposób mają się uwierzytelniać?",
+    "Na jakich platformach produkt ma być dostępny w pierwszej wersji?",
+    "Jakie dane produkt będzie przechowywał i czy są to dane wrażliwe?",
+    "Jak będziemy mierzyć sukces produktu w pierwszych trzech miesiącach?",
+    "Jakie są ograniczenia budżetowe i czasowe projektu?",
+    "Czy produkt musi integrować się z zewnętrznymi systemami lub usługami?",
+    "Jakie scenariusze błędów i sytuacje skrajne są najbardziej prawdopodobne?",
+    "Kto będzie administrował produktem i jakich narzędzi do tego potrzebuje?",
+    "Jakie wymagania dotyczące dostępności i wydajności musi spełnić MVP?",
+]
+
+STORY_TOPICS = [
+    ("Rejestracja konta", "założyć konto", "korzystać z produktu"),
+    ("Logowanie", "zalogować się do aplikacji", "uzyskać dostęp do moich danych"),
+    ("Odzyskiwanie hasła", "zresetować zapomniane hasło", "odzyskać dostęp do konta"),
+    ("Tworzenie wpisu", "dodać nowy wpis", "zapisać ważne informacje"),
+    ("Edycja wpisu", "zmienić istniejący wpis", "poprawić błędy"),
+    ("Usuwanie wpisu", "usunąć niepotrzebny wpis", "utrzymać porządek"),
+    ("Przeglądanie listy", "przeglądać listę swoich wpisów", "szybko znaleźć potrzebne dane"),
+    ("Wyszukiwanie", "wyszukać wpis po frazie", "oszczędzić czas"),
+    ("Powiadomienia", "otrzymywać przypomnienia", "nie przegapić ważnych terminów"),
+    ("Eksport danych", "wyeksportować dane do pliku", "wykorzystać je poza aplikacją"),
+    ("Obsługa braku połączenia", "zobaczyć czytelny komunikat przy braku sieci", "wiedzieć, co się stało"),
+    ("Usunięcie konta", "trwale usunąć swoje konto", "zachować kontrolę nad swoimi danymi"),
+]
+
+
+class FakeProviderError(RuntimeError):
+    """Simulated transient provider error (HTTP 503)."""
+    status_code = 503
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model producing deterministic responses with simulated latency.
+
+    Responses depend only on the prompt and ``seed``. Failures are drawn
+    from a generator seeded with ``seed``, so a given sequence of calls
+    fails at the same points on every run.
+    """
+
+    model: str = "offline"
+    seed: int = 0
+    time_to_first_token: float = 0.0
+    tokens_per_second: Optional[float] = None
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    request_timeout: Optional[float] = None
+    story_count: int = 12
+
+    model_config = ConfigDict(extra="ignore")
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        time.sleep(self.time_to_first_token)
+        self._fail_if_drawn(time.sleep)
+        time.sleep(self._generation_time(text))
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        await asyncio.sleep(self.time_to_first_token)
+        await self._afail_if_drawn()
+        await asyncio.sleep(self._generation_time(text))
+        return self._result(messages, text)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        time.sleep(self.time_to_first_token)
+        self._fail_if_drawn(time.sleep)
+        delay = self._token_delay()
+        for i, token in enumerate(TOKEN_PATTERN.findall(text)):
+            if i and delay:
+                time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        await asyncio.sleep(self.time_to_first_token)
+        await self._afail_if_drawn()
+        delay = self._token_delay()
+        for i, token in enumerate(TOKEN_PATTERN.findall(text)):
+            if i and delay:
+                await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    # Timing and failures
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _generation_time(self, text: str) -> float:
+        return _estimate_tokens(text) * self._token_delay()
+
+    def _draw_failure(self) -> Optional[str]:
+        with self._rng_lock:
+            draw = self._rng.random()
+        if draw < self.timeout_rate:
+            return "timeout"
+        if draw < self.timeout_rate + self.error_rate:
+            return "error"
+        return None
+
+    def _fail_if_drawn(self, sleep) -> None:
+        failure = self._draw_failure()
+        if failure == "timeout":
+            sleep(self.request_timeout or 0.0)
+            raise TimeoutError(f"Simulated timeout of fake model {self.model}")
+        if failure == "error":
+            raise FakeProviderError(f"Simulated provider error of fake model {self.model}")
+
+    async def _afail_if_drawn(self) -> None:
+        failure = self._draw_failure()
+        if failure == "timeout":
+            await asyncio.sleep(self.request_timeout or 0.0)
+            raise TimeoutError(f"Simulated timeout of fake model {self.model}")
+        if failure == "error":
+            raise FakeProviderError(f"Simulated provider error of fake model {self.model}")
+
+    # Responses
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> dict:
+        input_tokens = sum(_estimate_tokens(_message_text(message)) for message in messages)
+        output_tokens = _estimate_tokens(text)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        """Pick a response shaped like the answer to the recognized prompt."""
+        system = " ".join(_message_text(m) for m in messages if isinstance(m, SystemMessage))
+        prompt = _message_text(messages[-1]) if messages else ""
+        digest = hashlib.sha256(f"{self.seed}\n{system}\n{prompt}".encode("utf-8")).digest()
+        variant = int.from_bytes(digest[:4], "big")
+
+        if "Napisz sekcję PRD" in prompt:
+            heading = re.search(r'Napisz sekcję PRD "([^"]+)"', prompt).group(1)
+            return self._section(heading, variant)
+        if "Napisz historyjki użytkownika" in prompt:
+            first = re.search(r"US-(\d+)", prompt)
+            return self._stories(int(first.group(1)) if first else 1, max(1, self.story_count // 3), variant)
+        if "Jesteś doświadczonym architektem rozwiązań" in system:
+            return self._tech_stack_analysis(variant)
+        if "dokumentu wymagań produktu (PRD) w oparciu" in system:
+            return self._prd(variant)
+        if "podsumowanie rozmowy na temat planowania PRD" in system:
+            return self._summary(variant)
+        if "Przygotuj robocze odpowiedzi" in prompt:
+            count = len(re.findall(r"^\s*\d+\.", prompt.split("Przygotuj robocze odpowiedzi", 1)[1], re.M))
+            return self._answers(max(count, 1), variant)
+        if "listę 8-12 szczegółowych pytań" in prompt or "listy pytań" in system:
+            return self._questions(variant)
+        return self._description(prompt, variant)
+
+    @staticmethod
+    def _questions(variant: int) -> str:
+        count = 8 + variant % 5
+        start = variant % len(QUESTIONS)
+        picked = [QUESTIONS[(start + i) % len(QUESTIONS)] for i in range(count)]
+        return "\n".join(f"{i}. {question}" for i, question in enumerate(picked, 1))
+
+    @staticmethod
+    def _answers(count: int, variant: int) -> str:
+        return "\n".join(
+            f"{i}. Robocza odpowiedź {i}: w MVP skupiamy się na najprostszym rozwiązaniu, "
+            f"które można zweryfikować z użytkownikami w ciągu {2 + (variant + i) % 6} tygodni."
+            for i in range(1, count + 1)
+        )
+
+    @staticmethod
+    def _description(prompt: str, variant: int) -> str:
+        lines = [line.strip() for line in prompt.split(":", 1)[-1].splitlines() if line.strip()]
+        idea = lines[0] if lines else "brak opisu"
+        return (
+            f"## Problem\nUżytkownicy potrzebują prostszego sposobu na realizację następującego pomysłu: {idea[:200]}\n\n"
+            "## Grupa docelowa\nOsoby prywatne i małe zespoły, które dziś korzystają z arkuszy i notatek.\n\n"
+            "## Propozycja wartości\nAplikacja webowa automatyzująca najbardziej powtarzalne czynności.\n\n"
+            "## Kluczowe funkcjonalności\n- Zarządzanie kontem\n- Tworzenie i porządkowanie wpisów\n"
+            "- Przypomnienia i powiadomienia\n- Eksport danych\n\n"
+            f"## Cele biznesowe\nPozyskanie {100 * (1 + variant % 9)} aktywnych użytkowników w pierwszym kwartale."
+        )
+
+    @staticmethod
+    def _summary(variant: int) -> str:
+        return f"""## Decyzje podjęte podczas sesji
+1. MVP będzie aplikacją webową dostępną na komputerach i urządzeniach mobilnych.
+2. Użytkownicy zakładają konta z logowaniem przez e-mail i hasło.
+3. Pierwsza wersja zostanie udostępniona {2 + variant % 5} grupom pilotażowym.
+
+## Główne wymagania funkcjonalne
+- Zarządzanie kontem użytkownika
+- Tworzenie, edycja i usuwanie wpisów
+- Wyszukiwanie i filtrowanie wpisów
+- Przypomnienia i powiadomienia
+
+## Kluczowe historie użytkownika
+- Jako nowy użytkownik chcę założyć konto, aby zapisywać swoje dane.
+- Jako użytkownik chcę szybko dodać wpis, aby nie tracić czasu.
+
+## Kryteria sukcesu i metryki
+- {50 + variant % 50}% użytkowników wraca do aplikacji w ciągu tygodnia
+- Średni czas dodania wpisu poniżej 30 sekund
+
+## Uwagi techniczne i ograniczenia
+- Zespół dwóch programistów, budżet ograniczony do usług chmurowych w planie podstawowym
+
+## Nierozwiązane kwestie
+- Model monetyzacji po zakończeniu pilotażu"""
+
+    def _section(self, heading: str, variant: int) -> str:
+        lowered = heading.lower()
+        if "wymagania" in lowered:
+            return "\n".join(f"{i}. System umożliwia: {topic[1]}." for i, topic in enumerate(STORY_TOPICS, 1))
+        if "granice" in lowered:
+            return ("W zakresie MVP:\n- aplikacja webowa\n- konta użytkowników\n\n"
+                    "Poza zakresem MVP:\n- aplikacje natywne\n- integracje z systemami zewnętrznymi")
+        if "metryki" in lowered:
+            return (f"- Retencja tygodniowa na poziomie {50 + variant % 50}%\n"
+                    "- Czas dodania wpisu poniżej 30 sekund\n- Mniej niż 1% nieudanych zapisów")
+        if "problem" in lowered:
+            return ("Użytkownicy tracą czas na ręczne porządkowanie informacji rozproszonych "
+                    "w wielu narzędziach, przez co zapominają o ważnych terminach.")
+        return ("Produkt to aplikacja webowa pomagająca użytkownikom porządkować informacje "
+                "i pamiętać o terminach. Główną wartością jest oszczędność czasu.")
+
+    @staticmethod
+    def _stories(first_number: int, count: int, variant: int) -> str:
+        stories = []
+        for i in range(count):
+            title, action, goal = STORY_TOPICS[(variant + i) % len(STORY_TOPICS)]
+            stories.append(
+                f"### US-{first_number + i:03d}: {title}\n"
+                f"- Opis: Jako użytkownik chcę {action}, aby {goal}.\n"
+                f"- Kryteria akceptacji:\n"
+                f"  - Użytkownik może {action} w nie więcej niż trzech krokach.\n"
+                f"  - Po zakończeniu operacji wyświetlany jest komunikat potwierdzający.\n"
+                f"  - W przypadku błędu użytkownik widzi zrozumiały komunikat.\n"
+            )
+        return "\n".join(stories)
+
+    def _prd(self, variant: int) -> str:
+        return "\n".join([
+            "# Dokument wymagań produktu (PRD) - Aplikacja testowa",
+            "## 1. Przegląd produktu",
+            self._section("Przegląd produktu", variant),
+            "",
+            "## 2. Problem użytkownika",
+            self._section("Problem użytkownika", variant),
+            "",
+            "## 3. Wymagania funkcjonalne",
+            self._section("Wymagania funkcjonalne", variant),
+            "",
+            "## 4. Granice produktu",
+            self._section("Granice produktu", variant),
+            "",
+            "## 5. Historyjki użytkowników",
+            self._stories(1, self.story_count, variant),
+            "## 6. Metryki sukcesu",
+            self._section("Metryki sukcesu", variant),
+        ])
+
+    @staticmethod
+    def _tech_stack_analysis(variant: int) -> str:
+        return f"""## Analiza stosu technologicznego
+
+### Zgodność z wymaganiami PRD
+Proponowany stos pokrywa wszystkie wymagania funkcjonalne MVP.
+
+### Szybkość dostarczenia MVP
+Dojrzałe frameworki pozwalają dostarczyć MVP w około {4 + variant % 6} tygodni.
+
+### Skalowalność
+Rozwiązanie skaluje się horyzontalnie do kilkudziesięciu tysięcy użytkowników.
+
+### Koszty i złożoność
+Koszty utrzymania są niskie, a złożoność adekwatna do zakresu.
+
+### Bezpieczeństwo
+Należy zadbać o szyfrowanie haseł i ochronę przed atakami CSRF.
+
+### Alternatywne podejścia
+Prostszą alternatywą jest platforma typu backend-as-a-service.
+
+### Rekomendacje
+Pozostać przy proponowanym stosie i ograniczyć liczbę usług zewnętrznych."""
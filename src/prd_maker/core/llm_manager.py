@@ -1,106 +1,811 @@
 """LLM management and integration with LangChain."""
 
-from typing import Optional, Dict, List
+import asyncio
+import re
+import threading
+import time
+from contextlib import aclosing, closing, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Dict, List, Sequence, Tuple, TypeVar
 from langchain.llms.base import LLM
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_ollama import ChatOllama
-from langchain.schema import HumanMessage, SystemMessage
-import os
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from dotenv import load_dotenv
+from .async_runner import get_async_runner
+from .cancellation import GenerationCancelled, current_cancellation
+from .chunking import chunk_markdown, estimate_tokens, section_heading, split_sections
+from .client_pool import ClientPool
+from .ollama_manager import OllamaManager, get_ollama_manager
+from .prd_diff import affected_prd_fields, splice_prd_sections
+from .prd_sections import (
+    PRD_SECTIONS,
+    STORY_BATCHES,
+    PRDSection,
+    StoryBatch,
+    parse_user_stories,
+    renumber_user_stories,
+    strip_section_heading,
+)
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResiliencePolicy,
+    acall_with_retry,
+    call_with_retry,
+    is_retryable,
+)
+from .rate_limiter import Permit, RateLimit, queue_poller
+from .response_cache import ResponseCache
+from .router import ModelRouter
+from .single_flight import Flight, FlightAbandoned, SingleFlight, get_single_flight
+from .telemetry import CallRecord, Telemetry, get_telemetry, queue_time_var
+from .usage import TokenUsage
+from ..config.settings import AppConfig, ModelConfig, config
+from ..models.prd import PRDDocument
 
 load_dotenv()
 
+T = TypeVar("T")
+
+# Models pinned to operations for the calls of the current context only (see LLMManager.pinned)
+context_pins_var: ContextVar[Optional[Dict[str, str]]] = ContextVar("llm_context_pins", default=None)
+
 
 class LLMManager:
-    """Manages different LLM providers and models."""
+    """Manages different LLM providers and models.
+    
+    Models are registered as lightweight ModelConfig descriptors; the
+    provider client for a model is built the first time it is used and
+    taken from the (usually process-wide) client pool afterwards. The
+    manager itself only holds per-session selection state.
+    """
     
-    def __init__(self):
-        self._models: Dict[str, LLM] = {}
+    def __init__(self,
+                 cache: Optional[ResponseCache] = None,
+                 app_config: Optional[AppConfig] = None,
+                 client_pool: Optional[ClientPool] = None,
+                 telemetry: Optional[Telemetry] = None,
+                 single_flight: Optional[SingleFlight] = None):
+        self.app_config = app_config or config
+        self._registry: Dict[str, ModelConfig] = {}
         self._current_model: Optional[str] = None
-        self._initialize_default_models()
+        self.cache = cache
+        self.client_pool = client_pool if client_pool is not None else ClientPool()
+        self.fallback_chain: List[str] = list(self.app_config.fallback_chain)
+        self.last_model_used: Optional[str] = None
+        self.last_usage: Optional[TokenUsage] = None
+        self.usage_totals = TokenUsage(model_key="total")
+        self._usage_lock = threading.Lock()
+        self.telemetry = telemetry if telemetry is not None else get_telemetry()
+        self.single_flight = single_flight if single_flight is not None else get_single_flight()
+        self.router = ModelRouter(self.telemetry, self.app_config.step_routes)
+        self.routing_enabled = self.app_config.model_routing
+        self.pinned_models: Dict[str, str] = {}
+        self._initialize_default_models(self.app_config)
     
-    def _initialize_default_models(self):
-        """Initialize models with available API keys."""
-        # OpenAI models
-        if os.getenv("OPENAI_API_KEY"):
-            try:
-                self.add_openai_model("gpt-4", os.getenv("OPENAI_API_KEY"))
-                self.add_openai_model("gpt-3.5-turbo", os.getenv("OPENAI_API_KEY"))
-            except Exception:
-                pass
-        
-        # Anthropic models
-        if os.getenv("ANTHROPIC_API_KEY"):
-            try:
-                self.add_anthropic_model("claude-3-sonnet-20240229", os.getenv("ANTHROPIC_API_KEY"))
-                self.add_anthropic_model("claude-3-haiku-20240307", os.getenv("ANTHROPIC_API_KEY"))
-            except Exception:
-                pass
+    def _initialize_default_models(self, app_config: AppConfig):
+        """Register the configured models that have the credentials they need."""
+        for model_config in app_config.models.values():
+            if model_config.is_available():
+                self.register_model(model_config)
+    
+    def register_model(self, model_config: ModelConfig) -> str:
+        """Register a model descriptor without building its client.
         
-        # Ollama models (local)
-        try:
-            self.add_ollama_model("llama2")
-            self.add_ollama_model("mistral")
-        except Exception:
-            pass
+        For Ollama models this starts probing their server in the
+        background (once per server and process).
+        """
+        key = model_config.key
+        self._registry[key] = model_config
+        if model_config.provider == "ollama":
+            self._ollama(model_config)
+        return key
     
     def add_openai_model(self, model_name: str = "gpt-4", api_key: str = None) -> None:
         """Add OpenAI model to available models."""
-        self._models[f"openai_{model_name}"] = ChatOpenAI(
-            model=model_name,
+        self.register_model(ModelConfig(
+            name=model_name,
+            provider="openai",
             api_key=api_key,
-            temperature=0.7
-        )
+            model_params={"temperature": 0.7}
+        ))
     
     def add_anthropic_model(self, model_name: str = "claude-3-sonnet-20240229", api_key: str = None) -> None:
         """Add Anthropic model to available models."""
-        self._models[f"anthropic_{model_name}"] = ChatAnthropic(
-            model=model_name,
+        self.register_model(ModelConfig(
+            name=model_name,
+            provider="anthropic",
             api_key=api_key,
-            temperature=0.7
-        )
+            model_params={"temperature": 0.7}
+        ))
     
-    def add_ollama_model(self, model_name: str = "llama2", base_url: str = "http://localhost:11434") -> None:
+    def add_ollama_model(self, model_name: str = "llama2", base_url: Optional[str] = None) -> None:
         """Add Ollama model to available models."""
-        self._models[f"ollama_{model_name}"] = ChatOllama(
-            model=model_name,
-            base_url=base_url,
-            temperature=0.7
-        )
+        self.register_model(ModelConfig(
+            name=model_name,
+            provider="ollama",
+            base_url=base_url or self.app_config.ollama_base_url,
+            model_params={"temperature": 0.7}
+        ))
     
     def set_current_model(self, model_key: str) -> None:
-        """Set the current active model."""
-        if model_key not in self._models:
+        """Set the current active model.
+        
+        A local Ollama model is pre-loaded in the background so the first
+        request does not pay for loading it.
+        """
+        if model_key not in self._registry:
             raise ValueError(f"Model {model_key} not found")
         self._current_model = model_key
+        model_config = self._registry[model_key]
+        if model_config.provider == "ollama" and self._ollama(model_config).has_model(model_config.name):
+            self._ollama(model_config).warm_up_in_background(model_config.name)
+    
+    @property
+    def current_model_key(self) -> Optional[str]:
+        """Key of the currently selected model."""
+        return self._current_model
     
     def get_current_model(self) -> Optional[LLM]:
-        """Get the current active model."""
+        """Get the current active model, building its client on first use."""
         if self._current_model is None:
             return None
-        return self._models[self._current_model]
+        return self._get_client(self._current_model)
+    
+    def pin_model(self, operation: str, model_key: Optional[str]) -> None:
+        """Always use ``model_key`` for ``operation``, overriding routing; None unpins it."""
+        if model_key is None:
+            self.pinned_models.pop(operation, None)
+            return
+        if model_key not in self._registry:
+            raise ValueError(f"Model {model_key} not found")
+        self.pinned_models[operation] = model_key
+    
+    @contextmanager
+    def pinned(self, pins: Dict[str, str]) -> Iterator[None]:
+        """Pin models to operations like ``pin_model``, but only for calls made in this context.
+        
+        Background work (speculative generations) keeps the model it was
+        started with even if the session's selection changes meanwhile,
+        without affecting the session's own calls.
+        """
+        for model_key in pins.values():
+            if model_key not in self._registry:
+                raise ValueError(f"Model {model_key} not found")
+        reset = context_pins_var.set({**(context_pins_var.get() or {}), **pins})
+        try:
+            yield
+        finally:
+            context_pins_var.reset(reset)
+    
+    def model_for(self, operation: str) -> str:
+        """Model that serves an operation (pipeline step): its pinned model or the routed one."""
+        pinned = (context_pins_var.get() or {}).get(operation) or self.pinned_models.get(operation)
+        return pinned if pinned is not None else self.routed_model(operation)
+    
+    def routed_model(self, operation: str) -> str:
+        """Model chosen for an operation when no model is pinned to it.
+        
+        With routing enabled, the router picks among the available models
+        whose circuit breaker is closed using their recent latency and
+        error rate for the operation. Otherwise, and for steps without a
+        route, the current model is used.
+        """
+        if self._current_model is None:
+            raise ValueError("No model selected")
+        if self.routing_enabled:
+            models = {
+                model_key: model_config for model_key, model_config in self._registry.items()
+                if self.is_model_available(model_key) and self.is_model_healthy(model_key)
+            }
+            return self.router.choose(operation, models) or self._current_model
+        return self._current_model
+    
+    def _get_client(self, model_key: str) -> LLM:
+        """Return the pooled client for a registered model."""
+        return self.client_pool.get_client(
+            self._registry[model_key],
+            timeout=self.get_policy(model_key).timeout,
+            app_config=self.app_config
+        )
+    
+    def get_policy(self, model_key: str) -> ResiliencePolicy:
+        """Get the timeout/retry/circuit breaker policy for a model."""
+        model_config = self._registry[model_key]
+        return ResiliencePolicy(
+            timeout=model_config.timeout if model_config.timeout is not None else self.app_config.request_timeout,
+            max_retries=model_config.max_retries if model_config.max_retries is not None else self.app_config.max_retries,
+            backoff_base=self.app_config.retry_backoff_base,
+            backoff_max=self.app_config.retry_backoff_max,
+            failure_threshold=self.app_config.circuit_failure_threshold,
+            reset_timeout=self.app_config.circuit_reset_seconds,
+        )
+    
+    def get_rate_limit(self, model_key: str) -> RateLimit:
+        """Get the rate limit for a model: its provider's defaults with per-model overrides."""
+        model_config = self._registry[model_key]
+        limits = dict(self.app_config.rate_limits.get(model_config.provider) or {})
+        for name in ("requests_per_minute", "tokens_per_minute", "max_in_flight"):
+            if getattr(model_config, name) is not None:
+                limits[name] = getattr(model_config, name)
+        return RateLimit(**limits)
+    
+    def is_model_healthy(self, model_key: str) -> bool:
+        """Check whether a model's circuit breaker currently accepts calls."""
+        breaker = self.client_pool.get_breaker(model_key, self.get_policy(model_key))
+        return breaker.state != CircuitBreaker.OPEN
+    
+    def is_model_available(self, model_key: str) -> bool:
+        """Check whether a registered model can currently be used.
+        
+        Ollama models are available unless their server was probed and
+        does not report the model as pulled; other models always are. On
+        first use this waits (up to the probe timeout) for the initial
+        probe, so a cold start does not hide local models.
+        """
+        model_config = self._registry[model_key]
+        if model_config.provider != "ollama":
+            return True
+        manager = self._ollama(model_config)
+        available = manager.has_model(model_config.name)
+        if available is None:
+            manager.wait_for_probe(timeout=manager.probe_timeout)
+            available = manager.has_model(model_config.name)
+        # Still unknown: offer the model and let a failing call fall back
+        return available is not False
     
     def list_models(self) -> List[str]:
         """List all available models."""
-        return list(self._models.keys())
+        return [model_key for model_key in self._registry if self.is_model_available(model_key)]
     
-    def generate_text(self, prompt: str, system_message: str = None, **kwargs) -> str:
-        """Generate text using the current model."""
-        model = self.get_current_model()
-        if model is None:
-            raise ValueError("No model selected")
+    def _ollama(self, model_config: ModelConfig) -> OllamaManager:
+        """Manager of the Ollama server a model runs on."""
+        return get_ollama_manager(self.app_config, model_config.base_url)
+    
+    def generate_text(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                      operation: str = "generate_text", **kwargs) -> str:
+        """Generate text using the current model.
+        
+        Identical requests are served from the response cache. Pass
+        ``use_cache=False`` to force a fresh generation; its result still
+        replaces the cached entry. Transient errors are retried and, when the
+        current model keeps failing, the fallback chain is tried in order.
+        The call is recorded in the telemetry under ``operation``. An
+        identical request already in flight (from any session) is joined
+        instead of being sent again, except by a forced generation. Under a cancellation token the request
+        runs on the async runner so that it can be aborted.
+        """
+        if current_cancellation() is not None:
+            return get_async_runner().run(self.agenerate_text(
+                prompt, system_message, use_cache=use_cache, operation=operation, **kwargs
+            ), poll=queue_poller())
+        started = time.perf_counter()
+        primary = self.model_for(operation)
+        cached = self._lookup_cache(primary, prompt, system_message, use_cache, kwargs)
+        if cached is not None:
+            self._record_call(operation, primary, started, outcome="cached")
+            return cached
+        
+        key = self._flight_key(primary, prompt, system_message, kwargs)
+        while True:
+            flight, leading = self._begin_flight(key, use_cache)
+            if leading:
+                break
+            try:
+                text = "".join(flight.follow())
+            except FlightAbandoned:
+                continue
+            self._record_call(operation, primary, started, outcome="coalesced")
+            return text
+        
+        try:
+            model_key, response, queue_time = self._call_with_fallback(
+                primary,
+                lambda model_key, model: model.invoke(
+                    self._build_messages(prompt, system_message, model_key), **kwargs
+                ),
+                request_tokens=estimate_tokens((system_message or "") + prompt)
+            )
+        except Exception as e:
+            flight.fail(e)
+            self._record_call(operation, primary, started, error=e)
+            raise
+        except BaseException:
+            flight.fail(FlightAbandoned("The shared request was interrupted"))
+            self._record_call(operation, primary, started, outcome="cancelled")
+            raise
+        self._record_call(operation, model_key, started, TokenUsage.from_message(model_key, response),
+                          queue_time=queue_time)
+        text = self._response_text(response)
+        self._store_cache(prompt, system_message, kwargs, model_key, text)
+        flight.complete(text)
+        return text
+    
+    def generate_text_stream(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                             operation: str = "generate_text", **kwargs) -> Iterator[str]:
+        """Stream text from the current model chunk by chunk.
+        
+        A cached response is yielded as a single chunk. The full text is
+        written to the cache only once the stream has completed. Failover to
+        another model is only possible before the first chunk is produced.
+        Callers of an identical request already in flight receive its
+        chunks, starting with those produced so far. Under a cancellation
+        token the stream is consumed on the async runner and the
+        GenerationCancelled it raises carries the text received so far.
+        """
+        if current_cancellation() is not None:
+            received = []
+            try:
+                for text in get_async_runner().iterate(self.agenerate_text_stream(
+                    prompt, system_message, use_cache=use_cache, operation=operation, **kwargs
+                ), poll=queue_poller()):
+                    received.append(text)
+                    yield text
+            except GenerationCancelled as e:
+                e.partial = e.partial or "".join(received)
+                raise
+            return
+        started = time.perf_counter()
+        primary = self.model_for(operation)
+        cached = self._lookup_cache(primary, prompt, system_message, use_cache, kwargs)
+        if cached is not None:
+            self._record_call(operation, primary, started, outcome="cached")
+            yield cached
+            return
+        
+        key = self._flight_key(primary, prompt, system_message, kwargs)
+        while True:
+            flight, leading = self._begin_flight(key, use_cache)
+            if leading:
+                break
+            received = False
+            try:
+                for text in flight.follow():
+                    received = True
+                    yield text
+            except FlightAbandoned:
+                if received:
+                    raise
+                continue
+            self._record_call(operation, primary, started, outcome="coalesced")
+            return
         
+        with closing(self._provider_stream(primary, prompt, system_message, operation, started, kwargs)) as stream:
+            try:
+                for text in stream:
+                    flight.publish(text)
+                    yield text
+            except Exception as e:
+                flight.fail(e)
+                raise
+            except BaseException:
+                flight.fail(FlightAbandoned("The shared stream was closed before it finished"))
+                raise
+        flight.complete()
+    
+    def _provider_stream(self, primary: str, prompt: str, system_message: Optional[str], operation: str,
+                         started: float, kwargs: Dict[str, Any]) -> Iterator[str]:
+        """Stream a request from ``primary``, falling back to others before the first chunk."""
+        first_token_at: Optional[float] = None
+        queue_time = 0.0
+        request_tokens = estimate_tokens((system_message or "") + prompt)
+        last_error: Optional[BaseException] = None
+        for model_key in self._candidate_models(primary):
+            policy = self.get_policy(model_key)
+            breaker = self.client_pool.get_breaker(model_key, policy)
+            messages = self._build_messages(prompt, system_message, model_key)
+            attempt = 0
+            while breaker.allow_request():
+                chunks = []
+                usage = TokenUsage(model_key=model_key)
+                slot = self._acquire_slot(model_key, request_tokens)
+                queue_time += slot.waited
+                try:
+                    for chunk in self._get_client(model_key).stream(messages, **kwargs):
+                        usage.add_metadata(getattr(chunk, "usage_metadata", None))
+                        text = self._chunk_text(chunk)
+                        if text:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                            chunks.append(text)
+                            yield text
+                except Exception as e:
+                    breaker.record_failure()
+                    if chunks:
+                        self._record_call(operation, model_key, started, usage, error=e,
+                                          first_token_at=first_token_at, queue_time=queue_time)
+                        raise
+                    last_error = e
+                    if attempt >= policy.max_retries or not is_retryable(e):
+                        break
+                    time.sleep(policy.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                except BaseException:
+                    # Closed or cancelled by the consumer: the quota used so far is still recorded
+                    self._record_call(operation, model_key, started, usage, outcome="cancelled",
+                                      first_token_at=first_token_at, queue_time=queue_time)
+                    raise
+                finally:
+                    slot.release(usage.input_tokens + usage.output_tokens)
+                breaker.record_success()
+                self.last_model_used = model_key
+                self._record_call(operation, model_key, started, usage, first_token_at=first_token_at,
+                                  queue_time=queue_time)
+                self._store_cache(prompt, system_message, kwargs, model_key, "".join(chunks))
+                return
+            else:
+                last_error = last_error or CircuitOpenError(f"Model {model_key} is temporarily unavailable")
+        self._record_call(operation, primary, started, error=last_error, queue_time=queue_time)
+        raise last_error
+    
+    async def agenerate_text(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                             operation: str = "generate_text", **kwargs) -> str:
+        """Asynchronously generate text using the current model."""
+        started = time.perf_counter()
+        primary = self.model_for(operation)
+        cached = self._lookup_cache(primary, prompt, system_message, use_cache, kwargs)
+        if cached is not None:
+            self._record_call(operation, primary, started, outcome="cached")
+            return cached
+        
+        key = self._flight_key(primary, prompt, system_message, kwargs)
+        while True:
+            flight, leading = self._begin_flight(key, use_cache)
+            if leading:
+                break
+            try:
+                text = "".join([chunk async for chunk in flight.afollow()])
+            except FlightAbandoned:
+                continue
+            self._record_call(operation, primary, started, outcome="coalesced")
+            return text
+        
+        async def call(model_key: str, model: LLM):
+            return await model.ainvoke(self._build_messages(prompt, system_message, model_key), **kwargs)
+        
+        try:
+            model_key, response, queue_time = await self._acall_with_fallback(
+                primary, call, request_tokens=estimate_tokens((system_message or "") + prompt)
+            )
+        except Exception as e:
+            flight.fail(e)
+            self._record_call(operation, primary, started, error=e)
+            raise
+        except BaseException:
+            flight.fail(FlightAbandoned("The shared request was interrupted"))
+            self._record_call(operation, primary, started, outcome="cancelled")
+            raise
+        self._record_call(operation, model_key, started, TokenUsage.from_message(model_key, response),
+                          queue_time=queue_time)
+        text = self._response_text(response)
+        self._store_cache(prompt, system_message, kwargs, model_key, text)
+        flight.complete(text)
+        return text
+    
+    async def agenerate_text_stream(self, prompt: str, system_message: str = None, use_cache: bool = True,
+                                    operation: str = "generate_text", **kwargs) -> AsyncIterator[str]:
+        """Asynchronously stream text from the current model chunk by chunk."""
+        started = time.perf_counter()
+        primary = self.model_for(operation)
+        cached = self._lookup_cache(primary, prompt, system_message, use_cache, kwargs)
+        if cached is not None:
+            self._record_call(operation, primary, started, outcome="cached")
+            yield cached
+            return
+        
+        key = self._flight_key(primary, prompt, system_message, kwargs)
+        while True:
+            flight, leading = self._begin_flight(key, use_cache)
+            if leading:
+                break
+            received = False
+            try:
+                async for text in flight.afollow():
+                    received = True
+                    yield text
+            except FlightAbandoned:
+                if received:
+                    raise
+                continue
+            self._record_call(operation, primary, started, outcome="coalesced")
+            return
+        
+        async with aclosing(self._aprovider_stream(primary, prompt, system_message, operation, started, kwargs)) as stream:
+            try:
+                async for text in stream:
+                    flight.publish(text)
+                    yield text
+            except Exception as e:
+                flight.fail(e)
+                raise
+            except BaseException:
+                flight.fail(FlightAbandoned("The shared stream was closed before it finished"))
+                raise
+        flight.complete()
+    
+    async def _aprovider_stream(self, primary: str, prompt: str, system_message: Optional[str], operation: str,
+                                started: float, kwargs: Dict[str, Any]) -> AsyncIterator[str]:
+        """Async variant of _provider_stream."""
+        first_token_at: Optional[float] = None
+        queue_time = 0.0
+        request_tokens = estimate_tokens((system_message or "") + prompt)
+        last_error: Optional[BaseException] = None
+        for model_key in self._candidate_models(primary):
+            policy = self.get_policy(model_key)
+            breaker = self.client_pool.get_breaker(model_key, policy)
+            messages = self._build_messages(prompt, system_message, model_key)
+            attempt = 0
+            while breaker.allow_request():
+                chunks = []
+                usage = TokenUsage(model_key=model_key)
+                slot = await self._aacquire_slot(model_key, request_tokens)
+                queue_time += slot.waited
+                try:
+                    async for chunk in self._get_client(model_key).astream(messages, **kwargs):
+                        usage.add_metadata(getattr(chunk, "usage_metadata", None))
+                        text = self._chunk_text(chunk)
+                        if text:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                            chunks.append(text)
+                            yield text
+                except Exception as e:
+                    breaker.record_failure()
+                    if chunks:
+                        self._record_call(operation, model_key, started, usage, error=e,
+                                          first_token_at=first_token_at, queue_time=queue_time)
+                        raise
+                    last_error = e
+                    if attempt >= policy.max_retries or not is_retryable(e):
+                        break
+                    await asyncio.sleep(policy.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                except BaseException:
+                    # Closed or cancelled by the consumer: the quota used so far is still recorded
+                    self._record_call(operation, model_key, started, usage, outcome="cancelled",
+                                      first_token_at=first_token_at, queue_time=queue_time)
+                    raise
+                finally:
+                    slot.release(usage.input_tokens + usage.output_tokens)
+                breaker.record_success()
+                self.last_model_used = model_key
+                self._record_call(operation, model_key, started, usage, first_token_at=first_token_at,
+                                  queue_time=queue_time)
+                self._store_cache(prompt, system_message, kwargs, model_key, "".join(chunks))
+                return
+            else:
+                last_error = last_error or CircuitOpenError(f"Model {model_key} is temporarily unavailable")
+        self._record_call(operation, primary, started, error=last_error, queue_time=queue_time)
+        raise last_error
+    
+    async def agenerate_many(self,
+                             requests: Sequence[Tuple[str, Optional[str]]],
+                             max_concurrency: Optional[int] = None,
+                             use_cache: bool = True,
+                             operation: str = "generate_text",
+                             **kwargs) -> List[str]:
+        """Generate texts for many (prompt, system_message) pairs concurrently.
+        
+        Results are returned in the order of ``requests``.
+        """
+        return await self.run_concurrently(
+            [self.agenerate_text(prompt, system_message, use_cache=use_cache, operation=operation, **kwargs)
+             for prompt, system_message in requests],
+            max_concurrency=max_concurrency,
+        )
+    
+    async def run_concurrently(self, coroutines: Iterable[Awaitable[T]],
+                               max_concurrency: Optional[int] = None) -> List[T]:
+        """Await coroutines with at most ``max_concurrency`` running at once.
+        
+        The limit defaults to ``llm_max_concurrency`` of this manager's app
+        config. Results are returned in input order; the first exception is
+        raised after the remaining coroutines have been cancelled. The time
+        each coroutine waited for a slot is reported to the telemetry as
+        queue time.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.app_config.llm_max_concurrency)
+        
+        async def bounded(coroutine: Awaitable[T]) -> T:
+            queued = time.perf_counter()
+            async with semaphore:
+                queue_time_var.set(time.perf_counter() - queued)
+                return await coroutine
+        
+        tasks = [asyncio.ensure_future(bounded(coroutine)) for coroutine in coroutines]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _candidate_models(self, primary: str) -> List[str]:
+        """``primary`` followed by registered models from the fallback chain."""
+        candidates = [primary]
+        for model_key in self.fallback_chain:
+            if model_key in self._registry and model_key not in candidates and self.is_model_available(model_key):
+                candidates.append(model_key)
+        return candidates
+    
+    def _call_with_fallback(self, primary: str, call: Callable[[str, LLM], T],
+                            request_tokens: int = 0) -> Tuple[str, T, float]:
+        """Run ``call`` against the first healthy model that succeeds, starting with ``primary``.
+        
+        Every attempt, including retries, waits for the model's rate limiter.
+        Returns the model key, the result and the total time spent waiting.
+        """
+        last_error: Optional[BaseException] = None
+        queue_time = 0.0
+        for model_key in self._candidate_models(primary):
+            policy = self.get_policy(model_key)
+            breaker = self.client_pool.get_breaker(model_key, policy)
+            if not breaker.allow_request():
+                last_error = last_error or CircuitOpenError(f"Model {model_key} is temporarily unavailable")
+                continue
+            
+            def attempt():
+                nonlocal queue_time
+                with self._acquire_slot(model_key, request_tokens) as slot:
+                    queue_time += slot.waited
+                    result = call(model_key, self._get_client(model_key))
+                    slot.release(self._used_tokens(result))
+                    return result
+            
+            try:
+                result = call_with_retry(attempt, policy, breaker)
+            except Exception as e:
+                last_error = e
+                continue
+            self.last_model_used = model_key
+            return model_key, result, queue_time
+        raise last_error
+    
+    async def _acall_with_fallback(self, primary: str, call: Callable[[str, LLM], Awaitable[T]],
+                                   request_tokens: int = 0) -> Tuple[str, T, float]:
+        """Async variant of _call_with_fallback."""
+        last_error: Optional[BaseException] = None
+        queue_time = 0.0
+        for model_key in self._candidate_models(primary):
+            policy = self.get_policy(model_key)
+            breaker = self.client_pool.get_breaker(model_key, policy)
+            if not breaker.allow_request():
+                last_error = last_error or CircuitOpenError(f"Model {model_key} is temporarily unavailable")
+                continue
+            
+            async def attempt():
+                nonlocal queue_time
+                with await self._aacquire_slot(model_key, request_tokens) as slot:
+                    queue_time += slot.waited
+                    result = await call(model_key, self._get_client(model_key))
+                    slot.release(self._used_tokens(result))
+                    return result
+            
+            try:
+                result = await acall_with_retry(attempt, policy, breaker)
+            except Exception as e:
+                last_error = e
+                continue
+            self.last_model_used = model_key
+            return model_key, result, queue_time
+        raise last_error
+    
+    def _acquire_slot(self, model_key: str, request_tokens: int) -> Permit:
+        """Wait for the shared rate limiter of a model to admit a call."""
+        limiter = self.client_pool.get_limiter(model_key, self.get_rate_limit(model_key))
+        return limiter.acquire(request_tokens) if limiter is not None else Permit()
+    
+    async def _aacquire_slot(self, model_key: str, request_tokens: int) -> Permit:
+        """Async variant of _acquire_slot."""
+        limiter = self.client_pool.get_limiter(model_key, self.get_rate_limit(model_key))
+        return await limiter.aacquire(request_tokens) if limiter is not None else Permit()
+    
+    @staticmethod
+    def _used_tokens(response) -> int:
+        usage = getattr(response, "usage_metadata", None) or {}
+        return (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+    
+    def _flight_key(self, model_key: str, prompt: str, system_message: Optional[str], params: Dict[str, Any]) -> str:
+        """Key under which identical in-flight requests are coalesced."""
+        return ResponseCache.make_key(model_key, system_message, prompt, params)
+    
+    def _begin_flight(self, key: str, use_cache: bool) -> Tuple[Flight, bool]:
+        """Join or lead the flight for ``key``; a forced generation always leads a private one."""
+        if not use_cache:
+            return Flight(lambda finished: None), True
+        return self.single_flight.begin(key)
+    
+    def _lookup_cache(self, model_key: str, prompt: str, system_message: Optional[str], use_cache: bool,
+                      params: Dict[str, Any]) -> Optional[str]:
+        """Return the cached response of a model for a request."""
+        if self.cache is None or not use_cache:
+            return None
+        return self.cache.get(ResponseCache.make_key(model_key, system_message, prompt, params))
+    
+    def _store_cache(self, prompt: str, system_message: Optional[str], params: Dict[str, Any],
+                     model_key: str, text: str) -> None:
+        """Cache a response under the model that actually produced it."""
+        if self.cache is not None:
+            self.cache.set(ResponseCache.make_key(model_key, system_message, prompt, params), text)
+    
+    @staticmethod
+    def _response_text(response) -> str:
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    def _build_messages(self, prompt: str, system_message: Optional[str],
+                        model_key: Optional[str] = None) -> List[BaseMessage]:
+        """Build the chat message list for a single-turn request.
+        
+        The static system message always comes first and the prompts put
+        their fixed instructions before the variable data, so the request
+        starts with a byte-stable prefix: OpenAI caches it automatically and
+        for Anthropic models it is marked with a ``cache_control`` breakpoint.
+        """
         messages = []
         if system_message:
-            messages.append(SystemMessage(content=system_message))
+            if self._caches_prompt_explicitly(model_key):
+                messages.append(SystemMessage(content=[{
+                    "type": "text",
+                    "text": system_message,
+                    "cache_control": {"type": "ephemeral"},
+                }]))
+            else:
+                messages.append(SystemMessage(content=system_message))
         messages.append(HumanMessage(content=prompt))
+        return messages
+    
+    def _caches_prompt_explicitly(self, model_key: Optional[str]) -> bool:
+        """Check whether prompt prefixes must be marked for caching for a model."""
+        return (
+            self.app_config.prompt_caching
+            and model_key is not None
+            and self._registry[model_key].provider == "anthropic"
+        )
+    
+    def _record_call(self, operation: str, model_key: Optional[str], started: float,
+                     usage: Optional[TokenUsage] = None, outcome: str = "ok",
+                     error: Optional[BaseException] = None,
+                     first_token_at: Optional[float] = None, queue_time: float = 0.0) -> None:
+        """Remember the token usage of a call and report it to the telemetry.
         
-        response = model.invoke(messages, **kwargs)
-        return response.content if hasattr(response, 'content') else str(response)
+        ``queue_time`` is the time spent waiting for rate limiters; it is
+        added to any wait for a concurrency slot in run_concurrently.
+        """
+        if usage is not None:
+            with self._usage_lock:
+                self.last_usage = usage
+                self.usage_totals.add(usage)
+        model_config = self._registry.get(model_key) if model_key else None
+        self.telemetry.record(CallRecord(
+            operation=operation,
+            model_key=model_key or "none",
+            outcome="error" if error is not None else outcome,
+            latency=time.perf_counter() - started,
+            queue_time=queue_time_var.get() + queue_time,
+            time_to_first_token=first_token_at - started if first_token_at is not None else None,
+            input_tokens=usage.input_tokens if usage else 0,
+            output_tokens=usage.output_tokens if usage else 0,
+            cache_read_tokens=usage.cache_read_tokens if usage else 0,
+            cache_write_tokens=usage.cache_write_tokens if usage else 0,
+            cost=model_config.estimate_cost(usage.input_tokens, usage.output_tokens)
+            if usage and model_config else 0.0,
+            error=type(error).__name__ if error is not None else None,
+        ))
     
-    def generate_questions(self, project_description: str) -> List[str]:
-        """Generate planning questions based on project description."""
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Extract plain text from a streamed message chunk."""
+        content = chunk.content if hasattr(chunk, 'content') else chunk
+        if isinstance(content, str):
+            return content
+        # Some providers stream lists of content blocks
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    
+    def _questions_prompt(self, project_description: str) -> Tuple[str, str]:
+        """Build system message and prompt for planning questions."""
         system_message = """Jesteś doświadczonym menedżerem produktu, którego zadaniem jest pomoc w stworzeniu kompleksowego dokumentu wymagań projektowych (PRD) na podstawie dostarczonych informacji. Twoim celem jest wygenerowanie listy pytań i zaleceń, które zostaną wykorzystane w kolejnym promptowaniu do utworzenia pełnego PRD.
 
 Przeanalizuj dostarczone informacje, koncentrując się na aspektach istotnych dla tworzenia PRD. Rozważ następujące kwestie:
@@ -120,18 +825,37 @@ Na podstawie analizy wygeneruj listę pytań. Powinny one dotyczyć wszelkich ni
 
 Zwróć wyłącznie pytania w języku polskim, ponumerowane dla jasności. Każde pytanie w osobnej linii."""
         
-        prompt = f"""Na podstawie poniższego opisu projektu:
+        prompt = f"""Wygeneruj listę 8-12 szczegółowych pytań, które pomogą doprecyzować wymagania do stworzenia kompleksowego PRD, na podstawie poniższego opisu projektu:
 
-{project_description}
-
-Wygeneruj listę 8-12 szczegółowych pytań, które pomogą doprecyzować wymagania do stworzenia kompleksowego PRD."""
+{project_description}"""
         
-        response = self.generate_text(prompt, system_message)
+        return system_message, prompt
+    
+    @staticmethod
+    def parse_questions(response: str) -> List[str]:
+        """Split a questions response into individual questions."""
         questions = [q.strip() for q in response.split('\n') if q.strip() and not q.strip().startswith('#') and q.strip()]
         return questions[:12]  # Limit to 12 questions
     
-    def generate_project_description(self, project_idea: str) -> str:
-        """Generate detailed project description from basic idea."""
+    def generate_questions(self, project_description: str, use_cache: bool = True) -> List[str]:
+        """Generate planning questions based on project description."""
+        system_message, prompt = self._questions_prompt(project_description)
+        response = self.generate_text(prompt, system_message, use_cache=use_cache, operation="questions")
+        return self.parse_questions(response)
+    
+    async def agenerate_questions(self, project_description: str, use_cache: bool = True) -> List[str]:
+        """Asynchronously generate planning questions."""
+        system_message, prompt = self._questions_prompt(project_description)
+        response = await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="questions")
+        return self.parse_questions(response)
+    
+    def stream_questions(self, project_description: str, use_cache: bool = True) -> Iterator[str]:
+        """Stream the raw planning questions text; parse it with parse_questions."""
+        system_message, prompt = self._questions_prompt(project_description)
+        return self.generate_text_stream(prompt, system_message, use_cache=use_cache, operation="questions")
+    
+    def _project_description_prompt(self, project_idea: str) -> Tuple[str, str]:
+        """Build system message and prompt for the project description."""
         system_message = """You are a product management expert. Transform basic project ideas into structured, comprehensive project descriptions. Include:
         - Clear problem statement
         - Target audience
@@ -147,10 +871,70 @@ Wygeneruj listę 8-12 szczegółowych pytań, które pomogą doprecyzować wymag
         
         Create a detailed description that covers the problem, solution, target users, and key features."""
         
-        return self.generate_text(prompt, system_message)
+        return system_message, prompt
     
-    def generate_planning_summary(self, project_description: str, qa_history: List[Dict[str, str]]) -> str:
-        """Generate planning summary from Q&A session."""
+    def generate_project_description(self, project_idea: str, use_cache: bool = True) -> str:
+        """Generate detailed project description from basic idea."""
+        system_message, prompt = self._project_description_prompt(project_idea)
+        return self.generate_text(prompt, system_message, use_cache=use_cache, operation="project_description")
+    
+    async def agenerate_project_description(self, project_idea: str, use_cache: bool = True) -> str:
+        """Asynchronously generate detailed project description."""
+        system_message, prompt = self._project_description_prompt(project_idea)
+        return await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="project_description")
+    
+    def stream_project_description(self, project_idea: str, use_cache: bool = True) -> Iterator[str]:
+        """Stream detailed project description from basic idea."""
+        system_message, prompt = self._project_description_prompt(project_idea)
+        return self.generate_text_stream(prompt, system_message, use_cache=use_cache, operation="project_description")
+    
+    def _draft_answers_prompt(self, project_description: str, questions: List[str]) -> Tuple[str, str]:
+        """Build system message and prompt for auto-drafted planning answers."""
+        system_message = """Jesteś doświadczonym menedżerem produktu, który przygotowuje robocze odpowiedzi na pytania z sesji planistycznej PRD w imieniu zespołu produktowego.
+
+Dla każdego pytania zaproponuj konkretną, realistyczną odpowiedź wynikającą z opisu projektu. Jeśli opis nie rozstrzyga kwestii, przyjmij rozsądne założenie właściwe dla MVP i zaznacz je słowem "Założenie:".
+
+Odpowiadaj w języku polskim. Zwróć wyłącznie odpowiedzi, ponumerowane tak samo jak pytania, każdą zaczynając od nowej linii w formacie "N. odpowiedź"."""
+        
+        questions_text = "\n".join(f"{i + 1}. {question}" for i, question in enumerate(questions))
+        prompt = f"""Na podstawie poniższego opisu projektu:
+
+{project_description}
+
+Przygotuj robocze odpowiedzi na następujące pytania:
+
+{questions_text}"""
+        
+        return system_message, prompt
+    
+    @staticmethod
+    def parse_draft_answers(response: str, question_count: int) -> List[str]:
+        """Split a numbered answers response into one answer per question."""
+        answers: Dict[int, List[str]] = {}
+        current = None
+        for line in response.split('\n'):
+            match = re.match(r"^\s*(\d+)[.)]\s*(.*)$", line)
+            if match and 1 <= int(match.group(1)) <= question_count:
+                current = int(match.group(1))
+                answers[current] = [match.group(2).strip()]
+            elif current is not None and line.strip():
+                answers[current].append(line.strip())
+        return [" ".join(answers.get(i + 1, [])) for i in range(question_count)]
+    
+    def generate_draft_answers(self, project_description: str, questions: List[str], use_cache: bool = True) -> List[str]:
+        """Draft answers to planning questions (used for unattended runs)."""
+        system_message, prompt = self._draft_answers_prompt(project_description, questions)
+        response = self.generate_text(prompt, system_message, use_cache=use_cache, operation="draft_answers")
+        return self.parse_draft_answers(response, len(questions))
+    
+    async def agenerate_draft_answers(self, project_description: str, questions: List[str], use_cache: bool = True) -> List[str]:
+        """Asynchronously draft answers to planning questions."""
+        system_message, prompt = self._draft_answers_prompt(project_description, questions)
+        response = await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="draft_answers")
+        return self.parse_draft_answers(response, len(questions))
+    
+    def _planning_summary_prompt(self, project_description: str, qa_history: List[Dict[str, str]]) -> Tuple[str, str]:
+        """Build system message and prompt for the planning summary."""
         system_message = """Jesteś asystentem AI, którego zadaniem jest podsumowanie rozmowy na temat planowania PRD (Product Requirements Document) dla MVP i przygotowanie zwięzłego podsumowania dla następnego etapu rozwoju.
 
 Twoim zadaniem jest:
@@ -185,20 +969,33 @@ Końcowy wynik powinien być jasny, zwięzły i zawierać cenne informacje dla n
         
         qa_text = "\n".join([f"Pytanie: {qa['question']}\nOdpowiedź: {qa['answer']}" for qa in qa_history if qa.get('answer', '').strip()])
         
-        prompt = f"""Na podstawie poniższych informacji z sesji planistycznej stwórz strukturalne podsumowanie:
+        prompt = f"""Przeanalizuj wszystkie poniższe informacje z sesji planistycznej i stwórz kompleksowe, strukturalne podsumowanie zgodnie z podanym formatem.
 
 ## OPIS PROJEKTU:
 {project_description}
 
 ## HISTORIA ROZMOWY (PYTANIA I ODPOWIEDZI):
-{qa_text}
-
-Przeanalizuj wszystkie informacje i stwórz kompleksowe podsumowanie zgodnie z podanym formatem."""
+{qa_text}"""
         
-        return self.generate_text(prompt, system_message)
+        return system_message, prompt
     
-    def generate_prd_document(self, planning_summary: str) -> str:
-        """Generate final PRD document from planning summary."""
+    def generate_planning_summary(self, project_description: str, qa_history: List[Dict[str, str]], use_cache: bool = True) -> str:
+        """Generate planning summary from Q&A session."""
+        system_message, prompt = self._planning_summary_prompt(project_description, qa_history)
+        return self.generate_text(prompt, system_message, use_cache=use_cache, operation="planning_summary")
+    
+    async def agenerate_planning_summary(self, project_description: str, qa_history: List[Dict[str, str]], use_cache: bool = True) -> str:
+        """Asynchronously generate planning summary."""
+        system_message, prompt = self._planning_summary_prompt(project_description, qa_history)
+        return await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="planning_summary")
+    
+    def stream_planning_summary(self, project_description: str, qa_history: List[Dict[str, str]], use_cache: bool = True) -> Iterator[str]:
+        """Stream planning summary from Q&A session."""
+        system_message, prompt = self._planning_summary_prompt(project_description, qa_history)
+        return self.generate_text_stream(prompt, system_message, use_cache=use_cache, operation="planning_summary")
+    
+    def _prd_document_prompt(self, planning_summary: str) -> Tuple[str, str]:
+        """Build system message and prompt for the PRD document."""
         system_message = """Jesteś doświadczonym menedżerem produktu, którego zadaniem jest stworzenie kompleksowego dokumentu wymagań produktu (PRD) w oparciu o poniższe opisy.
 
 Wykonaj następujące kroki, aby stworzyć kompleksowy i dobrze zorganizowany dokument:
@@ -250,16 +1047,136 @@ Pamiętaj, aby wypełnić każdą sekcję szczegółowymi, istotnymi informacjam
 
 Ostateczny wynik powinien składać się wyłącznie z PRD zgodnego ze wskazanym formatem w markdown."""
         
-        prompt = f"""Na podstawie poniższego podsumowania sesji planistycznej stwórz kompletny dokument PRD:
+        prompt = f"""Na podstawie poniższego podsumowania sesji planistycznej stwórz kompletny i kompleksowy dokument PRD ze wszystkimi wymaganymi sekcjami, sformatowany w Markdown zgodnie z podaną strukturą:
+
+{planning_summary}"""
+        
+        return system_message, prompt
+    
+    def generate_prd_document(self, planning_summary: str, use_cache: bool = True) -> str:
+        """Generate final PRD document from planning summary."""
+        system_message, prompt = self._prd_document_prompt(planning_summary)
+        return self.generate_text(prompt, system_message, use_cache=use_cache, operation="prd_document")
+    
+    async def agenerate_prd_document(self, planning_summary: str, use_cache: bool = True) -> str:
+        """Asynchronously generate final PRD document."""
+        system_message, prompt = self._prd_document_prompt(planning_summary)
+        return await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="prd_document")
+    
+    def stream_prd_document(self, planning_summary: str, use_cache: bool = True) -> Iterator[str]:
+        """Stream final PRD document from planning summary."""
+        system_message, prompt = self._prd_document_prompt(planning_summary)
+        return self.generate_text_stream(prompt, system_message, use_cache=use_cache, operation="prd_document")
+    
+    def _prd_section_prompt(self, section: PRDSection, planning_summary: str) -> Tuple[str, str]:
+        """Build system message and prompt for a single PRD section."""
+        system_message = """Jesteś doświadczonym menedżerem produktu i piszesz jedną sekcję dokumentu wymagań produktu (PRD) na podstawie podsumowania sesji planistycznej. Pozostałe sekcje powstają równolegle, więc skup się wyłącznie na swojej sekcji.
+
+Upewnij się, że:
+- Używasz jasnego i zwięzłego języka
+- W razie potrzeby podajesz konkretne szczegóły i dane
+- Odnosisz się do wszystkich istotnych informacji z podsumowania
+- Nie używasz pogrubionego formatowania w markdown (**)
+
+Zwróć wyłącznie treść sekcji w poprawnym markdown, bez nagłówka sekcji. Pisz w języku polskim."""
+        
+        prompt = f"""## PODSUMOWANIE SESJI PLANISTYCZNEJ:
+{planning_summary}
+
+Napisz sekcję PRD "{section.heading}". {section.guidance}"""
+        
+        return system_message, prompt
+    
+    def _prd_story_batch_prompt(self, batch: StoryBatch, planning_summary: str) -> Tuple[str, str]:
+        """Build system message and prompt for one batch of user stories."""
+        system_message = """Jesteś doświadczonym menedżerem produktu i piszesz historyjki użytkownika do dokumentu wymagań produktu (PRD) na podstawie podsumowania sesji planistycznej. Inne grupy historyjek powstają równolegle, więc opisz wyłącznie historyjki z zadanego zakresu.
+
+Wymień WSZYSTKIE niezbędne historyjki z tego zakresu i upewnij się, że każda jest testowalna. Użyj dokładnie następującej struktury dla każdej historyjki:
 
+### US-XXX: Tytuł
+- Opis: Jako [użytkownik] chcę [akcja] aby [cel]
+- Kryteria akceptacji:
+  - [kryterium]
+  - [kryterium]
+
+Nie używaj pogrubionego formatowania w markdown (**). Zwróć wyłącznie historyjki, bez dodatkowych nagłówków i komentarzy. Pisz w języku polskim."""
+        
+        prompt = f"""## PODSUMOWANIE SESJI PLANISTYCZNEJ:
 {planning_summary}
 
-Stwórz kompleksowy PRD ze wszystkimi wymaganymi sekcjami, sformatowany w Markdown zgodnie z podaną strukturą."""
+Napisz historyjki użytkownika z zakresu: {batch.scope}. Numeruj je kolejno od US-{batch.first_number:03d}. Jeśli produkt nie wymaga żadnych historyjek z tego zakresu, nie zwracaj nic."""
+        
+        return system_message, prompt
+    
+    async def _agenerate_prd_parts(self, fields: Sequence[str], planning_summary: str,
+                                   use_cache: bool = True) -> Dict[str, Any]:
+        """Generate the given PRD fields concurrently.
+        
+        Each section and each batch of user stories is a separate model call,
+        so the total latency is roughly that of the slowest one. Text fields
+        map to their markdown, ``user_stories`` to renumbered UserStory objects.
+        """
+        sections = [section for section in PRD_SECTIONS if section.field in fields]
+        batches = STORY_BATCHES if "user_stories" in fields else []
+        prompts = [self._prd_section_prompt(section, planning_summary) for section in sections]
+        prompts += [self._prd_story_batch_prompt(batch, planning_summary) for batch in batches]
+        requests = [(prompt, system_message) for system_message, prompt in prompts]
+        results = await self.agenerate_many(requests, max_concurrency=len(requests), use_cache=use_cache,
+                                            operation="prd_section")
         
-        return self.generate_text(prompt, system_message)
+        parts: Dict[str, Any] = {
+            section.field: strip_section_heading(text, section.heading)
+            for section, text in zip(sections, results)
+        }
+        if batches:
+            stories = []
+            for text in results[len(sections):]:
+                stories.extend(parse_user_stories(text))
+            parts["user_stories"] = renumber_user_stories(stories)
+        return parts
+    
+    async def agenerate_prd_sections(self, planning_summary: str, title: str, use_cache: bool = True) -> PRDDocument:
+        """Generate the PRD section by section, concurrently."""
+        fields = [section.field for section in PRD_SECTIONS] + ["user_stories"]
+        parts = await self._agenerate_prd_parts(fields, planning_summary, use_cache=use_cache)
+        return PRDDocument(title=title, **parts)
+    
+    def generate_prd_sections(self, planning_summary: str, title: str, use_cache: bool = True) -> PRDDocument:
+        """Generate the PRD section by section, concurrently (blocking)."""
+        return get_async_runner().run(self.agenerate_prd_sections(planning_summary, title, use_cache=use_cache),
+                                      poll=queue_poller())
+    
+    async def aupdate_prd_document(self, prd_document: str, previous_summary: str, planning_summary: str,
+                                   use_cache: bool = True) -> Tuple[str, List[str]]:
+        """Regenerate only the PRD sections affected by a planning summary edit.
+        
+        Returns the updated document and the regenerated fields. Sections
+        that do not depend on the changed parts of the summary, including
+        any manual edits to them, are kept as they are.
+        """
+        fields = affected_prd_fields(previous_summary, planning_summary)
+        if not fields:
+            return prd_document, []
+        parts = await self._agenerate_prd_parts(fields, planning_summary, use_cache=use_cache)
+        if "user_stories" in parts:
+            parts["user_stories"] = "".join(story.to_markdown() for story in parts["user_stories"])
+        return splice_prd_sections(prd_document, parts), fields
+    
+    def update_prd_document(self, prd_document: str, previous_summary: str, planning_summary: str,
+                            use_cache: bool = True) -> Tuple[str, List[str]]:
+        """Regenerate only the PRD sections affected by a planning summary edit (blocking)."""
+        return get_async_runner().run(self.aupdate_prd_document(
+            prd_document, previous_summary, planning_summary, use_cache=use_cache
+        ), poll=queue_poller())
     
-    def analyze_tech_stack(self, prd_document: str, tech_stack_proposal: str) -> str:
-        """Analyze tech stack proposal against PRD requirements."""
+    def _tech_stack_prompt(self, prd_document: str, tech_stack_proposal: str,
+                           partial_findings: Optional[List[str]] = None) -> Tuple[str, str]:
+        """Build system message and prompt for the tech stack analysis.
+        
+        With ``partial_findings`` (chunked mode) the prompt is the reduce step:
+        it carries the findings for each PRD fragment and only the outline
+        of the document instead of its full text.
+        """
         system_message = """Jesteś doświadczonym architektem rozwiązań i menedżerem produktu. Twoim zadaniem jest dokonanie krytycznej lecz rzeczowej analizy czy zaproponowany stos technologiczny odpowiednio adresuje potrzeby opisane w PRD.
 
 Dokonaj analizy rozważając następujące pytania:
@@ -297,14 +1214,113 @@ Sformatuj analizę w następujący sposób:
 
 Pisz w języku polskim, bądź konkretny i merytoryczny."""
         
-        prompt = f"""Dokonaj analizy następującego stosu technologicznego w kontekście wymagań PRD:
+        if partial_findings is not None:
+            outline = "\n".join(
+                f"- {heading}" for heading in map(section_heading, split_sections(prd_document)) if heading
+            )
+            findings_text = "\n\n".join(
+                f"### Fragment {i + 1}\n{findings}" for i, findings in enumerate(partial_findings)
+            )
+            prompt = f"""Dokonaj analizy następującego stosu technologicznego w kontekście wymagań PRD. Dokument PRD jest zbyt obszerny, aby przeanalizować go w jednym kroku, dlatego poniżej znajdują się cząstkowe ustalenia z analizy jego kolejnych fragmentów. Połącz cząstkowe ustalenia w jedną spójną analizę zgodnie z podanymi wytycznymi, usuwając powtórzenia i rozstrzygając sprzeczności.
+
+## STRUKTURA DOKUMENTU PRD:
+{outline}
+
+## CZĄSTKOWE USTALENIA:
+{findings_text}
+
+## PROPONOWANY STOS TECHNOLOGICZNY:
+{tech_stack_proposal}"""
+            return system_message, prompt
+        
+        prompt = f"""Wykonaj szczegółową analizę następującego stosu technologicznego w kontekście wymagań PRD, zgodnie z podanymi wytycznymi.
 
 ## DOKUMENT PRD:
 {prd_document}
 
 ## PROPONOWANY STOS TECHNOLOGICZNY:
-{tech_stack_proposal}
+{tech_stack_proposal}"""
+        
+        return system_message, prompt
+    
+    def _tech_stack_chunk_requests(self, prd_document: str, tech_stack_proposal: str) -> List[Tuple[str, str]]:
+        """Build the map step: one (prompt, system_message) request per PRD chunk."""
+        system_message = """Jesteś doświadczonym architektem rozwiązań. Otrzymujesz fragment dokumentu PRD oraz proponowany stos technologiczny. Oceń wyłącznie wymagania zawarte w tym fragmencie.
+
+Wypisz zwięzłe ustalenia w punktach, pomijając obszary, których fragment nie dotyczy:
 
-Wykonaj szczegółową analizę zgodnie z podanymi wytycznymi."""
+#### Zgodność z wymaganiami PRD
+#### Szybkość dostarczenia MVP
+#### Skalowalność
+#### Koszty i złożoność
+#### Bezpieczeństwo
+#### Ryzyka i luki
+
+Odwołuj się do konkretnych wymagań (np. identyfikatorów US-xxx). Pisz w języku polskim, zwięźle i merytorycznie."""
+        
+        chunks = chunk_markdown(prd_document, self.app_config.tech_stack_chunk_tokens)
+        return [
+            (f"""Oceń, jak proponowany stos adresuje wymagania z poniższego fragmentu.
+
+## FRAGMENT DOKUMENTU PRD ({i + 1}/{len(chunks)}):
+{chunk}
+
+## PROPONOWANY STOS TECHNOLOGICZNY:
+{tech_stack_proposal}""", system_message)
+            for i, chunk in enumerate(chunks)
+        ]
+    
+    def should_chunk_tech_stack(self, prd_document: str) -> bool:
+        """Check whether a PRD is large enough for map-reduce analysis."""
+        return estimate_tokens(prd_document) > self.app_config.tech_stack_chunk_threshold_tokens
+    
+    async def _atech_stack_findings(self, prd_document: str, tech_stack_proposal: str,
+                                    use_cache: bool) -> List[str]:
+        """Run the map step concurrently over all PRD chunks."""
+        return await self.agenerate_many(
+            self._tech_stack_chunk_requests(prd_document, tech_stack_proposal),
+            use_cache=use_cache,
+            operation="tech_stack_chunk"
+        )
+    
+    def analyze_tech_stack(self, prd_document: str, tech_stack_proposal: str, use_cache: bool = True,
+                           chunked: Optional[bool] = None) -> str:
+        """Analyze tech stack proposal against PRD requirements.
+        
+        Large PRDs (or ``chunked=True``) are analysed map-reduce style: each
+        ``##`` section chunk is evaluated concurrently and the partial
+        findings are merged into the usual analysis format.
+        """
+        findings = None
+        if chunked if chunked is not None else self.should_chunk_tech_stack(prd_document):
+            findings = get_async_runner().run(
+                self._atech_stack_findings(prd_document, tech_stack_proposal, use_cache),
+                poll=queue_poller()
+            )
+        system_message, prompt = self._tech_stack_prompt(prd_document, tech_stack_proposal, findings)
+        return self.generate_text(prompt, system_message, use_cache=use_cache, operation="tech_stack")
+    
+    async def aanalyze_tech_stack(self, prd_document: str, tech_stack_proposal: str, use_cache: bool = True,
+                                  chunked: Optional[bool] = None) -> str:
+        """Asynchronously analyze tech stack proposal against PRD requirements."""
+        findings = None
+        if chunked if chunked is not None else self.should_chunk_tech_stack(prd_document):
+            findings = await self._atech_stack_findings(prd_document, tech_stack_proposal, use_cache)
+        system_message, prompt = self._tech_stack_prompt(prd_document, tech_stack_proposal, findings)
+        return await self.agenerate_text(prompt, system_message, use_cache=use_cache, operation="tech_stack")
+    
+    def stream_tech_stack_analysis(self, prd_document: str, tech_stack_proposal: str, use_cache: bool = True,
+                                   chunked: Optional[bool] = None) -> Iterator[str]:
+        """Stream tech stack analysis against PRD requirements.
         
-        return self.generate_text(prompt, system_message)
\ No newline at end of file
+        In chunked mode the map step runs first and only the final merge
+        is streamed.
+        """
+        findings = None
+        if chunked if chunked is not None else self.should_chunk_tech_stack(prd_document):
+            findings = get_async_runner().run(
+                self._atech_stack_findings(prd_document, tech_stack_proposal, use_cache),
+                poll=queue_poller()
+            )
+        system_message, prompt = self._tech_stack_prompt(prd_document, tech_stack_proposal, findings)
+        yield from self.generate_text_stream(prompt, system_message, use_cache=use_cache, operation="tech_stack")
@@ -0,0 +1,162 @@
+"""Availability probing, warm-up and keep-alive of models on Ollama servers."""
+
+import logging
+import math
+import re
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+import requests
+from ..config.settings import AppConfig, config
+
+logger = logging.getLogger(__name__)
+
+DURATION_PATTERN = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def keep_alive_seconds(keep_alive: Optional[str]) -> float:
+    """Convert an Ollama ``keep_alive`` value ("30m", "1h", "-1") to seconds."""
+    match = DURATION_PATTERN.match((keep_alive or "").strip())
+    if not match:
+        return 0.0
+    value = float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    return math.inf if value < 0 else value
+
+
+class OllamaManager:
+    """Lifecycle of the models on one Ollama server.
+
+    The list of pulled models (``/api/tags``) is probed in the background
+    and refreshed every ``probe_interval`` seconds, so only models that can
+    actually answer are offered. Selected models are pre-loaded with an
+    empty generate request and kept resident for ``keep_alive``. All
+    requests to the server share one HTTP session.
+    """
+
+    def __init__(self,
+                 base_url: str,
+                 keep_alive: Optional[str] = "30m",
+                 probe_timeout: float = 2.0,
+                 warm_up_timeout: float = 300.0,
+                 probe_interval: float = 60.0,
+                 session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.probe_timeout = probe_timeout
+        self.warm_up_timeout = warm_up_timeout
+        self.probe_interval = probe_interval
+        self.session = session if session is not None else requests.Session()
+        self.reachable: Optional[bool] = None
+        self.models: Set[str] = set()
+        self.last_probe = 0.0
+        self._warmed: Dict[str, float] = {}
+        self._warming: Set[str] = set()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def probe(self) -> bool:
+        """Fetch the server's model list; returns whether the server answered."""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+            entries = response.json().get("models") or []
+        except (requests.RequestException, ValueError) as e:
+            logger.info("Ollama at %s is not reachable: %s", self.base_url, e)
+            with self._lock:
+                self.reachable = False
+                self.models = set()
+                self.last_probe = time.monotonic()
+            return False
+
+        models = set()
+        for entry in entries:
+            for name in (entry.get("name"), entry.get("model")):
+                if name:
+                    models.add(name)
+                    if name.endswith(":latest"):
+                        models.add(name[:-len(":latest")])
+        with self._lock:
+            self.reachable = True
+            self.models = models
+            self.last_probe = time.monotonic()
+        return True
+
+    def probe_in_background(self) -> None:
+        """Start a probe on a daemon thread unless one is already running."""
+        with self._lock:
+            if self._probe_thread is not None and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(target=self.probe, name="prd-maker-ollama-probe", daemon=True)
+            self._probe_thread.start()
+
+    def wait_for_probe(self, timeout: Optional[float] = None) -> None:
+        """Wait for a running background probe to finish."""
+        thread = self._probe_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def has_model(self, name: str) -> Optional[bool]:
+        """Whether the server has pulled a model; None until the first probe has finished."""
+        if self.last_probe and time.monotonic() - self.last_probe > self.probe_interval:
+            self.probe_in_background()
+        if self.reachable is None:
+            return None
+        return name in self.models
+
+    def warm_up(self, name: str) -> bool:
+        """Load a model into memory and keep it resident for ``keep_alive``."""
+        payload = {"model": name}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        try:
+            response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.warm_up_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.info("Could not pre-load %s on Ollama at %s: %s", name, self.base_url, e)
+            return False
+        with self._lock:
+            self._warmed[name] = time.monotonic()
+        return True
+
+    def warm_up_in_background(self, name: str) -> None:
+        """Pre-load a model on a daemon thread unless it was loaded within ``keep_alive``."""
+        with self._lock:
+            warmed = self._warmed.get(name)
+            if name in self._warming or (
+                warmed is not None and time.monotonic() - warmed < keep_alive_seconds(self.keep_alive)
+            ):
+                return
+            self._warming.add(name)
+        threading.Thread(target=self._warm_up_once, args=(name,), name="prd-maker-ollama-warm-up", daemon=True).start()
+
+    def _warm_up_once(self, name: str) -> None:
+        try:
+            self.warm_up(name)
+        finally:
+            with self._lock:
+                self._warming.discard(name)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_managers: Dict[Tuple[str, Optional[str]], OllamaManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_ollama_manager(app_config: Optional[AppConfig] = None, base_url: Optional[str] = None) -> OllamaManager:
+    """Get the process-wide manager of an Ollama server, probing it in the background on first use.
+
+    The server and keep-alive come from ``app_config`` (the global
+    configuration by default); ``base_url`` overrides the server of a model.
+    """
+    app_config = app_config or config
+    url = (base_url or app_config.ollama_base_url).rstrip("/")
+    key = (url, app_config.ollama_keep_alive)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = OllamaManager(url, keep_alive=app_config.ollama_keep_alive)
+            manager.probe_in_background()
+        return manager
@@ -0,0 +1,105 @@
+"""Finding and replacing the PRD sections affected by a planning summary edit."""
+
+from typing import Dict, List, Optional, Tuple
+from .chunking import section_heading, split_sections
+from .prd_parser import USER_STORIES_FIELD, section_field
+from .prd_sections import PRD_SECTIONS, USER_STORIES_HEADING
+
+# Fields that can be regenerated on their own, in document order
+REGENERABLE_FIELDS = [
+    "product_overview",
+    "user_problem",
+    "functional_requirements",
+    "product_boundaries",
+    USER_STORIES_FIELD,
+    "success_metrics",
+]
+
+# Planning summary sections (heading prefixes, lower case) and the PRD
+# fields written from them. A change to any other part of the summary,
+# e.g. an added section, is treated as affecting the whole PRD.
+SUMMARY_DEPENDENCIES = [
+    ("decyzje", ["product_overview", "functional_requirements", "product_boundaries", USER_STORIES_FIELD]),
+    ("główne wymagania funkcjonalne", ["functional_requirements", "product_boundaries", USER_STORIES_FIELD]),
+    ("kluczowe historie użytkownika", ["user_problem", USER_STORIES_FIELD]),
+    ("kryteria sukcesu", ["success_metrics"]),
+    ("uwagi techniczne", ["product_boundaries"]),
+    ("nierozwiązane kwestie", ["product_boundaries"]),
+]
+
+
+def _summary_sections(summary: str) -> Dict[str, str]:
+    """Map normalized headings of the summary to their section texts.
+
+    Whitespace is normalized, so edits that only change it do not count
+    as changes.
+    """
+    sections: Dict[str, str] = {}
+    for section in split_sections(summary, level=2):
+        heading = section_heading(section) if section.lstrip().startswith("#") else ""
+        text = "\n".join(" ".join(line.split()) for line in section.splitlines() if line.strip())
+        key = " ".join(heading.split()).lower()
+        sections[key] = sections.get(key, "") + text
+    return sections
+
+
+def _dependent_fields(heading: str) -> Optional[List[str]]:
+    for prefix, fields in SUMMARY_DEPENDENCIES:
+        if heading.startswith(prefix):
+            return fields
+    return None
+
+
+def affected_prd_fields(old_summary: str, new_summary: str) -> List[str]:
+    """List the PRD fields that depend on the parts of the summary that changed.
+
+    Summaries are compared section by section; the result follows document
+    order and is empty if nothing relevant changed.
+    """
+    old_sections = _summary_sections(old_summary)
+    new_sections = _summary_sections(new_summary)
+    affected = set()
+    for heading in old_sections.keys() | new_sections.keys():
+        if old_sections.get(heading, "") == new_sections.get(heading, ""):
+            continue
+        fields = _dependent_fields(heading)
+        if fields is None:
+            return list(REGENERABLE_FIELDS)
+        affected.update(fields)
+    return [field for field in REGENERABLE_FIELDS if field in affected]
+
+
+def splice_prd_sections(prd_document: str, replacements: Dict[str, str]) -> str:
+    """Replace the bodies of the given sections in a PRD markdown document.
+
+    Sections are matched by their ``##`` headings, which are kept as they
+    are; everything else, including manual edits, is left untouched.
+    Sections missing from the document are inserted in document order
+    with a default heading.
+    """
+    remaining = dict(replacements)
+    parts: List[Tuple[Optional[str], str]] = []
+    for section in split_sections(prd_document, level=2):
+        heading = section_heading(section) if section.lstrip().startswith("##") else ""
+        field = section_field(heading) if heading else None
+        if field in remaining:
+            heading_line = section.lstrip("\n").split("\n", 1)[0]
+            section = f"{heading_line}\n\n{remaining.pop(field).strip()}\n\n"
+        parts.append((field, section))
+
+    headings = {section.field: section.heading for section in PRD_SECTIONS}
+    headings[USER_STORIES_FIELD] = USER_STORIES_HEADING
+    for field in REGENERABLE_FIELDS:
+        if field not in remaining:
+            continue
+        order = REGENERABLE_FIELDS.index(field)
+        position = next(
+            (i for i, (other, _) in enumerate(parts)
+             if other in REGENERABLE_FIELDS and REGENERABLE_FIELDS.index(other) > order),
+            len(parts)
+        )
+        if position and not parts[position - 1][1].endswith("\n\n"):
+            previous_field, previous = parts[position - 1]
+            parts[position - 1] = (previous_field, previous.rstrip("\n") + "\n\n")
+        parts.insert(position, (field, f"## {headings[field]}\n\n{remaining[field].strip()}\n\n"))
+    return "".join(section for _, section in parts)
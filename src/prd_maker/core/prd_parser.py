@@ -0,0 +1,138 @@
+"""Incremental parser turning streamed PRD markdown into a PRDDocument."""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+from .prd_sections import LIST_ITEM_PATTERN, UserStoryParser
+from ..models.prd import PRDDocument
+
+HEADING_LINE_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+SECTION_NUMBER_PATTERN = re.compile(r"^(?:\d+|[a-zA-Z]|[IVXivx]+)[.)]\s*")
+
+USER_STORIES_FIELD = "user_stories"
+LIST_FIELDS = ("assumptions", "constraints")
+
+# Heading prefixes (lower case, without numbering) mapped to PRDDocument
+# fields. Headings not listed here are kept out of the structured view.
+SECTION_HEADINGS = [
+    ("przegląd produktu", "product_overview"),
+    ("problem użytkownika", "user_problem"),
+    ("wymagania funkcjonalne", "functional_requirements"),
+    ("granice produktu", "product_boundaries"),
+    ("historyjki użytkowników", USER_STORIES_FIELD),
+    ("historyjki użytkownika", USER_STORIES_FIELD),
+    ("historie użytkownika", USER_STORIES_FIELD),
+    ("metryki sukcesu", "success_metrics"),
+    ("uwagi techniczne", "technical_considerations"),
+    ("założenia", "assumptions"),
+    ("ograniczenia", "constraints"),
+    ("product overview", "product_overview"),
+    ("user problem", "user_problem"),
+    ("functional requirements", "functional_requirements"),
+    ("product boundaries", "product_boundaries"),
+    ("user stories", USER_STORIES_FIELD),
+    ("success metrics", "success_metrics"),
+    ("technical considerations", "technical_considerations"),
+    ("assumptions", "assumptions"),
+    ("constraints", "constraints"),
+]
+
+
+def section_field(heading: str) -> Optional[str]:
+    """Map a level-2 heading such as ``5. Historyjki użytkowników`` to a field."""
+    text = SECTION_NUMBER_PATTERN.sub("", heading.replace("**", "").strip()).lower()
+    for prefix, field in SECTION_HEADINGS:
+        if text.startswith(prefix):
+            return field
+    return None
+
+
+class IncrementalPRDParser:
+    """Builds a PRDDocument from markdown chunks as they arrive.
+
+    Chunks are split into lines and every complete line is processed
+    exactly once, so parsing a streamed PRD costs time linear in its length
+    no matter how many chunks or user stories it has.
+    """
+
+    def __init__(self, title: str = ""):
+        self.document = PRDDocument(title=title)
+        self._stories = UserStoryParser()
+        self.document.user_stories = self._stories.stories
+        self._section_lines: Dict[str, List[str]] = {}
+        self._field: Optional[str] = None
+        self._pending: List[str] = []
+        self._in_code_block = False
+        self.sections: List[str] = []
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next chunk of markdown."""
+        if "\n" not in chunk:
+            self._pending.append(chunk)
+            return
+        lines = chunk.split("\n")
+        self._pending.append(lines[0])
+        self._feed_line("".join(self._pending))
+        for line in lines[1:-1]:
+            self._feed_line(line)
+        self._pending = [lines[-1]]
+
+    def snapshot(self) -> PRDDocument:
+        """Return the document with the section being written filled in so far."""
+        self._flush_section()
+        return self.document
+
+    def close(self) -> PRDDocument:
+        """Process the trailing partial line and return the finished document."""
+        if self._pending:
+            self._feed_line("".join(self._pending))
+            self._pending = []
+        return self.snapshot()
+
+    def consume(self, stream: Iterable[str]) -> Iterator[str]:
+        """Pass chunks of a stream through while parsing them."""
+        for chunk in stream:
+            self.feed(chunk)
+            yield chunk
+        self.close()
+
+    def _feed_line(self, line: str) -> None:
+        if line.lstrip().startswith("```"):
+            self._in_code_block = not self._in_code_block
+        heading = None if self._in_code_block else HEADING_LINE_PATTERN.match(line.strip())
+        if heading and len(heading.group(1)) <= 2:
+            self._start_section(len(heading.group(1)), heading.group(2))
+            return
+
+        if self._field == USER_STORIES_FIELD:
+            self._stories.feed_line(line)
+        elif self._field in LIST_FIELDS:
+            item = LIST_ITEM_PATTERN.match(line)
+            if item:
+                getattr(self.document, self._field).append(item.group(1).strip())
+        elif self._field is not None:
+            self._section_lines[self._field].append(line)
+
+    def _start_section(self, level: int, heading: str) -> None:
+        self._flush_section()
+        if level == 1:
+            if not self.document.title:
+                self.document.title = heading
+            self._field = None
+            return
+        self.sections.append(heading)
+        self._field = section_field(heading)
+        if self._field is not None and self._field != USER_STORIES_FIELD and self._field not in LIST_FIELDS:
+            self._section_lines.setdefault(self._field, [])
+
+    def _flush_section(self) -> None:
+        """Copy the text collected for the current section into the document."""
+        lines = self._section_lines.get(self._field)
+        if lines is not None:
+            setattr(self.document, self._field, "\n".join(lines).strip())
+
+
+def parse_prd(markdown: str, title: str = "") -> PRDDocument:
+    """Parse a complete PRD markdown text."""
+    parser = IncrementalPRDParser(title)
+    parser.feed(markdown)
+    return parser.close()
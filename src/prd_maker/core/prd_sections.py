@@ -0,0 +1,147 @@
+"""Section layout of the PRD and helpers for section-wise generation."""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+from ..models.prd import UserStory
+
+
+@dataclass(frozen=True)
+class PRDSection:
+    """A top-level PRD section generated by its own model call."""
+    field: str
+    heading: str
+    guidance: str
+
+
+@dataclass(frozen=True)
+class StoryBatch:
+    """A group of user stories generated by one model call."""
+    scope: str
+    first_number: int
+
+
+# Sections in document order, matching PRDDocument fields and the headings
+# used by the single-call PRD prompt. User stories are generated in batches.
+PRD_SECTIONS = [
+    PRDSection(
+        field="product_overview",
+        heading="Przegląd produktu",
+        guidance="Opisz produkt, jego cel, grupę docelową i główną propozycję wartości.",
+    ),
+    PRDSection(
+        field="user_problem",
+        heading="Problem użytkownika",
+        guidance="Opisz problem, który rozwiązuje produkt, jego skutki dla użytkowników i obecne sposoby radzenia sobie z nim.",
+    ),
+    PRDSection(
+        field="functional_requirements",
+        heading="Wymagania funkcjonalne",
+        guidance="Wypisz ponumerowane wymagania funkcjonalne MVP, pogrupowane według obszarów funkcjonalnych.",
+    ),
+    PRDSection(
+        field="product_boundaries",
+        heading="Granice produktu",
+        guidance="Określ, co wchodzi w zakres MVP, a co jest z niego świadomie wyłączone, wraz z ograniczeniami i założeniami.",
+    ),
+    PRDSection(
+        field="success_metrics",
+        heading="Metryki sukcesu",
+        guidance="Podaj mierzalne metryki sukcesu z wartościami docelowymi i sposobem ich pomiaru.",
+    ),
+]
+
+USER_STORIES_HEADING = "Historyjki użytkowników"
+
+# Story batches cover disjoint scopes so they can be written concurrently;
+# each batch numbers its stories from its own range and the stories are
+# renumbered sequentially when the document is assembled.
+STORY_BATCHES = [
+    StoryBatch(scope="uwierzytelnianie, bezpieczny dostęp i zarządzanie kontem użytkownika", first_number=1),
+    StoryBatch(scope="podstawowe scenariusze korzystania z kluczowych funkcjonalności produktu", first_number=101),
+    StoryBatch(scope="scenariusze alternatywne, skrajne oraz obsługa błędów", first_number=201),
+]
+
+STORY_HEADING_PATTERN = re.compile(r"^#{2,4}\s*(US-\d+)\s*[:.\-–]?\s*(.*)$")
+STORY_FIELD_PATTERN = re.compile(r"^(ID|Tytuł|Opis|Kryteria akceptacji)\s*:\s*(.*)$", re.IGNORECASE)
+CRITERIA_FIELD_PATTERN = re.compile(r"^(Kryteria akceptacji)\s*:?\s*(.*)$", re.IGNORECASE)
+STORY_ID_PATTERN = re.compile(r"US-\d+")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*)$")
+
+
+def strip_section_heading(text: str, heading: str) -> str:
+    """Remove a leading markdown heading the model may have repeated."""
+    lines = text.strip().splitlines()
+    if lines and lines[0].lstrip().startswith("#") and heading.lower() in lines[0].lower():
+        lines = lines[1:]
+    return "\n".join(lines).strip()
+
+
+class UserStoryParser:
+    """Line-by-line parser of markdown user stories.
+    
+    Stories may start with a ``### US-001: Title`` heading or an
+    ``- ID: US-001`` line and use ``Tytuł:``, ``Opis:`` and
+    ``Kryteria akceptacji:`` fields (optionally bold or bulleted).
+    Each line is handled once, so stories can be parsed while they stream.
+    """
+    
+    def __init__(self):
+        self.stories: List[UserStory] = []
+        self._story: Optional[UserStory] = None
+        self._in_criteria = False
+    
+    def feed_line(self, line: str) -> None:
+        heading = STORY_HEADING_PATTERN.match(line.strip())
+        if heading:
+            self._start_story(heading.group(1), heading.group(2).strip())
+            return
+        
+        story = self._story
+        clean = line.replace("**", "").strip().lstrip("-*+ ").strip()
+        field = STORY_FIELD_PATTERN.match(clean) or CRITERIA_FIELD_PATTERN.match(clean)
+        if field:
+            name, value = field.group(1).lower(), field.group(2).strip()
+            if name == "id":
+                story_id = STORY_ID_PATTERN.search(value)
+                if story_id and (story is None or story.id != story_id.group(0)):
+                    self._start_story(story_id.group(0), "")
+                return
+            if story is None:
+                return
+            self._in_criteria = name == "kryteria akceptacji"
+            if name == "tytuł":
+                story.title = value
+            elif name == "opis":
+                story.description = value
+            elif value:
+                story.acceptance_criteria.append(value)
+            return
+        
+        if story is None or not clean:
+            return
+        item = LIST_ITEM_PATTERN.match(line)
+        if self._in_criteria and item:
+            story.acceptance_criteria.append(item.group(1).replace("**", "").strip())
+        elif not self._in_criteria and story.description and not line.lstrip().startswith("#"):
+            story.description += " " + clean
+    
+    def _start_story(self, story_id: str, title: str) -> None:
+        self._story = UserStory(id=story_id, title=title, description="")
+        self.stories.append(self._story)
+        self._in_criteria = False
+
+
+def parse_user_stories(markdown: str) -> List[UserStory]:
+    """Parse all user stories from a markdown text."""
+    parser = UserStoryParser()
+    for line in markdown.splitlines():
+        parser.feed_line(line)
+    return parser.stories
+
+
+def renumber_user_stories(stories: List[UserStory]) -> List[UserStory]:
+    """Give stories sequential US-001, US-002, ... identifiers."""
+    for number, story in enumerate(stories, 1):
+        story.id = f"US-{number:03d}"
+    return stories
@@ -1,93 +1,173 @@
-"""Project storage and persistence using browser localStorage."""
+"""Project storage and persistence through a pluggable storage backend."""
 
 import json
+import threading
 import streamlit as st
-from typing import Dict, List, Optional
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from typing import Any, Dict, List, MutableMapping, Optional, Union
+from .catalogue import ProjectPage
+from .revisions import Revision, RevisionLog
+from .storage_backends import StorageBackend, get_storage_backend
+from .write_behind import WriteBehindStore
+from ..config.settings import config
 from ..models.project import Project, ProjectStep
 
 
+# Current project outside a Streamlit script (CLI, background workers)
+_local_state: Dict[str, Any] = {}
+
+
+def _session_state() -> MutableMapping[str, Any]:
+    """Streamlit session state inside a script run, a process-local dict elsewhere."""
+    return st.session_state if get_script_run_ctx() is not None else _local_state
+
+
 class ProjectStorage:
-    """Handles project persistence in browser localStorage."""
+    """Handles project persistence in the configured storage backend.
+    
+    Projects go to the process-wide backend selected by STORAGE_BACKEND
+    (SQLite by default) unless another one is set with ``use_backend``.
+    Works inside and outside a Streamlit script run, so background
+    workers can persist their results too.
+    
+    Saves are written behind: a save records which fields changed and
+    returns, and the changes made within STORAGE_SAVE_DEBOUNCE_SECONDS are
+    written together in the background, so typing in a text area does
+    not serialize and write the whole project on every rerun. Every write
+    that changes the project's texts appends a revision to its history.
+    """
     
-    STORAGE_KEY = "prd_maker_projects"
     CURRENT_PROJECT_KEY = "prd_maker_current_project"
     
+    _backend: Optional[StorageBackend] = None
+    _writer: Optional[WriteBehindStore] = None
+    _writer_lock = threading.Lock()
+    
     @classmethod
-    def save_project(cls, project: Project) -> None:
-        """Save a project to localStorage."""
-        projects = cls.load_all_projects()
-        projects[project.id] = project.model_dump()
+    def backend(cls) -> StorageBackend:
+        """Backend the projects are stored in."""
+        return cls._backend if cls._backend is not None else get_storage_backend()
+    
+    @classmethod
+    def use_backend(cls, backend: Optional[StorageBackend]) -> None:
+        """Store projects in ``backend``; None goes back to the configured one.
         
-        # Store in session state (Streamlit's persistent storage)
-        st.session_state[cls.STORAGE_KEY] = projects
+        Pending saves are written to the previous backend first.
+        """
+        with cls._writer_lock:
+            if cls._writer is not None:
+                cls._writer.close()
+                cls._writer = None
+            cls._backend = backend
+    
+    @classmethod
+    def writer(cls) -> WriteBehindStore:
+        """Write-behind store in front of the backend."""
+        backend = cls.backend()
+        writer = cls._writer
+        if writer is None or writer.backend is not backend:
+            with cls._writer_lock:
+                writer = cls._writer
+                if writer is None or writer.backend is not backend:
+                    if writer is not None:
+                        writer.close()
+                    revisions = RevisionLog(backend, config.revision_snapshot_interval)
+                    writer = cls._writer = WriteBehindStore(
+                        backend, config.storage_save_debounce_seconds, revisions
+                    )
+        return writer
+    
+    @classmethod
+    def save_project(cls, project: Project, flush: bool = False) -> None:
+        """Save a project and make it the current one.
         
-        # Also set as current project
-        st.session_state[cls.CURRENT_PROJECT_KEY] = project.id
+        Only the changed fields are written, after the debounce window
+        unless ``flush`` is set.
+        """
+        cls.writer().save(project, flush=flush)
+        _session_state()[cls.CURRENT_PROJECT_KEY] = project.id
+    
+    @classmethod
+    def flush(cls, project_id: Optional[str] = None) -> None:
+        """Write pending saves of a project (all if None) now."""
+        cls.writer().flush(project_id)
     
     @classmethod
     def load_project(cls, project_id: str) -> Optional[Project]:
-        """Load a specific project from localStorage."""
-        projects = cls.load_all_projects()
-        if project_id in projects:
-            return Project(**projects[project_id])
-        return None
+        """Load a specific project."""
+        return cls.writer().load(project_id)
     
     @classmethod
     def load_all_projects(cls) -> Dict[str, dict]:
-        """Load all projects from localStorage."""
-        if cls.STORAGE_KEY not in st.session_state:
-            st.session_state[cls.STORAGE_KEY] = {}
-        return st.session_state[cls.STORAGE_KEY]
+        """Load all projects as dicts by id."""
+        return cls.writer().load_all()
     
     @classmethod
     def get_current_project(cls) -> Optional[Project]:
         """Get the currently active project."""
-        if cls.CURRENT_PROJECT_KEY not in st.session_state:
+        project_id = _session_state().get(cls.CURRENT_PROJECT_KEY)
+        if project_id is None:
             return None
-        
-        project_id = st.session_state[cls.CURRENT_PROJECT_KEY]
         return cls.load_project(project_id)
     
     @classmethod
     def set_current_project(cls, project_id: str) -> None:
         """Set the current active project."""
-        st.session_state[cls.CURRENT_PROJECT_KEY] = project_id
+        _session_state()[cls.CURRENT_PROJECT_KEY] = project_id
     
     @classmethod
     def delete_project(cls, project_id: str) -> bool:
-        """Delete a project from localStorage."""
-        projects = cls.load_all_projects()
-        if project_id in projects:
-            del projects[project_id]
-            st.session_state[cls.STORAGE_KEY] = projects
-            
-            # Clear current project if it was deleted
-            if (cls.CURRENT_PROJECT_KEY in st.session_state and 
-                st.session_state[cls.CURRENT_PROJECT_KEY] == project_id):
-                del st.session_state[cls.CURRENT_PROJECT_KEY]
-            
-            return True
-        return False
-    
-    @classmethod
-    def list_projects(cls) -> List[Dict[str, str]]:
-        """List all projects with basic info."""
-        projects = cls.load_all_projects()
-        project_list = []
+        """Delete a project."""
+        if not cls.writer().delete(project_id):
+            return False
+        
+        # Clear current project if it was deleted
+        state = _session_state()
+        if state.get(cls.CURRENT_PROJECT_KEY) == project_id:
+            del state[cls.CURRENT_PROJECT_KEY]
+        return True
+    
+    @classmethod
+    def list_projects(cls) -> List[Dict[str, Any]]:
+        """List all projects with basic info, most recently updated first."""
+        return cls.writer().list_summaries()
+    
+    @classmethod
+    def list_projects_page(cls, limit: int = 5, cursor: Optional[str] = None, name_prefix: str = "",
+                           step: Optional[Union[ProjectStep, str]] = None,
+                           is_template: Optional[bool] = None) -> ProjectPage:
+        """One page of the project catalogue, most recently updated first.
         
-        for project_id, project_data in projects.items():
-            project_list.append({
-                "id": project_id,
-                "name": project_data.get("name", "Unnamed Project"),
-                "created_at": project_data.get("created_at", ""),
-                "updated_at": project_data.get("updated_at", ""),
-                "current_step": project_data.get("current_step", ""),
-                "progress": len(project_data.get("completed_steps", [])) / len(ProjectStep) * 100
-            })
+        Pass the page's ``next_cursor`` to get the following page. Names are
+        matched by case-insensitive prefix; ``step`` and ``is_template``
+        filter on the current step and the template flag.
+        """
+        step = ProjectStep(step).value if step is not None else None
+        return cls.writer().list_page(limit, cursor, name_prefix.strip(), step, is_template)
+    
+    @classmethod
+    def list_revisions(cls, project_id: str) -> List[Revision]:
+        """Revisions of a project's texts, oldest first."""
+        return cls.writer().revisions.revisions(project_id)
+    
+    @classmethod
+    def diff_revisions(cls, project_id: str, old: int, new: int, field: str = "prd_document") -> str:
+        """Unified diff of one text between two revisions."""
+        return cls.writer().revisions.diff(project_id, old, new, field)
+    
+    @classmethod
+    def restore_revision(cls, project: Project, number: int) -> List[str]:
+        """Restore the texts of a revision on ``project`` and save it.
         
-        # Sort by updated_at (most recent first)
-        project_list.sort(key=lambda x: x["updated_at"], reverse=True)
-        return project_list
+        Nothing is generated again. Pending edits are saved as a revision
+        first, and the restore is recorded as a new revision, so it can be
+        undone. Returns the restored fields.
+        """
+        cls.flush(project.id)
+        changed = cls.writer().revisions.restore(project, number)
+        if changed:
+            cls.save_project(project, flush=True)
+        return changed
     
     @classmethod
     def export_project(cls, project_id: str) -> Optional[str]:
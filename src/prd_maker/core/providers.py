@@ -0,0 +1,89 @@
+"""Construction of LangChain chat clients for configured providers."""
+
+from typing import Any, Callable, Dict, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from ..config.settings import AppConfig, ModelConfig, config
+
+# Retries are driven by LLMManager's resilience policy, so the provider SDKs'
+# own retry loops are disabled to keep failover times predictable.
+# Streaming calls request token usage so prompt cache hits can be reported.
+
+
+def _build_openai(model_config: ModelConfig, params: Dict[str, Any], timeout: Optional[float],
+                  app_config: AppConfig) -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI(
+        model=model_config.name,
+        api_key=model_config.api_key,
+        base_url=model_config.base_url,
+        timeout=timeout,
+        max_retries=0,
+        **{"stream_usage": True, **params}
+    )
+
+
+def _build_anthropic(model_config: ModelConfig, params: Dict[str, Any], timeout: Optional[float],
+                     app_config: AppConfig) -> BaseChatModel:
+    from langchain_anthropic import ChatAnthropic
+    
+    kwargs = dict(params)
+    if model_config.base_url:
+        kwargs["base_url"] = model_config.base_url
+    return ChatAnthropic(
+        model=model_config.name,
+        api_key=model_config.api_key,
+        default_request_timeout=timeout,
+        max_retries=0,
+        **kwargs
+    )
+
+
+def _build_ollama(model_config: ModelConfig, params: Dict[str, Any], timeout: Optional[float],
+                  app_config: AppConfig) -> BaseChatModel:
+    from langchain_ollama import ChatOllama
+    
+    kwargs = dict(params)
+    if timeout is not None:
+        kwargs["client_kwargs"] = {**kwargs.get("client_kwargs", {}), "timeout": timeout}
+    if app_config.ollama_keep_alive:
+        # Keep the model and its evaluated prompt in memory between calls
+        kwargs.setdefault("keep_alive", app_config.ollama_keep_alive)
+    return ChatOllama(
+        model=model_config.name,
+        base_url=model_config.base_url or app_config.ollama_base_url,
+        **kwargs
+    )
+
+
+def _build_fake(model_config: ModelConfig, params: Dict[str, Any], timeout: Optional[float],
+                app_config: AppConfig) -> BaseChatModel:
+    from .fake_provider import FakeChatModel
+    
+    return FakeChatModel(model=model_config.name, request_timeout=timeout, **params)
+
+
+# Provider name -> factory building a chat client from a model configuration
+# and the application settings it runs under. Provider SDKs are imported
+# inside the factories so that only providers that are actually used get loaded.
+PROVIDER_FACTORIES: Dict[str, Callable[[ModelConfig, Dict[str, Any], Optional[float], AppConfig], BaseChatModel]] = {
+    "openai": _build_openai,
+    "anthropic": _build_anthropic,
+    "ollama": _build_ollama,
+    "fake": _build_fake,
+}
+
+
+def build_chat_model(model_config: ModelConfig, timeout: Optional[float] = None,
+                     app_config: Optional[AppConfig] = None, **overrides: Any) -> BaseChatModel:
+    """Build a chat client for a model configuration.
+    
+    ``timeout`` bounds each HTTP request in seconds; ``overrides`` are passed
+    to the client constructor on top of the model's ``model_params``.
+    Provider-wide settings such as the Ollama server come from
+    ``app_config``, the global configuration by default.
+    """
+    factory = PROVIDER_FACTORIES.get(model_config.provider)
+    if factory is None:
+        raise ValueError(f"Unsupported provider: {model_config.provider}")
+    return factory(model_config, {**(model_config.model_params or {}), **overrides}, timeout, app_config or config)
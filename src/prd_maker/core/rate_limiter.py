@@ -0,0 +1,232 @@
+"""Process-wide rate limiting of provider calls shared by all sessions."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, Optional
+from .cancellation import current_cancellation
+
+# Called with the caller's 1-based place in a rate limiter queue while it
+# waits, and with 0 once it is admitted. Set by the UI around a generation.
+# Calls running on the async runner report from its thread; a listener that
+# can only draw in its own thread also has a ``poll()`` method, which callers
+# waiting on the runner call from that thread (see queue_poller).
+QueueListener = Callable[[int], None]
+queue_listener_var: ContextVar[Optional[QueueListener]] = ContextVar("llm_queue_listener", default=None)
+
+# Longest a waiter sleeps before re-checking its place in the queue
+POLL_INTERVAL = 0.1
+
+
+@contextmanager
+def queue_listener(listener: QueueListener) -> Iterator[None]:
+    """Report queue positions of the calls made inside the block to ``listener``."""
+    token = queue_listener_var.set(listener)
+    try:
+        yield
+    finally:
+        queue_listener_var.reset(token)
+
+
+def queue_poller() -> Optional[Callable[[], None]]:
+    """The current listener's ``poll`` method, if it has one."""
+    return getattr(queue_listener_var.get(), "poll", None)
+
+
+@dataclass
+class RateLimit:
+    """Limits for calls to one model; None means unlimited."""
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_in_flight: Optional[int] = None
+    # Size of the token buckets in seconds of quota, i.e. the largest burst
+    burst_seconds: float = 10.0
+
+    @property
+    def unlimited(self) -> bool:
+        return not (self.requests_per_minute or self.tokens_per_minute or self.max_in_flight)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    The level may go negative when a call used more tokens than it
+    reserved; later calls then wait until the debt is refilled.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (a full bucket admits any amount)."""
+        self._refill()
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Permit:
+    """Admission of one call; release it when the call has finished."""
+
+    def __init__(self, limiter: Optional["RateLimiter"] = None, tokens: int = 0, waited: float = 0.0):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.waited = waited
+        self._released = False
+
+    def release(self, used_tokens: int = 0) -> None:
+        """Free the in-flight slot and settle the reserved tokens with ``used_tokens``."""
+        if self._released:
+            return
+        self._released = True
+        if self.limiter is not None:
+            self.limiter.release(self.tokens, used_tokens)
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class RateLimiter:
+    """Requests/min, tokens/min and in-flight limits for one model.
+
+    Waiting callers are admitted strictly in arrival order, so a burst of
+    calls is spread out at the quota rate instead of being rejected by
+    the provider. Synchronous and asynchronous callers share the queue.
+    """
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.requests = TokenBucket(limit.requests_per_minute, limit.burst_seconds) if limit.requests_per_minute else None
+        self.tokens = TokenBucket(limit.tokens_per_minute, limit.burst_seconds) if limit.tokens_per_minute else None
+        self.in_flight = 0
+        self._queue: Deque[object] = deque()
+        self._cond = threading.Condition()
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._queue)
+
+    def acquire(self, tokens: int = 0) -> Permit:
+        """Wait for a turn, blocking the calling thread.
+        
+        A cancelled generation leaves the queue instead of waiting on.
+        """
+        started = time.monotonic()
+        ticket = self._enqueue()
+        reported = 0
+        cancellation = current_cancellation()
+        try:
+            while True:
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+                with self._cond:
+                    delay = self._try_admit(ticket, tokens)
+                    if delay == 0:
+                        break
+                    position = self._queue.index(ticket) + 1
+                if position != reported:
+                    reported = _report(position)
+                with self._cond:
+                    self._cond.wait(min(delay, POLL_INTERVAL))
+        except BaseException:
+            self._leave(ticket)
+            raise
+        if reported:
+            _report(0)
+        return Permit(self, tokens, time.monotonic() - started)
+
+    async def aacquire(self, tokens: int = 0) -> Permit:
+        """Wait for a turn without blocking the event loop."""
+        started = time.monotonic()
+        ticket = self._enqueue()
+        reported = 0
+        cancellation = current_cancellation()
+        try:
+            while True:
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+                with self._cond:
+                    delay = self._try_admit(ticket, tokens)
+                    if delay == 0:
+                        break
+                    position = self._queue.index(ticket) + 1
+                if position != reported:
+                    reported = _report(position)
+                await asyncio.sleep(min(delay, POLL_INTERVAL))
+        except BaseException:
+            self._leave(ticket)
+            raise
+        if reported:
+            _report(0)
+        return Permit(self, tokens, time.monotonic() - started)
+
+    def release(self, reserved_tokens: int, used_tokens: int = 0) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens is not None and used_tokens:
+                # Settle the estimate with the usage the provider reported
+                if used_tokens > reserved_tokens:
+                    self.tokens.take(used_tokens - reserved_tokens)
+                else:
+                    self.tokens.refund(reserved_tokens - used_tokens)
+            self._cond.notify_all()
+
+    def _enqueue(self) -> object:
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        return ticket
+
+    def _leave(self, ticket: object) -> None:
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            self._cond.notify_all()
+
+    def _try_admit(self, ticket: object, tokens: int) -> float:
+        """Admit ``ticket`` and return 0, or return how long to wait; caller holds the lock."""
+        if self._queue[0] is not ticket:
+            return POLL_INTERVAL
+        if self.limit.max_in_flight and self.in_flight >= self.limit.max_in_flight:
+            return POLL_INTERVAL
+        delay = max(
+            self.requests.wait_time(1) if self.requests is not None else 0.0,
+            self.tokens.wait_time(tokens) if self.tokens is not None else 0.0,
+        )
+        if delay > 0:
+            return delay
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self.in_flight += 1
+        self._queue.popleft()
+        self._cond.notify_all()
+        return 0.0
+
+
+def _report(position: int) -> int:
+    listener = queue_listener_var.get()
+    if listener is not None:
+        listener(position)
+    return position
@@ -0,0 +1,155 @@
+"""Retry, backoff and circuit breaking for LLM provider calls."""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying: timeouts, rate limits, overload, 5xx
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Exception class name fragments used by provider SDKs for transient errors
+RETRYABLE_ERROR_NAMES = ("Timeout", "Connection", "RateLimit", "Overloaded", "InternalServer", "ServiceUnavailable")
+
+
+@dataclass
+class ResiliencePolicy:
+    """Timeout, retry and circuit breaker settings for one model."""
+    timeout: float = 60.0
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    failure_threshold: int = 3
+    reset_timeout: float = 30.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a model is skipped because its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Marks a model unhealthy after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets a single trial
+    call through (half-open); success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call may be attempted now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Check whether a provider error is transient and worth retrying."""
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+def call_with_retry(func: Callable[[], T],
+                    policy: ResiliencePolicy,
+                    breaker: Optional[CircuitBreaker] = None,
+                    sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call ``func`` retrying transient errors with exponential backoff."""
+    attempt = 0
+    while True:
+        try:
+            result = func()
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            if breaker is not None and not breaker.allow_request():
+                raise
+            sleep(policy.backoff_delay(attempt))
+            attempt += 1
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+async def acall_with_retry(func: Callable[[], Awaitable[T]],
+                           policy: ResiliencePolicy,
+                           breaker: Optional[CircuitBreaker] = None) -> T:
+    """Async variant of call_with_retry."""
+    attempt = 0
+    while True:
+        try:
+            result = await func()
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            if breaker is not None and not breaker.allow_request():
+                raise
+            await asyncio.sleep(policy.backoff_delay(attempt))
+            attempt += 1
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
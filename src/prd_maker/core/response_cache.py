@@ -0,0 +1,224 @@
+"""Content-addressed cache for LLM responses."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a response cache."""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + disk) cache of generated texts.
+
+    Entries are keyed by a hash of everything that determines a model's
+    output, so identical requests are served without calling the provider.
+    When the disk tier outgrows ``max_disk_entries`` the oldest files are
+    removed down to ``DISK_LOW_WATER`` of the limit, so the directory scan
+    this takes is paid once per many writes. The disk tier has its own
+    lock, so a scan never holds up reads of the memory tier.
+    """
+
+    # Share of max_disk_entries kept after pruning the disk tier
+    DISK_LOW_WATER = 0.9
+
+    def __init__(
+        self,
+        disk_dir: Optional[str] = None,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 5000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Guards the disk file count and pruning; never acquired while holding _lock
+        self._disk_lock = threading.Lock()
+        self._disk_dir: Optional[Path] = None
+        self._disk_count = 0
+
+        if disk_dir:
+            try:
+                path = Path(disk_dir)
+                path.mkdir(parents=True, exist_ok=True)
+                self._disk_dir = path
+                self._disk_count = sum(1 for _ in path.glob("*.json"))
+            except OSError:
+                # Read-only or missing volume: keep working in memory only
+                self._disk_dir = None
+
+    @classmethod
+    def from_config(cls, app_config: Any) -> Optional["ResponseCache"]:
+        """Build a cache from application settings, or None if disabled."""
+        if not app_config.cache_enabled:
+            return None
+        return cls(
+            disk_dir=app_config.cache_dir,
+            ttl_seconds=app_config.cache_ttl_seconds,
+            max_memory_entries=app_config.cache_max_memory_entries,
+            max_disk_entries=app_config.cache_max_disk_entries,
+        )
+
+    @staticmethod
+    def make_key(model_key: str, system_message: Optional[str], prompt: str,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash the inputs that determine a model response."""
+        payload = json.dumps(
+            {
+                "model": model_key,
+                "system": system_message or "",
+                "prompt": prompt,
+                "params": params or {},
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on miss or expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and not self._is_expired(entry[1], now):
+                self._remember(key, entry[0], entry[1])
+                self.stats.disk_hits += 1
+                return entry[0]
+            self.stats.misses += 1
+        if entry is not None:
+            self._delete_disk(key)
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers."""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            self.stats.writes += 1
+        self._write_disk(key, value, created_at)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+        if self._disk_dir is not None:
+            with self._disk_lock:
+                for path in self._disk_dir.glob("*.json"):
+                    path.unlink(missing_ok=True)
+                self._disk_count = 0
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        """Insert into the memory tier; caller must hold the lock."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self._disk_dir / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        if self._disk_dir is None:
+            return None
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                data = json.load(f)
+            return data["value"], float(data["created_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, value: str, created_at: float) -> None:
+        if self._disk_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "value": value}, f, ensure_ascii=False)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        # The file count must match the files, so checking and replacing is one step
+        evicted = 0
+        with self._disk_lock:
+            try:
+                existed = path.exists()
+                os.replace(tmp_path, path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                return
+            if not existed:
+                self._disk_count += 1
+                if self._disk_count > self.max_disk_entries:
+                    evicted = self._prune_disk()
+        if evicted:
+            with self._lock:
+                self.stats.evictions += evicted
+
+    def _delete_disk(self, key: str) -> None:
+        if self._disk_dir is None:
+            return
+        with self._disk_lock:
+            try:
+                self._disk_path(key).unlink()
+                self._disk_count -= 1
+            except OSError:
+                pass
+
+    def _prune_disk(self) -> int:
+        """Remove the least recently written files down to the low-water mark.
+
+        Returns the number of files removed; caller must hold the disk lock.
+        """
+        files = []
+        for path in self._disk_dir.glob("*.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        excess = max(len(files) - int(self.max_disk_entries * self.DISK_LOW_WATER), 0)
+        for _, path in files[:excess]:
+            path.unlink(missing_ok=True)
+        self._disk_count = len(files) - excess
+        return excess
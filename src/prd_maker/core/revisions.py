@@ -0,0 +1,229 @@
+"""Append-only revision history of the project texts, stored as line deltas."""
+
+import difflib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .storage_backends import StorageBackend
+from ..models.project import Project
+
+# Project texts kept in the history, in display order
+VERSIONED_FIELDS = (
+    "project_idea",
+    "project_description",
+    "planning_summary",
+    "prd_document",
+    "prd_source_summary",
+    "tech_stack_proposal",
+    "tech_stack_analysis",
+)
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def text_delta(old: str, new: str) -> List[List[Any]]:
+    """Line edits turning ``old`` into ``new``: ``[start, end, replacement]`` over old's lines."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    # Edits are usually local, so only the differing middle goes through the matcher
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+    if not old_middle and not new_middle:
+        return []
+    if len(old_middle) <= 1 or len(new_middle) <= 1:
+        # A single changed, inserted or removed run of lines
+        return [[prefix, prefix + len(old_middle), "".join(new_middle)]]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle)
+    return [
+        [prefix + i1, prefix + i2, "".join(new_middle[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def _apply_to_lines(lines: List[str], delta: List[List[Any]]) -> List[str]:
+    result: List[str] = []
+    position = 0
+    for start, end, replacement in delta:
+        result.extend(lines[position:start])
+        result.extend(replacement.splitlines(keepends=True))
+        position = end
+    result.extend(lines[position:])
+    return result
+
+
+def apply_delta(old: str, delta: List[List[Any]]) -> str:
+    """Apply a delta from ``text_delta`` to ``old``."""
+    return "".join(_apply_to_lines(old.splitlines(keepends=True), delta))
+
+
+def rebuild_text(chain: List[Tuple[str, str]]) -> str:
+    """Text from a snapshot followed by deltas, as returned by ``revision_chain``."""
+    lines: List[str] = []
+    for kind, data in chain:
+        lines = data.splitlines(keepends=True) if kind == SNAPSHOT else _apply_to_lines(lines, json.loads(data))
+    return "".join(lines)
+
+
+@dataclass
+class Revision:
+    """One entry of a project's history."""
+    number: int
+    created_at: datetime
+    # Versioned fields changed by this revision
+    fields: List[str]
+    # Characters stored for the revision
+    size: int
+
+
+@dataclass
+class _Head:
+    number: int
+    texts: Dict[str, str] = field(default_factory=dict)
+    # Number and total size of the deltas since the last snapshot, per field
+    deltas: Dict[str, int] = field(default_factory=dict)
+    delta_sizes: Dict[str, int] = field(default_factory=dict)
+
+
+class RevisionLog:
+    """Append-only history of the versioned texts of each project.
+
+    Every write of a project whose texts changed appends a revision with
+    a line delta per changed field, so the history grows with the size of
+    the edits rather than of the documents. A field is stored in full on
+    its first revision, and again once the deltas since its last full copy
+    add up to more than the text or number ``snapshot_interval``, so
+    rebuilding any revision reads at most about twice the text and applies
+    a bounded number of deltas. Restoring a revision sets the old texts on
+    the project and is itself recorded as a new revision.
+    """
+
+    def __init__(self, backend: StorageBackend, snapshot_interval: int = 64, max_projects: int = 256):
+        self.backend = backend
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.max_projects = max_projects
+        # Latest texts of recently written projects, so recording needs no reads
+        self._heads: "OrderedDict[str, _Head]" = OrderedDict()
+        # Revisions never change, so their diffs can be kept
+        self._diffs: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def record(self, project: Project, fields: Optional[Iterable[str]] = None) -> Optional[int]:
+        """Append a revision for the versioned ``fields`` (all if None) that changed.
+
+        Returns the new revision number, or None if no text changed.
+        """
+        with self._lock:
+            head = self._head(project.id)
+            names = VERSIONED_FIELDS
+            if fields is not None and head is not None:
+                requested = set(fields)
+                names = [name for name in VERSIONED_FIELDS if name in requested]
+            texts: Dict[str, str] = {}
+            changes: Dict[str, Tuple[str, str]] = {}
+            for name in names:
+                text = getattr(project, name)
+                old = head.texts.get(name, "") if head is not None else ""
+                if text == old:
+                    continue
+                texts[name] = text
+                if (old and head.deltas.get(name, 0) < self.snapshot_interval
+                        and head.delta_sizes.get(name, 0) < len(text)):
+                    data = json.dumps(text_delta(old, text), ensure_ascii=False)
+                    if len(data) < len(text):
+                        changes[name] = (DELTA, data)
+                        continue
+                changes[name] = (SNAPSHOT, text)
+            if not changes:
+                return None
+
+            number = head.number + 1 if head is not None else 1
+            self.backend.append_revision(project.id, number, datetime.now(), changes)
+            if head is None:
+                head = self._heads[project.id] = _Head(number)
+            head.number = number
+            for name, (kind, data) in changes.items():
+                head.texts[name] = texts[name]
+                head.deltas[name] = head.deltas.get(name, 0) + 1 if kind == DELTA else 0
+                head.delta_sizes[name] = head.delta_sizes.get(name, 0) + len(data) if kind == DELTA else 0
+            self._heads.move_to_end(project.id)
+            while len(self._heads) > self.max_projects:
+                self._heads.popitem(last=False)
+            return number
+
+    def revisions(self, project_id: str) -> List[Revision]:
+        """Revisions of a project, oldest first."""
+        return [Revision(**row) for row in self.backend.list_revisions(project_id)]
+
+    def texts_at(self, project_id: str, number: int) -> Dict[str, str]:
+        """The versioned texts of a project as of revision ``number``."""
+        return {
+            name: rebuild_text(self.backend.revision_chain(project_id, name, number))
+            for name in VERSIONED_FIELDS
+        }
+
+    def diff(self, project_id: str, old: int, new: int, field_name: str = "prd_document") -> str:
+        """Unified diff of one field between two revisions."""
+        key = (project_id, old, new, field_name)
+        with self._lock:
+            diff = self._diffs.get(key)
+        if diff is not None:
+            return diff
+        before = rebuild_text(self.backend.revision_chain(project_id, field_name, old))
+        after = rebuild_text(self.backend.revision_chain(project_id, field_name, new))
+        diff = "".join(difflib.unified_diff(
+            before.splitlines(keepends=True),
+            after.splitlines(keepends=True),
+            fromfile=f"#{old}",
+            tofile=f"#{new}",
+        ))
+        with self._lock:
+            self._diffs[key] = diff
+            while len(self._diffs) > 32:
+                self._diffs.popitem(last=False)
+        return diff
+
+    def restore(self, project: Project, number: int) -> List[str]:
+        """Set the texts of revision ``number`` on ``project``; returns the fields that changed.
+
+        The project still has to be saved, which records the restore as a new revision.
+        """
+        changed = []
+        for name, text in self.texts_at(project.id, number).items():
+            if getattr(project, name) != text:
+                setattr(project, name, text)
+                changed.append(name)
+        return changed
+
+    def forget(self, project_id: str) -> None:
+        with self._lock:
+            self._heads.pop(project_id, None)
+            for key in [key for key in self._diffs if key[0] == project_id]:
+                del self._diffs[key]
+
+    def _head(self, project_id: str) -> Optional[_Head]:
+        head = self._heads.get(project_id)
+        if head is not None:
+            return head
+        revisions = self.backend.list_revisions(project_id)
+        if not revisions:
+            return None
+        head = self._heads[project_id] = _Head(revisions[-1]["number"])
+        for name in VERSIONED_FIELDS:
+            chain = self.backend.revision_chain(project_id, name, head.number)
+            if chain:
+                head.texts[name] = rebuild_text(chain)
+                head.deltas[name] = len(chain) - 1
+                head.delta_sizes[name] = sum(len(data) for _, data in chain[1:])
+        return head
@@ -0,0 +1,78 @@
+"""Latency-aware choice of a model for each step of the PRD pipeline."""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from .telemetry import LatencyStats, Telemetry
+from ..config.settings import ModelConfig
+
+PREFER_FASTEST = "fastest"
+PREFER_HIGHEST_TIER = "highest_tier"
+
+
+@dataclass
+class StepRoute:
+    """Constraints for the model serving one pipeline step."""
+    prefer: str = PREFER_FASTEST
+    # Models whose recent p95 latency or error rate exceed these are
+    # skipped, unless no model meets them
+    max_p95_seconds: Optional[float] = None
+    max_error_rate: float = 0.2
+    min_tier: int = 1
+    # A "fastest" step sends its first min_samples calls to each model to
+    # measure it, then explore_rate of its calls to a random other model
+    # so that their statistics stay current
+    min_samples: int = 3
+    explore_rate: float = 0.05
+
+
+class ModelRouter:
+    """Picks a model per operation from live telemetry and step constraints.
+
+    Latency percentiles and error rates come from the telemetry's recent
+    calls of each model for the same operation, so models are compared on
+    the same kind of request. A "fastest" step first tries every model
+    with fewer than ``min_samples`` recent calls, least measured and light
+    tiers first, and keeps sending a share of its calls to the others, so
+    a model that was slow once, or is new, still gets compared.
+    """
+
+    def __init__(self, telemetry: Telemetry, routes: Dict[str, Dict[str, Any]],
+                 rng: Optional[random.Random] = None):
+        self.telemetry = telemetry
+        self.routes = {operation: StepRoute(**spec) for operation, spec in routes.items() if spec}
+        self._rng = rng or random.Random()
+
+    def choose(self, operation: str, models: Dict[str, ModelConfig]) -> Optional[str]:
+        """Return the model key for ``operation`` from ``models``, or None if the step is not routed."""
+        route = self.routes.get(operation)
+        if route is None or not models:
+            return None
+        candidates = [key for key, model in models.items() if model.tier >= route.min_tier] or list(models)
+        stats = {key: self.telemetry.latency_stats(key, operation) for key in candidates}
+        healthy = [key for key in candidates if self._meets(route, stats[key])] or candidates
+
+        if route.prefer == PREFER_HIGHEST_TIER:
+            def rank(key: str):
+                return (-models[key].tier, stats[key].p50 if stats[key] else float("inf"), key)
+            return min(healthy, key=rank)
+
+        def samples(key: str) -> int:
+            return stats[key].samples if stats[key] is not None else 0
+
+        unmeasured = [key for key in healthy if samples(key) < route.min_samples]
+        if unmeasured:
+            return min(unmeasured, key=lambda key: (samples(key), models[key].tier, key))
+        fastest = min(healthy, key=lambda key: (stats[key].p50, key))
+        others = [key for key in healthy if key != fastest]
+        if others and self._rng.random() < route.explore_rate:
+            return self._rng.choice(others)
+        return fastest
+
+    @staticmethod
+    def _meets(route: StepRoute, stats: Optional[LatencyStats]) -> bool:
+        if stats is None:
+            return True
+        if stats.error_rate > route.max_error_rate:
+            return False
+        return route.max_p95_seconds is None or stats.p95 <= route.max_p95_seconds
@@ -0,0 +1,141 @@
+"""Coalescing of identical LLM requests that are in flight at the same time."""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class FlightAbandoned(RuntimeError):
+    """The leading call stopped before finishing, e.g. because its page was rerun."""
+
+
+class Flight:
+    """One running request whose text is shared with every caller that joins it.
+
+    The leader publishes the text chunk by chunk; followers replay what was
+    already produced and then receive the rest as it arrives. Both threads
+    and coroutines on any event loop can follow.
+    """
+
+    def __init__(self, on_done: Callable[["Flight"], None]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._on_done = on_done
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def publish(self, chunk: str) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._notify()
+
+    def complete(self, text: Optional[str] = None) -> None:
+        """Finish the flight; ``text`` is the whole response if nothing was published."""
+        with self._cond:
+            if text is not None and not self.chunks:
+                self.chunks.append(text)
+            self.done = True
+            self._notify()
+        self._on_done(self)
+
+    def fail(self, error: BaseException) -> None:
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._notify()
+        self._on_done(self)
+
+    def follow(self) -> Iterator[str]:
+        """Yield the flight's chunks, blocking until each one is produced."""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                new_chunks, done, error = self.chunks[index:], self.done, self.error
+            index += len(new_chunks)
+            yield from new_chunks
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    async def afollow(self) -> AsyncIterator[str]:
+        """Async variant of follow that does not block the event loop."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            self._async_waiters.append(waiter)
+        try:
+            index = 0
+            while True:
+                with self._cond:
+                    new_chunks, done, error = self.chunks[index:], self.done, self.error
+                    if not new_chunks and not done:
+                        event.clear()
+                if new_chunks:
+                    index += len(new_chunks)
+                    for chunk in new_chunks:
+                        yield chunk
+                elif done:
+                    if error is not None:
+                        raise error
+                    return
+                else:
+                    await event.wait()
+        finally:
+            with self._cond:
+                self._async_waiters.remove(waiter)
+
+    def _notify(self) -> None:
+        """Wake all followers; caller must hold the lock."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+
+class SingleFlight:
+    """Registry of in-flight requests by request key, shared by all sessions.
+
+    The first caller for a key becomes the leader and makes the provider
+    call; callers arriving while it runs join its flight instead of
+    starting a duplicate call. A key is released as soon as its flight
+    finishes, so later requests go to the response cache or the provider.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Tuple[Flight, bool]:
+        """Join the flight for ``key`` or start one; returns it and whether the caller leads."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = Flight(lambda finished: self._release(key, finished))
+            self._flights[key] = flight
+            return flight, True
+
+    def _release(self, key: str, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight registry."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,100 @@
+"""Speculative background generation of the next step's output."""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from .cancellation import wait_for
+
+
+class SpeculativeGenerator:
+    """Starts likely next-step generations early and hands out their results.
+    
+    Each speculation is stored under a name (e.g. ``"planning_summary"``)
+    together with a hash of the inputs and the model it was started with. A
+    result is only handed out when it is requested with the same inputs and
+    model; speculations for inputs or a model that have since changed are
+    discarded.
+    """
+    
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None, max_workers: int = 2):
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="prd-maker-speculate"
+        )
+        self._speculations: Dict[str, Tuple[str, Future]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def input_hash(inputs: Sequence[Any], model_key: Optional[str] = None) -> str:
+        """Hash the inputs and model a speculation depends on."""
+        payload = json.dumps([model_key, *inputs], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def start(self, name: str, inputs: Sequence[Any], func: Callable[[], Any],
+              model_key: Optional[str] = None) -> None:
+        """Start ``func`` in the background unless it already runs for these inputs and model.
+        
+        ``func`` must generate with ``model_key``; the caller pins it.
+        """
+        input_hash = self.input_hash(inputs, model_key)
+        with self._lock:
+            current = self._speculations.get(name)
+            if current is not None:
+                if current[0] == input_hash:
+                    return
+                # Stale speculation; cancelling only helps if it hasn't started yet
+                current[1].cancel()
+            self._speculations[name] = (input_hash, self._executor.submit(func))
+    
+    def is_pending(self, name: str, inputs: Sequence[Any], model_key: Optional[str] = None) -> bool:
+        """Check whether a matching speculation is still running."""
+        with self._lock:
+            current = self._speculations.get(name)
+        return (current is not None and current[0] == self.input_hash(inputs, model_key)
+                and not current[1].done())
+    
+    def take(self, name: str, inputs: Sequence[Any], timeout: Optional[float] = 0,
+             model_key: Optional[str] = None) -> Optional[Any]:
+        """Return and forget the result of a matching speculation.
+        
+        With the default ``timeout=0`` only finished results are returned;
+        pass ``None`` to wait for a running speculation. Returns None when
+        there is no matching speculation or it failed. The wait ends early
+        when the caller's generation is cancelled.
+        """
+        input_hash = self.input_hash(inputs, model_key)
+        with self._lock:
+            current = self._speculations.get(name)
+        if current is None:
+            return None
+        if current[0] != input_hash:
+            self.discard(name)
+            return None
+        
+        future = current[1]
+        if timeout == 0 and not future.done():
+            return None
+        try:
+            result = wait_for(future, timeout)
+        except Exception:
+            result = None
+        with self._lock:
+            if self._speculations.get(name) is current:
+                del self._speculations[name]
+        return result
+    
+    def discard(self, name: str) -> None:
+        """Drop a speculation without using its result."""
+        with self._lock:
+            current = self._speculations.pop(name, None)
+        if current is not None:
+            current[1].cancel()
+    
+    def discard_all(self) -> None:
+        """Drop every speculation, e.g. when switching projects."""
+        with self._lock:
+            names = list(self._speculations)
+        for name in names:
+            self.discard(name)
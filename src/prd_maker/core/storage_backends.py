@@ -0,0 +1,457 @@
+"""Storage backends behind ProjectStorage: Streamlit session state and SQLite."""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import streamlit as st
+from .catalogue import ProjectCatalogue, ProjectPage, decode_cursor, encode_cursor
+from ..config.settings import config
+from ..models.project import Project, ProjectStep
+
+
+class StorageBackend(ABC):
+    """Where projects are kept.
+
+    Summaries (``list_summaries``) carry only the small, indexable fields
+    of a project so that listing does not load every document; the
+    catalogue (``list_page``) pages through them without listing all.
+    """
+
+    # Whether saves may be written later from a background thread
+    supports_write_behind = True
+
+    @abstractmethod
+    def save(self, project: Project) -> None:
+        """Insert or replace a project."""
+
+    def save_fields(self, project: Project, fields: Iterable[str]) -> None:
+        """Write only ``fields`` of a stored project; by default the whole project is saved."""
+        self.save(project)
+
+    @abstractmethod
+    def load(self, project_id: str) -> Optional[Project]:
+        """Load a project, or None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, project_id: str) -> bool:
+        """Delete a project; returns whether it existed."""
+
+    @abstractmethod
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        """Summaries of all projects, most recently updated first."""
+
+    def list_page(self, limit: int, cursor: Optional[str] = None, name_prefix: str = "",
+                  step: Optional[str] = None, is_template: Optional[bool] = None) -> ProjectPage:
+        """Up to ``limit`` summaries after ``cursor``, most recently updated first.
+
+        ``name_prefix`` matches names case-insensitively; ``step`` and
+        ``is_template`` filter on the current step and the template flag.
+        """
+        return ProjectCatalogue(self.list_summaries()).page(limit, cursor, name_prefix, step, is_template)
+
+    @abstractmethod
+    def append_revision(self, project_id: str, number: int, created_at: datetime,
+                        changes: Dict[str, Tuple[str, str]]) -> None:
+        """Append revision ``number`` with a ``(kind, data)`` entry per changed field."""
+
+    @abstractmethod
+    def list_revisions(self, project_id: str) -> List[Dict[str, Any]]:
+        """Revisions of a project (number, created_at, fields, size), oldest first."""
+
+    @abstractmethod
+    def revision_chain(self, project_id: str, field: str, number: int) -> List[Tuple[str, str]]:
+        """``(kind, data)`` entries of ``field`` from its last snapshot up to revision ``number``."""
+
+    def load_all(self) -> Dict[str, dict]:
+        """All projects as dicts by id."""
+        projects = {}
+        for summary in self.list_summaries():
+            project = self.load(summary["id"])
+            if project is not None:
+                projects[project.id] = project.model_dump()
+        return projects
+
+    def close(self) -> None:
+        pass
+
+
+def _summary(project_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": project_id,
+        "name": data.get("name", "Unnamed Project"),
+        "created_at": data.get("created_at", ""),
+        "updated_at": data.get("updated_at", ""),
+        "current_step": data.get("current_step", ""),
+        "is_template": bool(data.get("is_template", False)),
+        "progress": len(data.get("completed_steps", [])) / len(ProjectStep) * 100
+    }
+
+
+class SessionStateBackend(StorageBackend):
+    """Projects kept in the browser session's Streamlit session state.
+
+    Projects live only as long as the session and are visible only to it;
+    it needs a Streamlit script context (or bare mode), so saves are
+    always written by the script thread.
+    """
+
+    STORAGE_KEY = "prd_maker_projects"
+    REVISIONS_KEY = "prd_maker_revisions"
+    CATALOGUE_KEY = "prd_maker_catalogue"
+    supports_write_behind = False
+
+    def _projects(self) -> Dict[str, dict]:
+        if self.STORAGE_KEY not in st.session_state:
+            st.session_state[self.STORAGE_KEY] = {}
+        return st.session_state[self.STORAGE_KEY]
+
+    def _revisions(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self.REVISIONS_KEY not in st.session_state:
+            st.session_state[self.REVISIONS_KEY] = {}
+        return st.session_state[self.REVISIONS_KEY]
+
+    def _catalogue(self) -> ProjectCatalogue:
+        if self.CATALOGUE_KEY not in st.session_state:
+            st.session_state[self.CATALOGUE_KEY] = ProjectCatalogue(
+                [_summary(project_id, data) for project_id, data in self._projects().items()]
+            )
+        return st.session_state[self.CATALOGUE_KEY]
+
+    def save(self, project: Project) -> None:
+        data = self._projects()[project.id] = project.model_dump()
+        self._catalogue().upsert(_summary(project.id, data))
+
+    def save_fields(self, project: Project, fields: Iterable[str]) -> None:
+        data = self._projects().get(project.id)
+        if data is None:
+            self.save(project)
+        else:
+            data.update(project.model_dump(include=set(fields)))
+            self._catalogue().upsert(_summary(project.id, data))
+
+    def load(self, project_id: str) -> Optional[Project]:
+        data = self._projects().get(project_id)
+        return Project(**data) if data is not None else None
+
+    def delete(self, project_id: str) -> bool:
+        self._revisions().pop(project_id, None)
+        self._catalogue().remove(project_id)
+        return self._projects().pop(project_id, None) is not None
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        return self._catalogue().summaries()
+
+    def list_page(self, limit: int, cursor: Optional[str] = None, name_prefix: str = "",
+                  step: Optional[str] = None, is_template: Optional[bool] = None) -> ProjectPage:
+        return self._catalogue().page(limit, cursor, name_prefix, step, is_template)
+
+    def load_all(self) -> Dict[str, dict]:
+        return self._projects()
+
+    def append_revision(self, project_id: str, number: int, created_at: datetime,
+                        changes: Dict[str, Tuple[str, str]]) -> None:
+        self._revisions().setdefault(project_id, []).append(
+            {"number": number, "created_at": created_at, "changes": dict(changes)}
+        )
+
+    def list_revisions(self, project_id: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "number": revision["number"],
+                "created_at": revision["created_at"],
+                "fields": list(revision["changes"]),
+                "size": sum(len(data) for _, data in revision["changes"].values()),
+            }
+            for revision in self._revisions().get(project_id, [])
+        ]
+
+    def revision_chain(self, project_id: str, field: str, number: int) -> List[Tuple[str, str]]:
+        chain: List[Tuple[str, str]] = []
+        for revision in self._revisions().get(project_id, []):
+            if revision["number"] > number:
+                break
+            entry = revision["changes"].get(field)
+            if entry is not None:
+                chain = [entry] if entry[0] == "snapshot" else chain + [entry]
+        return chain
+
+
+class SQLiteBackend(StorageBackend):
+    """Durable projects in a SQLite database in WAL mode, shared by all sessions.
+
+    Each project is one row: the fields used to list, sort and filter
+    projects are indexed columns and the whole project is stored as a JSON
+    document. In WAL mode readers never block each other or a writer, so
+    many sessions can list and load projects while one saves. Connections
+    are pooled and may be used from any thread, including background
+    workers outside a Streamlit script. ``path`` must be a file, since
+    each pooled connection to ``:memory:`` would open its own database.
+    Revisions are rows of ``project_revisions`` keyed by project, field and
+    revision number, so rebuilding a field reads one range of its key.
+    """
+
+    # The catalogue is ordered by (updated_at, id), newest first; each filter
+    # has an index in that order, so a page reads only the rows it returns.
+    # Name prefixes are searched in the case-folded ``name_key``.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS projects (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            name_key TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            current_step TEXT NOT NULL,
+            is_template INTEGER NOT NULL DEFAULT 0,
+            progress REAL NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS projects_catalogue ON projects (updated_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS projects_catalogue_step ON projects (current_step, updated_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS projects_catalogue_template ON projects (is_template, updated_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS projects_name_key ON projects (name_key);
+        CREATE TABLE IF NOT EXISTS project_revisions (
+            project_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (project_id, field, revision)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS project_revisions_revision ON project_revisions (project_id, revision);
+    """
+
+    def __init__(self, path: str, pool_size: int = 8, busy_timeout: float = 10.0):
+        self.path = path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        # With WAL, NORMAL only syncs at checkpoints and stays durable on application crashes
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection (autocommit mode)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    def save(self, project: Project) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO projects (id, name, name_key, created_at, updated_at, current_step, is_template,
+                                      progress, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    name = excluded.name,
+                    name_key = excluded.name_key,
+                    updated_at = excluded.updated_at,
+                    current_step = excluded.current_step,
+                    is_template = excluded.is_template,
+                    progress = excluded.progress,
+                    data = excluded.data
+                """,
+                (
+                    project.id,
+                    project.name,
+                    project.name.casefold(),
+                    project.created_at.isoformat(),
+                    project.updated_at.isoformat(),
+                    project.current_step.value,
+                    int(project.is_template),
+                    project.get_progress_percentage(),
+                    project.model_dump_json(),
+                )
+            )
+
+    def save_fields(self, project: Project, fields: Iterable[str]) -> None:
+        """Update the indexed columns and only ``fields`` inside the JSON document."""
+        values = project.model_dump(mode="json", include=set(fields))
+        if not values:
+            return
+        paths = ", ".join("?, json(?)" for _ in values)
+        arguments = [item for name, value in values.items() for item in (f"$.{name}", json.dumps(value))]
+        with self._connection() as conn:
+            updated = conn.execute(
+                "UPDATE projects SET name = ?, name_key = ?, updated_at = ?, current_step = ?, is_template = ?, "
+                f"progress = ?, data = json_set(data, {paths}) WHERE id = ?",
+                (
+                    project.name,
+                    project.name.casefold(),
+                    project.updated_at.isoformat(),
+                    project.current_step.value,
+                    int(project.is_template),
+                    project.get_progress_percentage(),
+                    *arguments,
+                    project.id,
+                )
+            ).rowcount
+        if not updated:
+            self.save(project)
+
+    def load(self, project_id: str) -> Optional[Project]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return Project.model_validate_json(row[0]) if row is not None else None
+
+    def delete(self, project_id: str) -> bool:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM project_revisions WHERE project_id = ?", (project_id,))
+            return conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount > 0
+
+    SUMMARY_COLUMNS = "id, name, created_at, updated_at, current_step, is_template, progress"
+
+    @staticmethod
+    def _summary_row(row: tuple) -> Dict[str, Any]:
+        project_id, name, created_at, updated_at, current_step, is_template, progress = row
+        return {
+            "id": project_id,
+            "name": name,
+            "created_at": datetime.fromisoformat(created_at),
+            "updated_at": datetime.fromisoformat(updated_at),
+            "current_step": current_step,
+            "is_template": bool(is_template),
+            "progress": progress,
+        }
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM projects ORDER BY updated_at DESC, id DESC"
+            ).fetchall()
+        return [self._summary_row(row) for row in rows]
+
+    def list_page(self, limit: int, cursor: Optional[str] = None, name_prefix: str = "",
+                  step: Optional[str] = None, is_template: Optional[bool] = None) -> ProjectPage:
+        conditions: List[str] = []
+        arguments: List[Any] = []
+        if step is not None:
+            conditions.append("current_step = ?")
+            arguments.append(step)
+        if is_template is not None:
+            conditions.append("is_template = ?")
+            arguments.append(int(is_template))
+        if name_prefix:
+            # Every key starting with the prefix sorts between these bounds
+            key = name_prefix.casefold()
+            conditions.append("name_key >= ? AND name_key < ?")
+            arguments.extend([key, key + "\U0010ffff"])
+        if cursor:
+            updated_at, project_id = decode_cursor(cursor)
+            conditions.append("(updated_at, id) < (?, ?)")
+            arguments.extend([updated_at.isoformat(), project_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM projects {where} "
+                "ORDER BY updated_at DESC, id DESC LIMIT ?",
+                (*arguments, limit + 1)
+            ).fetchall()
+        projects = [self._summary_row(row) for row in rows[:limit]]
+        return ProjectPage(projects, encode_cursor(projects[-1]) if len(rows) > limit else None)
+
+    def append_revision(self, project_id: str, number: int, created_at: datetime,
+                        changes: Dict[str, Tuple[str, str]]) -> None:
+        rows = [
+            (project_id, field, number, created_at.isoformat(), kind, data)
+            for field, (kind, data) in changes.items()
+        ]
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO project_revisions (project_id, field, revision, created_at, kind, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def list_revisions(self, project_id: str) -> List[Dict[str, Any]]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT revision, MIN(created_at), group_concat(field), SUM(length(data)) "
+                "FROM project_revisions WHERE project_id = ? GROUP BY revision ORDER BY revision",
+                (project_id,)
+            ).fetchall()
+        return [
+            {
+                "number": number,
+                "created_at": datetime.fromisoformat(created_at),
+                "fields": fields.split(","),
+                "size": size,
+            }
+            for number, created_at, fields, size in rows
+        ]
+
+    def revision_chain(self, project_id: str, field: str, number: int) -> List[Tuple[str, str]]:
+        with self._connection() as conn:
+            return conn.execute(
+                """
+                SELECT kind, data FROM project_revisions
+                WHERE project_id = ? AND field = ? AND revision <= ? AND revision >= COALESCE((
+                    SELECT MAX(revision) FROM project_revisions
+                    WHERE project_id = ? AND field = ? AND revision <= ? AND kind = 'snapshot'
+                ), 0)
+                ORDER BY revision
+                """,
+                (project_id, field, number, project_id, field, number)
+            ).fetchall()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def create_storage_backend(kind: str, path: Optional[str] = None) -> StorageBackend:
+    """Build a backend by name: ``sqlite`` (at ``path``) or ``session``."""
+    if kind == "sqlite":
+        return SQLiteBackend(path or config.storage_path)
+    if kind == "session":
+        return SessionStateBackend()
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend() -> StorageBackend:
+    """Get the process-wide storage backend selected by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_storage_backend(config.storage_backend, config.storage_path)
+    return _backend
@@ -0,0 +1,284 @@
+"""Per-call telemetry of LLM requests: latency, tokens, cost and outcome."""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("prd_maker.llm")
+
+# Seconds a request waited for a concurrency slot before it was sent; set
+# by whatever queues the request and read when the call is recorded.
+queue_time_var: ContextVar[float] = ContextVar("llm_queue_time", default=0.0)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+
+@dataclass
+class CallRecord:
+    """Telemetry of one LLM call."""
+    operation: str
+    model_key: str
+    outcome: str
+    latency: float
+    queue_time: float = 0.0
+    time_to_first_token: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost: float = 0.0
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class LatencyStats:
+    """Latency and error rate of a model over its recent calls."""
+    samples: int
+    p50: float
+    p95: float
+    error_rate: float
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result, seen = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            result.append((f"{bound:g}", seen))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class Telemetry:
+    """Aggregates call records into counters and histograms.
+
+    Series are labelled by operation and model. Every record is also
+    written as a structured JSON log line and kept in a short history.
+    The latency and outcome of the last ``window_size`` provider calls per
+    model and operation are kept for live statistics used in routing.
+    """
+
+    HISTOGRAMS = {
+        "llm_request_duration_seconds": ("Total call latency", LATENCY_BUCKETS),
+        "llm_time_to_first_token_seconds": ("Time to the first streamed token", LATENCY_BUCKETS),
+        "llm_queue_time_seconds": ("Time waiting for a concurrency slot", LATENCY_BUCKETS),
+        "llm_input_tokens": ("Input tokens per call", TOKEN_BUCKETS),
+        "llm_output_tokens": ("Output tokens per call", TOKEN_BUCKETS),
+    }
+
+    def __init__(self, history_size: int = 200, metrics_file: Optional[str] = None,
+                 flush_interval: float = 5.0, window_size: int = 50):
+        self.metrics_file = metrics_file
+        self.window_size = window_size
+        self.flush_interval = flush_interval
+        self.recent: Deque[CallRecord] = deque(maxlen=history_size)
+        self._calls: Dict[Tuple[str, str, str], int] = {}
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._cost: Dict[Tuple[str, str], float] = {}
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self._windows: Dict[Tuple[str, str], Deque[Tuple[float, bool]]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def record(self, call: CallRecord) -> None:
+        labels = (call.operation, call.model_key)
+        with self._lock:
+            self.recent.append(call)
+            key = labels + (call.outcome,)
+            self._calls[key] = self._calls.get(key, 0) + 1
+            self._cost[labels] = self._cost.get(labels, 0.0) + call.cost
+            for direction, tokens in (("input", call.input_tokens), ("output", call.output_tokens),
+                                      ("cache_read", call.cache_read_tokens),
+                                      ("cache_write", call.cache_write_tokens)):
+                token_key = labels + (direction,)
+                self._tokens[token_key] = self._tokens.get(token_key, 0) + tokens
+            if call.outcome == "ok":
+                self._observe("llm_request_duration_seconds", labels, call.latency)
+                self._observe("llm_queue_time_seconds", labels, call.queue_time)
+                self._observe("llm_input_tokens", labels, call.input_tokens)
+                self._observe("llm_output_tokens", labels, call.output_tokens)
+                if call.time_to_first_token is not None:
+                    self._observe("llm_time_to_first_token_seconds", labels, call.time_to_first_token)
+            if call.outcome in ("ok", "error"):
+                window = self._windows.get((call.model_key, call.operation))
+                if window is None:
+                    window = self._windows[(call.model_key, call.operation)] = deque(maxlen=self.window_size)
+                window.append((call.latency, call.outcome == "ok"))
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "llm_call", **asdict(call)}, ensure_ascii=False))
+        if self.metrics_file and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.write_prometheus(self.metrics_file)
+
+    def _observe(self, metric: str, labels: Tuple[str, str], value: float) -> None:
+        """Add an observation; caller must hold the lock."""
+        key = (metric,) + labels
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.HISTOGRAMS[metric][1])
+        histogram.observe(value)
+
+    def latency_stats(self, model_key: str, operation: Optional[str] = None) -> Optional[LatencyStats]:
+        """Statistics of a model's recent calls for one operation or all; None without any.
+        
+        Percentiles are taken over successful calls; the error rate over all.
+        """
+        with self._lock:
+            samples = [sample for (model, op), window in self._windows.items()
+                       if model == model_key and (operation is None or op == operation)
+                       for sample in window]
+        if not samples:
+            return None
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        if not latencies:
+            return LatencyStats(len(samples), float("inf"), float("inf"), 1.0)
+        return LatencyStats(
+            samples=len(samples),
+            p50=latencies[int(0.5 * (len(latencies) - 1))],
+            p95=latencies[int(round(0.95 * (len(latencies) - 1)))],
+            error_rate=errors / len(samples),
+        )
+    
+    def summary(self) -> List[Dict[str, object]]:
+        """One row per operation and model, for display."""
+        with self._lock:
+            rows = {}
+            for (operation, model_key, outcome), count in self._calls.items():
+                row = rows.setdefault((operation, model_key), {
+                    "operation": operation, "model": model_key, "calls": 0, "errors": 0, "cached": 0,
+                    "coalesced": 0, "cancelled": 0,
+                })
+                row["calls"] += count
+                if outcome == "error":
+                    row["errors"] += count
+                elif outcome in ("cached", "coalesced", "cancelled"):
+                    row[outcome] += count
+            for labels, row in rows.items():
+                latency = self._histograms.get(("llm_request_duration_seconds",) + labels)
+                ttft = self._histograms.get(("llm_time_to_first_token_seconds",) + labels)
+                row["p50 s"] = latency.quantile(0.5) if latency else None
+                row["p95 s"] = latency.quantile(0.95) if latency else None
+                row["mean s"] = round(latency.sum / latency.count, 3) if latency and latency.count else None
+                row["ttft p50 s"] = ttft.quantile(0.5) if ttft else None
+                row["input tokens"] = self._tokens.get(labels + ("input",), 0)
+                row["output tokens"] = self._tokens.get(labels + ("output",), 0)
+                row["cost $"] = round(self._cost.get(labels, 0.0), 4)
+            return sorted(rows.values(), key=lambda row: (row["operation"], row["model"]))
+
+    def prometheus_text(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += ["# HELP llm_calls_total LLM calls by outcome", "# TYPE llm_calls_total counter"]
+            for (operation, model_key, outcome), count in sorted(self._calls.items()):
+                lines.append(f"llm_calls_total{_labels(operation, model_key, outcome=outcome)} {count}")
+            lines += ["# HELP llm_tokens_total Tokens used", "# TYPE llm_tokens_total counter"]
+            for (operation, model_key, direction), count in sorted(self._tokens.items()):
+                lines.append(f"llm_tokens_total{_labels(operation, model_key, direction=direction)} {count}")
+            lines += ["# HELP llm_cost_dollars_total Estimated cost in USD", "# TYPE llm_cost_dollars_total counter"]
+            for (operation, model_key), cost in sorted(self._cost.items()):
+                lines.append(f"llm_cost_dollars_total{_labels(operation, model_key)} {cost:.6f}")
+            for metric, (help_text, _) in self.HISTOGRAMS.items():
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for (name, operation, model_key), histogram in sorted(self._histograms.items()):
+                    if name != metric:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{metric}_bucket{_labels(operation, model_key, le=bound)} {count}")
+                    lines.append(f"{metric}_sum{_labels(operation, model_key)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{_labels(operation, model_key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically write the metrics for a node_exporter textfile collector."""
+        self._last_flush = time.monotonic()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not write LLM metrics to %s", path)
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve ``/metrics`` over HTTP from a daemon thread."""
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="prd-maker-metrics", daemon=True).start()
+        return server
+
+
+def _labels(operation: str, model_key: str, **extra: str) -> str:
+    labels = {"operation": operation, "model": model_key, **extra}
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide telemetry collector."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            from ..config.settings import config
+            _telemetry = Telemetry(metrics_file=config.metrics_file)
+        return _telemetry
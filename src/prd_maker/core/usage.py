@@ -0,0 +1,46 @@
+"""Token usage of LLM calls, including provider prompt cache reads and writes."""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class TokenUsage:
+    """Tokens used by one call (or a running total of many calls).
+
+    ``input_tokens`` includes the cached prompt tokens: ``cache_read_tokens``
+    were served from the provider's prompt cache and ``cache_write_tokens``
+    were written to it by this call.
+    """
+    model_key: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of input tokens read from the provider's prompt cache."""
+        return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def add_metadata(self, usage_metadata: Optional[Any]) -> None:
+        """Add a LangChain ``usage_metadata`` dict from a message or chunk."""
+        if not usage_metadata:
+            return
+        details = usage_metadata.get("input_token_details") or {}
+        self.input_tokens += usage_metadata.get("input_tokens") or 0
+        self.output_tokens += usage_metadata.get("output_tokens") or 0
+        self.cache_read_tokens += details.get("cache_read") or 0
+        self.cache_write_tokens += details.get("cache_creation") or 0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+
+    @classmethod
+    def from_message(cls, model_key: str, message: Any) -> "TokenUsage":
+        usage = cls(model_key=model_key)
+        usage.add_metadata(getattr(message, "usage_metadata", None))
+        return usage
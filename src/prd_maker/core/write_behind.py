@@ -0,0 +1,274 @@
+"""Write-behind project saves: dirty-field tracking and debounced background flushes."""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+from .catalogue import ProjectPage
+from .revisions import RevisionLog
+from .storage_backends import StorageBackend
+from ..models.project import Project
+
+logger = logging.getLogger(__name__)
+
+FIELDS = tuple(Project.model_fields)
+
+# Fields shown in project listings; saves changing them are written at once
+# so the catalogue is never behind what the user just did
+SUMMARY_FIELDS = frozenset({"name", "updated_at", "current_step", "completed_steps", "is_template"})
+
+
+def _same(value: Any, written: Any) -> bool:
+    # Unchanged strings are usually the very object that was written
+    return value is written or value == written
+
+
+def _freeze(value: Any) -> Any:
+    # Lists are mutated in place (answers are appended and edited), so keep a copy
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+def _snapshot(project: Project) -> Project:
+    # The script keeps editing the project (lists in place) while it waits to be written
+    values = vars(project)
+    return project.model_copy(update={name: _freeze(values[name]) for name in FIELDS if isinstance(values[name], list)})
+
+
+class DirtyTracker:
+    """Which fields of each project changed since they were last written.
+
+    Keeps the field values last handed to the backend for the most
+    recently saved or loaded projects. Strings, datetimes and enums are
+    immutable and kept by reference, so checking an unchanged field is
+    usually an identity test rather than a comparison of the whole text.
+    """
+
+    def __init__(self, max_projects: int = 1024):
+        self.max_projects = max_projects
+        self._written: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def dirty_fields(self, project: Project) -> Optional[Set[str]]:
+        """Fields changed since the last write, or None if the whole project must be written."""
+        with self._lock:
+            written = self._written.get(project.id)
+            if written is None:
+                return None
+            self._written.move_to_end(project.id)
+        values = vars(project)
+        return {name for name in FIELDS if not _same(values[name], written[name])}
+
+    def mark_written(self, project: Project, fields: Optional[Set[str]] = None) -> None:
+        """Record ``fields`` (all if None) of ``project`` as written."""
+        current = vars(project)
+        values = dict(current) if fields is None else {name: current[name] for name in fields}
+        for name, value in values.items():
+            if isinstance(value, list):
+                values[name] = _freeze(value)
+        with self._lock:
+            written = self._written.get(project.id)
+            if written is None:
+                if fields is not None:
+                    # Evicted meanwhile; the next save writes the whole project
+                    return
+                written = self._written[project.id] = {}
+            written.update(values)
+            self._written.move_to_end(project.id)
+            while len(self._written) > self.max_projects:
+                self._written.popitem(last=False)
+
+    def forget(self, project_id: str) -> None:
+        with self._lock:
+            self._written.pop(project_id, None)
+
+
+@dataclass
+class _PendingSave:
+    # Copy of the project as of the last save, never the caller's object
+    project: Project
+    # None writes the whole project
+    fields: Optional[Set[str]]
+    due: float
+
+
+class WriteBehindStore:
+    """Saves projects to a backend from a background thread, coalescing saves.
+
+    A save only records which fields changed and returns; the changes of
+    all saves of a project within ``debounce_seconds`` of its first
+    unwritten change are written together, and only those fields are
+    serialized and written. Pending saves hold a copy of the project taken
+    at save time, so the script can keep editing it (lists in place) while
+    it is written. ``flush`` writes pending saves synchronously (step
+    transitions), as do saves of new projects and saves changing the
+    listed fields (name, step, template flag), so listings never need the
+    pending saves. Loads flush the project first so they never see stale
+    data, and pending saves are flushed at interpreter exit. Saves
+    are not tied to a browser session, so they are still written after
+    the session that made them has ended. Backends that do not support
+    write-behind (session state), or a debounce of 0, are written through
+    on every save, still only with the changed fields. Each write of
+    changed texts is also appended to ``revisions``, if given, so the
+    history has one revision per write rather than per keystroke.
+    """
+
+    def __init__(self, backend: StorageBackend, debounce_seconds: float,
+                 revisions: Optional[RevisionLog] = None):
+        self.backend = backend
+        self.debounce_seconds = debounce_seconds
+        self.revisions = revisions
+        self.tracker = DirtyTracker()
+        self._pending: Dict[str, _PendingSave] = {}
+        self._condition = threading.Condition()
+        # Held while writing, so a synchronous flush waits for a background write in progress
+        self._write_lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        _stores.add(self)
+
+    @property
+    def buffered(self) -> bool:
+        return self.debounce_seconds > 0 and self.backend.supports_write_behind and not self._closed
+
+    def save(self, project: Project, flush: bool = False) -> None:
+        """Save the changed fields of ``project``, now if ``flush`` or unbuffered, else later."""
+        fields = self.tracker.dirty_fields(project)
+        if fields is not None and not fields:
+            if flush:
+                self.flush(project.id)
+            return
+        flush = flush or fields is None or not SUMMARY_FIELDS.isdisjoint(fields)
+        if not self.buffered:
+            with self._write_lock:
+                self._write(project, fields)
+            self.tracker.mark_written(project, fields)
+            return
+
+        with self._condition:
+            snapshot = _snapshot(project)
+            pending = self._pending.get(project.id)
+            if pending is None:
+                self._pending[project.id] = _PendingSave(snapshot, fields, time.monotonic() + self.debounce_seconds)
+            else:
+                pending.project = snapshot
+                pending.fields = None if fields is None or pending.fields is None else pending.fields | fields
+            self._start()
+            self._condition.notify()
+        self.tracker.mark_written(snapshot, fields)
+        if flush:
+            self.flush(project.id)
+
+    def flush(self, project_id: Optional[str] = None) -> None:
+        """Write the pending saves of ``project_id`` (all projects if None) before returning."""
+        with self._write_lock:
+            with self._condition:
+                project_ids = list(self._pending) if project_id is None else [project_id]
+                saves = [self._pending.pop(key) for key in project_ids if key in self._pending]
+            for index, pending in enumerate(saves):
+                try:
+                    self._write(pending.project, pending.fields)
+                except Exception:
+                    for unwritten in saves[index:]:
+                        self._requeue(unwritten)
+                    raise
+
+    def load(self, project_id: str) -> Optional[Project]:
+        self.flush(project_id)
+        project = self.backend.load(project_id)
+        if project is not None:
+            self.tracker.mark_written(project)
+        return project
+
+    def load_all(self) -> Dict[str, dict]:
+        self.flush()
+        return self.backend.load_all()
+
+    def delete(self, project_id: str) -> bool:
+        with self._write_lock:
+            with self._condition:
+                self._pending.pop(project_id, None)
+            self.tracker.forget(project_id)
+            if self.revisions is not None:
+                self.revisions.forget(project_id)
+            return self.backend.delete(project_id)
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        return self.backend.list_summaries()
+
+    def list_page(self, limit: int, cursor: Optional[str] = None, name_prefix: str = "",
+                  step: Optional[str] = None, is_template: Optional[bool] = None) -> ProjectPage:
+        return self.backend.list_page(limit, cursor, name_prefix, step, is_template)
+
+    def close(self) -> None:
+        """Flush all pending saves and stop the background thread; later saves are written through."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    def _write(self, project: Project, fields: Optional[Set[str]]) -> None:
+        if fields is None:
+            self.backend.save(project)
+        else:
+            self.backend.save_fields(project, fields)
+        if self.revisions is not None:
+            try:
+                self.revisions.record(project, fields)
+            except Exception:
+                # The project itself is saved; only this step of its history is lost
+                logger.exception("Recording a revision of project %s failed", project.id)
+                self.revisions.forget(project.id)
+
+    def _requeue(self, save: _PendingSave) -> None:
+        with self._condition:
+            pending = self._pending.get(save.project.id)
+            if pending is None:
+                save.due = time.monotonic() + self.debounce_seconds
+                self._pending[save.project.id] = save
+            elif save.fields is None or pending.fields is None:
+                pending.fields = None
+            else:
+                pending.fields |= save.fields
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="project-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = [project_id for project_id, save in self._pending.items() if save.due <= now]
+                if not due:
+                    next_due = min((save.due for save in self._pending.values()), default=None)
+                    self._condition.wait(None if next_due is None else next_due - now)
+                    continue
+            for project_id in due:
+                try:
+                    self.flush(project_id)
+                except Exception:
+                    logger.exception("Saving project %s failed; retrying in %.1f s",
+                                     project_id, self.debounce_seconds)
+
+
+_stores: "weakref.WeakSet[WriteBehindStore]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_stores):
+        try:
+            store.close()
+        except Exception:
+            logger.exception("Saving pending projects at exit failed")
@@ -36,10 +36,11 @@ class Project(BaseModel):
     # Step data
     project_idea: str = Field(default="", description="Initial project idea")
     project_description: str = Field(default="", description="Generated project description")
-    planning_questions: List[Dict[str, str]] = Field(default_factory=list)
+    planning_questions: List[Dict[str, Any]] = Field(default_factory=list)
     planning_answers: List[Dict[str, Any]] = Field(default_factory=list)
     planning_summary: str = Field(default="", description="Summary of planning session")
     prd_document: str = Field(default="", description="Generated PRD document")
+    prd_source_summary: str = Field(default="", description="Planning summary the PRD was generated from")
     tech_stack_proposal: str = Field(default="", description="Proposed tech stack")
     tech_stack_analysis: str = Field(default="", description="Tech stack analysis and recommendations")
     
@@ -2,29 +2,146 @@
 
 import streamlit as st
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from ..models.project import Project, ProjectStep
 from ..core.project_storage import ProjectStorage
+from ..core.client_pool import ClientPool
 from ..core.llm_manager import LLMManager
+from ..core.ollama_manager import get_ollama_manager
+from ..core.response_cache import ResponseCache
+from ..core.speculation import SpeculativeGenerator
+from ..core.telemetry import get_telemetry
+from ..config.settings import config
 from .steps import (
     render_project_idea_step,
     render_project_description_step,
     render_planning_session_step,
     render_planning_summary_step,
     render_prd_document_step,
-    render_tech_stack_analysis_step
+    render_tech_stack_analysis_step,
+    render_generation_notice,
+    PRD_GENERATION_MODES
 )
 
+# Pipeline steps (LLMManager operations) whose model can be routed or pinned
+ROUTED_STEPS = {
+    "project_description": "Project description",
+    "questions": "Planning questions",
+    "draft_answers": "Draft answers",
+    "planning_summary": "Planning summary",
+    "prd_document": "PRD document",
+    "prd_section": "PRD sections",
+    "tech_stack": "Tech stack analysis",
+    "tech_stack_chunk": "Tech stack chunks",
+}
+
+STEP_NAMES = {
+    ProjectStep.PROJECT_IDEA: "💡 Idea",
+    ProjectStep.PROJECT_DESCRIPTION: "📝 Description",
+    ProjectStep.PLANNING_SESSION: "🗣️ Planning",
+    ProjectStep.ANSWER_QUESTIONS: "❓ Questions",
+    ProjectStep.PLANNING_SUMMARY: "📋 Summary",
+    ProjectStep.PRD_DOCUMENT: "📄 PRD",
+    ProjectStep.TECH_STACK_ANALYSIS: "🏗️ Tech Stack"
+}
+
+# Sidebar project list: projects per page, and the template filter choices
+PROJECTS_PER_PAGE = 5
+PROJECT_KINDS = {"All": None, "Projects": False, "Templates": True}
+
+
+@st.cache_resource
+def get_response_cache():
+    """Get the process-wide LLM response cache shared by all sessions."""
+    return ResponseCache.from_config(config)
+
+
+@st.cache_resource
+def get_client_pool():
+    """Get the process-wide pool of provider clients shared by all sessions."""
+    return ClientPool()
+
+
+@st.cache_resource
+def get_speculation_executor():
+    """Get the process-wide worker pool for speculative pre-generation."""
+    return ThreadPoolExecutor(
+        max_workers=config.speculation_workers,
+        thread_name_prefix="prd-maker-speculate"
+    )
+
+
+@st.cache_resource
+def start_metrics_server():
+    """Serve the LLM call metrics on LLM_METRICS_PORT, once per process."""
+    return get_telemetry().serve(config.metrics_port)
+
+
+@st.cache_resource
+def start_ollama_manager():
+    """Start probing the local Ollama server in the background when the app starts."""
+    return get_ollama_manager(config)
+
 
 def initialize_session():
     """Initialize session state variables."""
+    if config.metrics_port:
+        start_metrics_server()
+    start_ollama_manager()
+    
     if "llm_manager" not in st.session_state:
-        st.session_state.llm_manager = LLMManager()
+        st.session_state.llm_manager = LLMManager(
+            cache=get_response_cache(),
+            client_pool=get_client_pool()
+        )
+    
+    if "speculator" not in st.session_state:
+        st.session_state.speculator = SpeculativeGenerator(executor=get_speculation_executor())
+    
+    if "speculative_generation" not in st.session_state:
+        st.session_state.speculative_generation = config.speculative_generation
+    
+    if "model_routing" not in st.session_state:
+        st.session_state.model_routing = config.model_routing
+    
+    if "keep_partial_output" not in st.session_state:
+        st.session_state.keep_partial_output = True
     
     if "current_project" not in st.session_state:
         st.session_state.current_project = None
 
 
+def render_model_routing(llm_manager: LLMManager, available_models: list):
+    """Sidebar controls for routing steps to models and, while routing, pinning a model to a step."""
+    llm_manager.routing_enabled = st.sidebar.toggle(
+        "🧭 Route steps to models",
+        key="model_routing",
+        help="Send each step to a model chosen by its recent latency and error rate: light steps "
+             "such as planning questions to the fastest model, the summary and PRD to the best one. "
+             "The selected model is used for steps without a route."
+    )
+    if not llm_manager.routing_enabled:
+        # Without routing every step uses the selected model
+        llm_manager.pinned_models.clear()
+        return
+    with st.sidebar.expander("Per-step models"):
+        for operation, label in ROUTED_STEPS.items():
+            pinned = llm_manager.pinned_models.get(operation)
+            if pinned not in available_models:
+                llm_manager.pin_model(operation, None)
+                pinned = None
+            auto = f"Auto ({llm_manager.routed_model(operation)})"
+            choice = st.selectbox(
+                label,
+                [None] + available_models,
+                index=available_models.index(pinned) + 1 if pinned else 0,
+                format_func=lambda model_key, auto=auto: auto if model_key is None else model_key,
+                key=f"pinned_model_{operation}"
+            )
+            llm_manager.pin_model(operation, choice)
+
+
 def render_sidebar():
     """Render the sidebar with project management and AI configuration."""
     st.sidebar.header("🔧 Configuration")
@@ -43,12 +160,63 @@ def render_sidebar():
         
         if selected_model:
             llm_manager.set_current_model(selected_model)
+            if not llm_manager.is_model_healthy(selected_model):
+                st.sidebar.warning(
+                    f"{selected_model} is failing repeatedly; requests fall back to: "
+                    f"{', '.join(llm_manager.fallback_chain) or 'none'}"
+                )
             current_project = st.session_state.current_project
             if current_project:
                 current_project.ai_model = selected_model
                 ProjectStorage.save_project(current_project)
+        
+        render_model_routing(llm_manager, available_models)
     else:
-        st.sidebar.error("No AI models available. Please configure API keys.")
+        st.sidebar.error("No AI models available. Please configure API keys or start Ollama and pull a model.")
+    
+    if config.debug and llm_manager.cache is not None:
+        stats = llm_manager.cache.stats
+        st.sidebar.caption(
+            f"Response cache: {stats.hits} hits / {stats.misses} misses "
+            f"({stats.hit_rate:.0%} hit rate)"
+        )
+    
+    if config.debug and llm_manager.last_usage is not None:
+        usage = llm_manager.last_usage
+        st.sidebar.caption(
+            f"Last call ({usage.model_key}): {usage.input_tokens} input tokens, "
+            f"{usage.cache_read_tokens} read from / {usage.cache_write_tokens} written to prompt cache"
+        )
+    
+    if config.debug:
+        with st.sidebar.expander("📊 LLM call telemetry"):
+            rows = llm_manager.telemetry.summary()
+            if rows:
+                st.dataframe(rows, hide_index=True)
+            else:
+                st.caption("No LLM calls yet.")
+    
+    st.sidebar.toggle(
+        "⚡ Speculative pre-generation",
+        key="speculative_generation",
+        help="Start generating the next step in the background as soon as the "
+             "current step is complete. Results are used only if the inputs are unchanged."
+    )
+    
+    st.sidebar.toggle(
+        "✂️ Keep partial output when stopped",
+        key="keep_partial_output",
+        help="When a generation is stopped or runs past its deadline, keep the text "
+             "streamed so far so it can be edited or regenerated later."
+    )
+    
+    st.sidebar.radio(
+        "PRD generation mode",
+        PRD_GENERATION_MODES,
+        key="prd_generation_mode",
+        help="Parallel sections writes every PRD section (and groups of user stories) "
+             "in a separate concurrent call, so the PRD takes about as long as its slowest section."
+    )
     
     st.sidebar.markdown("---")
     
@@ -64,13 +232,47 @@ def render_sidebar():
         )
         ProjectStorage.save_project(new_project)
         st.session_state.current_project = new_project
+        st.session_state.project_cursors = []
+        st.session_state.speculator.discard_all()
+        st.rerun()
+    
+    render_project_list()
+
+
+def render_project_list():
+    """Page through the stored projects, most recently updated first.
+    
+    Only one page of summaries is read per rerun, so the sidebar costs the
+    same with ten projects as with tens of thousands.
+    """
+    with st.sidebar.expander("🔎 Find projects"):
+        name_prefix = st.text_input("Name starts with", key="project_search")
+        step = st.selectbox(
+            "Step",
+            [None] + list(ProjectStep),
+            format_func=lambda step: "All steps" if step is None else STEP_NAMES[step],
+            key="project_step_filter"
+        )
+        kind = st.radio("Show", list(PROJECT_KINDS), horizontal=True, key="project_kind_filter")
+    
+    # Cursor of each page after the first, up to the current one; new filters start from the newest projects
+    filters = (name_prefix.strip(), step, kind)
+    if st.session_state.get("project_filters") != filters:
+        st.session_state.project_filters = filters
+        st.session_state.project_cursors = []
+    cursors = st.session_state.project_cursors
+    
+    page = ProjectStorage.list_projects_page(
+        PROJECTS_PER_PAGE, cursors[-1] if cursors else None, name_prefix, step, PROJECT_KINDS[kind]
+    )
+    if not page.projects and cursors:
+        # The projects of this page were deleted
+        cursors.pop()
         st.rerun()
     
-    # Project List
-    projects = ProjectStorage.list_projects()
-    if projects:
+    if page.projects:
         st.sidebar.subheader("Recent Projects")
-        for project in projects[:5]:  # Show last 5 projects
+        for project in page.projects:
             col1, col2 = st.sidebar.columns([3, 1])
             
             with col1:
@@ -82,6 +284,7 @@ def render_sidebar():
                     loaded_project = ProjectStorage.load_project(project['id'])
                     if loaded_project:
                         st.session_state.current_project = loaded_project
+                        st.session_state.speculator.discard_all()
                         st.rerun()
             
             with col2:
@@ -91,6 +294,21 @@ def render_sidebar():
                         st.session_state.current_project.id == project['id']):
                         st.session_state.current_project = None
                     st.rerun()
+    elif any(filters[:2]) or PROJECT_KINDS[kind] is not None:
+        st.sidebar.caption("No matching projects.")
+    
+    if cursors or page.next_cursor:
+        col1, col2 = st.sidebar.columns(2)
+        with col1:
+            if st.button("◀ Newer", key="projects_newer", disabled=not cursors, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("Older ▶", key="projects_older", disabled=page.next_cursor is None,
+                         use_container_width=True):
+                cursors.append(page.next_cursor)
+                st.rerun()
+        st.sidebar.caption(f"Page {len(cursors) + 1}")
 
 
 def render_progress_bar(project: Project):
@@ -101,25 +319,15 @@ def render_progress_bar(project: Project):
     # Create progress indicator
     progress_cols = st.columns(len(steps))
     
-    step_names = {
-        ProjectStep.PROJECT_IDEA: "💡 Idea",
-        ProjectStep.PROJECT_DESCRIPTION: "📝 Description",
-        ProjectStep.PLANNING_SESSION: "🗣️ Planning",
-        ProjectStep.ANSWER_QUESTIONS: "❓ Questions",
-        ProjectStep.PLANNING_SUMMARY: "📋 Summary",
-        ProjectStep.PRD_DOCUMENT: "📄 PRD",
-        ProjectStep.TECH_STACK_ANALYSIS: "🏗️ Tech Stack"
-    }
-    
     for i, (step, col) in enumerate(zip(steps, progress_cols)):
         with col:
             if i < current_step_index:
-                st.success(f"✅ {step_names[step]}")
+                st.success(f"✅ {STEP_NAMES[step]}")
             elif i == current_step_index:
-                st.info(f"🔄 {step_names[step]}")
+                st.info(f"🔄 {STEP_NAMES[step]}")
             else:
                 st.empty()
-                st.write(f"⏳ {step_names[step]}")
+                st.write(f"⏳ {STEP_NAMES[step]}")
     
     # Progress percentage
     progress = project.get_progress_percentage()
@@ -187,6 +395,7 @@ def main_page():
     render_progress_bar(current_project)
     
     st.markdown("---")
+    render_generation_notice()
     
     # Render current step
     if current_project.current_step == ProjectStep.PROJECT_IDEA:
@@ -221,7 +430,7 @@ def render_navigation_buttons(project: Project):
         if current_index > 0:
             if st.button("⬅️ Previous Step", use_container_width=True):
                 project.current_step = steps[current_index - 1]
-                ProjectStorage.save_project(project)
+                ProjectStorage.save_project(project, flush=True)
                 st.rerun()
     
     with col3:
@@ -247,5 +456,5 @@ def render_navigation_buttons(project: Project):
             
             if st.button("Next Step ➡️", disabled=not can_advance, use_container_width=True):
                 if project.advance_step():
-                    ProjectStorage.save_project(project)
+                    ProjectStorage.save_project(project, flush=True)
                     st.rerun()
\ No newline at end of file
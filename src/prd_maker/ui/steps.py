@@ -1,8 +1,269 @@
 """Individual step implementations for the PRD creation process."""
 
+import logging
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from typing import Callable, Optional
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from ..models.project import Project
+from ..config.settings import config
+from ..core.async_runner import get_async_runner
+from ..core.cancellation import (
+    CancellationToken,
+    DeadlineExceeded,
+    GenerationCancelled,
+    cancellation_scope,
+)
 from ..core.project_storage import ProjectStorage
+from ..core.rate_limiter import queue_listener, queue_poller
+from ..core.prd_diff import affected_prd_fields
+from ..core.prd_parser import IncrementalPRDParser, parse_prd
+from ..core.revisions import VERSIONED_FIELDS
+from ..models.prd import PRDDocument
+
+logger = logging.getLogger(__name__)
+
+# Values of Streamlit's (private) ScriptRequestType
+SCRIPT_REQUEST_STATES = {"CONTINUE", "STOP", "RERUN"}
+_interrupt_check_unavailable = False
+
+# Operation (LLMManager pipeline step) generating each speculation; the
+# sectioned PRD mode uses "prd_section" instead
+SPECULATION_OPERATIONS = {
+    "project_description": "project_description",
+    "planning_questions": "questions",
+    "planning_summary": "planning_summary",
+    "prd_document": "prd_document",
+}
+
+
+def _write_stream(stream) -> str:
+    """Render streamed tokens into the page and return the complete text."""
+    result = st.write_stream(stream)
+    return result if isinstance(result, str) else "".join(str(part) for part in result)
+
+
+class _QueueStatus:
+    """Shows the place of a waiting LLM call in the provider's rate limit queue.
+    
+    Positions reported from the async runner's thread are drawn by the
+    script thread when the call waiting on the runner polls.
+    """
+    
+    def __init__(self):
+        self.placeholder = st.empty()
+        self.position = 0
+        self._shown = 0
+        self._script_thread = threading.current_thread()
+    
+    def __call__(self, position: int) -> None:
+        self.position = position
+        if threading.current_thread() is self._script_thread:
+            self.poll()
+    
+    def poll(self) -> None:
+        position = self.position
+        if position == self._shown:
+            return
+        self._shown = position
+        if position:
+            self.placeholder.info(f"⏳ Queued, position {position}: waiting for a free slot with the AI provider...")
+        else:
+            self.placeholder.empty()
+
+
+def _script_interrupted() -> Callable[[], bool]:
+    """Return a check for a pending stop or rerun of the current script run.
+    
+    Streamlit records a click on Stop, any other interaction with the page
+    and a closed browser tab as a request to its script runner, but only
+    acts on it at the script's next Streamlit call, which does not come
+    while the script waits for a provider. The request is only readable
+    from the runner's private state; if a Streamlit release changes it,
+    the check never fires (logged once) and a stop takes effect at the
+    next streamed token or the generation deadline, as Streamlit does.
+    """
+    global _interrupt_check_unavailable
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return lambda: False
+    requests = getattr(ctx, "script_requests", None)
+    state = getattr(requests, "_state", None)
+    if not (isinstance(state, Enum) and state.value in SCRIPT_REQUEST_STATES):
+        if not _interrupt_check_unavailable:
+            _interrupt_check_unavailable = True
+            logger.warning("Streamlit %s does not expose script run requests; "
+                           "waiting generations are stopped only at their next token or deadline",
+                           st.__version__)
+        return lambda: False
+    
+    def interrupted() -> bool:
+        state = getattr(requests, "_state", None)
+        return isinstance(state, Enum) and state.value != "CONTINUE"
+    
+    return interrupted
+
+
+@contextmanager
+def _llm_spinner(text: str, keep_partial: Optional[Callable[[str], None]] = None):
+    """Spinner for an LLM call with a Stop button and its queue position.
+    
+    The calls inside are cancelled on Stop, on any other interaction with
+    the page, when the session disconnects or at the generation deadline.
+    ``keep_partial`` receives the text streamed before the stop if the user
+    chose to keep partial output.
+    """
+    stop = st.empty()
+    stop.button("⏹ Stop", key=f"stop_{text}", help="Stop this generation")
+    status = _QueueStatus()
+    token = CancellationToken(
+        timeout=config.generation_deadline_seconds or None,
+        should_stop=_script_interrupted()
+    )
+    try:
+        with st.spinner(text), queue_listener(status), cancellation_scope(token):
+            yield
+    except GenerationCancelled as e:
+        _generation_cancelled(e, keep_partial)
+    finally:
+        status.placeholder.empty()
+        stop.empty()
+
+
+def _generation_cancelled(error: GenerationCancelled, keep_partial: Optional[Callable[[str], None]]) -> None:
+    """Keep the partial output if wanted and rerun to show the page without the stopped call."""
+    kept = bool(error.partial.strip() and keep_partial and st.session_state.get("keep_partial_output", True))
+    if kept:
+        keep_partial(error.partial)
+    if isinstance(error, DeadlineExceeded):
+        notice = f"The generation was stopped at its {config.generation_deadline_seconds:g} s deadline."
+    else:
+        notice = "The generation was stopped."
+    if kept:
+        notice += " The text generated so far was kept."
+    st.session_state.generation_notice = notice
+    st.rerun()
+
+
+def render_generation_notice() -> None:
+    """Show, once, why the last generation ended early."""
+    notice = st.session_state.pop("generation_notice", None)
+    if notice:
+        st.warning(f"⏹ {notice}")
+
+
+def _keep_field(project: Project, field: str) -> Callable[[str], None]:
+    """Partial-output handler that stores the text in a project field."""
+    def keep(text: str) -> None:
+        setattr(project, field, text)
+        ProjectStorage.save_project(project)
+    return keep
+
+
+def _run_async(coroutine):
+    """Run a coroutine on the async runner, keeping the queue status up to date.
+    
+    The coroutine is cancelled with the generation's cancellation token.
+    """
+    return get_async_runner().run(coroutine, poll=queue_poller())
+
+
+# PRD generation modes selectable in the sidebar
+PRD_MODE_SINGLE = "Single pass (streamed)"
+PRD_MODE_SECTIONS = "Parallel sections"
+PRD_GENERATION_MODES = [PRD_MODE_SINGLE, PRD_MODE_SECTIONS]
+
+
+def _prd_generation_mode() -> str:
+    return st.session_state.get("prd_generation_mode", PRD_MODE_SINGLE)
+
+
+def _prd_title(project: Project) -> str:
+    return f"Dokument wymagań produktu (PRD) - {project.name}"
+
+
+def _generate_prd(llm_manager, project: Project, use_cache: bool = True) -> str:
+    """Generate the PRD in the selected mode and return its markdown.
+    
+    Single-pass generation is streamed into the page; section-wise
+    generation runs all sections concurrently and assembles a PRDDocument.
+    """
+    if _prd_generation_mode() == PRD_MODE_SECTIONS:
+        document = _run_async(llm_manager.agenerate_prd_sections(
+            project.planning_summary, _prd_title(project), use_cache=use_cache
+        ))
+        markdown = document.to_markdown()
+    else:
+        parser = IncrementalPRDParser()
+        markdown = _write_stream(parser.consume(llm_manager.stream_prd_document(
+            project.planning_summary, use_cache=use_cache
+        )))
+        document = parser.document
+    _remember_prd_structure(project, markdown, document)
+    return markdown
+
+
+def _remember_prd_structure(project: Project, markdown: str, document: PRDDocument) -> None:
+    st.session_state.prd_structure = (project.id, markdown, document)
+
+
+def _prd_structure(project: Project) -> PRDDocument:
+    """Return the structured form of the project's PRD.
+    
+    The document built while the PRD was generated is reused as long as the
+    markdown is unchanged; edited or loaded PRDs are parsed once.
+    """
+    cached = st.session_state.get("prd_structure")
+    if cached and cached[0] == project.id and cached[1] == project.prd_document:
+        return cached[2]
+    document = parse_prd(project.prd_document)
+    _remember_prd_structure(project, project.prd_document, document)
+    return document
+
+
+def _speculation_operation(name: str) -> str:
+    """LLMManager operation a speculation generates with."""
+    if name == "prd_document" and _prd_generation_mode() == PRD_MODE_SECTIONS:
+        return "prd_section"
+    return SPECULATION_OPERATIONS[name]
+
+
+def _speculation_model(name: str) -> str:
+    """Model the step a speculation pre-generates would use now."""
+    return st.session_state.llm_manager.model_for(_speculation_operation(name))
+
+
+def _speculate(name: str, inputs: tuple, func) -> None:
+    """Start pre-generating the next step in the background, if enabled.
+    
+    The generation is pinned to the model the step would use now, and its
+    result is only handed out while the step still uses that model.
+    """
+    if st.session_state.get("speculative_generation"):
+        llm_manager = st.session_state.llm_manager
+        operation = _speculation_operation(name)
+        model_key = llm_manager.model_for(operation)
+        
+        def job():
+            with llm_manager.pinned({operation: model_key}):
+                return func()
+        
+        st.session_state.speculator.start(name, inputs, job, model_key=model_key)
+
+
+def _take_speculation(name: str, inputs: tuple, wait: bool = False):
+    """Return a pre-generated result if its inputs and model are unchanged."""
+    speculator = st.session_state.get("speculator")
+    if speculator is None:
+        return None
+    return speculator.take(name, inputs, timeout=None if wait else 0, model_key=_speculation_model(name))
+
+
+def _speculation_pending(name: str, inputs: tuple) -> bool:
+    speculator = st.session_state.get("speculator")
+    return speculator is not None and speculator.is_pending(name, inputs, model_key=_speculation_model(name))
 
 
 def render_project_idea_step(project: Project):
@@ -29,6 +290,12 @@ def render_project_idea_step(project: Project):
         st.warning("Please provide at least 50 characters to describe your project idea.")
     else:
         st.success("✅ Project idea looks good! You can proceed to the next step.")
+        llm_manager = st.session_state.llm_manager
+        _speculate(
+            "project_description",
+            (project_idea,),
+            lambda idea=project_idea: llm_manager.generate_project_description(idea)
+        )
 
 
 def render_project_description_step(project: Project):
@@ -41,13 +308,27 @@ def render_project_description_step(project: Project):
         with st.expander("📋 Original Project Idea"):
             st.write(project.project_idea)
     
+    llm_manager = st.session_state.llm_manager
+    speculation_inputs = (project.project_idea,)
+    
+    # Use a description pre-generated while the idea was being written
+    if not project.project_description and project.project_idea:
+        description = _take_speculation("project_description", speculation_inputs)
+        if description:
+            project.project_description = description
+            ProjectStorage.save_project(project)
+    
     # Generate description button
     if not project.project_description and project.project_idea:
         if st.button("🚀 Generate Project Description", type="primary"):
-            with st.spinner("Generating detailed project description..."):
+            with _llm_spinner("Generating detailed project description...",
+                              keep_partial=_keep_field(project, "project_description")):
                 try:
-                    llm_manager = st.session_state.llm_manager
-                    description = llm_manager.generate_project_description(project.project_idea)
+                    description = _take_speculation(
+                        "project_description", speculation_inputs, wait=True
+                    ) or _write_stream(
+                        llm_manager.stream_project_description(project.project_idea)
+                    )
                     project.project_description = description
                     ProjectStorage.save_project(project)
                     st.rerun()
@@ -74,10 +355,13 @@ def render_project_description_step(project: Project):
         col1, col2 = st.columns([1, 1])
         with col1:
             if st.button("🔄 Regenerate Description"):
-                with st.spinner("Regenerating description..."):
+                with _llm_spinner("Regenerating description..."):
                     try:
-                        llm_manager = st.session_state.llm_manager
-                        description = llm_manager.generate_project_description(project.project_idea)
+                        description = _write_stream(
+                            llm_manager.stream_project_description(
+                                project.project_idea, use_cache=False
+                            )
+                        )
                         project.project_description = description
                         ProjectStorage.save_project(project)
                         st.rerun()
@@ -85,6 +369,11 @@ def render_project_description_step(project: Project):
                         st.error(f"Error regenerating description: {str(e)}")
         
         st.success("✅ Project description is ready! You can proceed to the planning session.")
+        _speculate(
+            "planning_questions",
+            (project.project_description,),
+            lambda description=project.project_description: llm_manager.generate_questions(description)
+        )
 
 
 def render_planning_session_step(project: Project):
@@ -97,13 +386,35 @@ def render_planning_session_step(project: Project):
         with st.expander("📋 Project Description"):
             st.write(project.project_description)
     
+    llm_manager = st.session_state.llm_manager
+    speculation_inputs = (project.project_description,)
+    
+    # Use questions pre-generated while the description was reviewed
+    if not project.planning_questions and project.project_description:
+        questions = _take_speculation("planning_questions", speculation_inputs)
+        if questions:
+            project.planning_questions = [{"question": q, "id": i} for i, q in enumerate(questions)]
+            ProjectStorage.save_project(project)
+    
     # Generate questions if not already generated
     if not project.planning_questions and project.project_description:
         if st.button("🎯 Generate Planning Questions", type="primary"):
-            with st.spinner("Generating planning questions..."):
+            def keep_questions(text: str) -> None:
+                # The last line may be a question cut off mid-sentence
+                complete = text if text.endswith("\n") else text.rsplit("\n", 1)[0]
+                questions = llm_manager.parse_questions(complete) if "\n" in text else []
+                if questions:
+                    project.planning_questions = [{"question": q, "id": i} for i, q in enumerate(questions)]
+                    ProjectStorage.save_project(project)
+            
+            with _llm_spinner("Generating planning questions...", keep_partial=keep_questions):
                 try:
-                    llm_manager = st.session_state.llm_manager
-                    questions = llm_manager.generate_questions(project.project_description)
+                    questions = _take_speculation("planning_questions", speculation_inputs, wait=True)
+                    if not questions:
+                        questions_text = _write_stream(
+                            llm_manager.stream_questions(project.project_description)
+                        )
+                        questions = llm_manager.parse_questions(questions_text)
                     project.planning_questions = [{"question": q, "id": i} for i, q in enumerate(questions)]
                     ProjectStorage.save_project(project)
                     st.rerun()
@@ -165,6 +476,15 @@ def render_planning_session_step(project: Project):
         
         st.info(f"Progress: {answered_questions}/{total_questions} questions answered")
         
+        if answered_questions == total_questions:
+            answers = [dict(ans) for ans in project.planning_answers]
+            _speculate(
+                "planning_summary",
+                (project.project_description, answers),
+                lambda description=project.project_description, answers=answers:
+                    llm_manager.generate_planning_summary(description, answers)
+            )
+        
         # Option to add more questions
         st.subheader("Additional Questions")
         additional_question = st.text_input("Add your own question:", placeholder="Enter a custom question...")
@@ -201,16 +521,31 @@ def render_planning_summary_step(project: Project):
                     st.write(f"**A:** {ans['answer']}")
                     st.markdown("---")
     
+    llm_manager = st.session_state.llm_manager
+    speculation_inputs = (
+        project.project_description,
+        project.planning_answers
+    )
+    
+    # Use a summary pre-generated once all questions were answered
+    if not project.planning_summary and project.planning_answers:
+        summary = _take_speculation("planning_summary", speculation_inputs)
+        if summary:
+            project.planning_summary = summary
+            ProjectStorage.save_project(project)
+    
     # Generate summary button
     if not project.planning_summary and project.planning_answers:
         if st.button("📊 Generate Planning Summary", type="primary"):
-            with st.spinner("Generating planning summary..."):
+            with _llm_spinner("Generating planning summary...",
+                              keep_partial=_keep_field(project, "planning_summary")):
                 try:
-                    llm_manager = st.session_state.llm_manager
-                    summary = llm_manager.generate_planning_summary(
+                    summary = _take_speculation(
+                        "planning_summary", speculation_inputs, wait=True
+                    ) or _write_stream(llm_manager.stream_planning_summary(
                         project.project_description,
                         project.planning_answers
-                    )
+                    ))
                     project.planning_summary = summary
                     ProjectStorage.save_project(project)
                     st.rerun()
@@ -237,13 +572,13 @@ def render_planning_summary_step(project: Project):
         col1, col2 = st.columns([1, 1])
         with col1:
             if st.button("🔄 Regenerate Summary"):
-                with st.spinner("Regenerating summary..."):
+                with _llm_spinner("Regenerating summary..."):
                     try:
-                        llm_manager = st.session_state.llm_manager
-                        summary = llm_manager.generate_planning_summary(
+                        summary = _write_stream(llm_manager.stream_planning_summary(
                             project.project_description,
-                            project.planning_answers
-                        )
+                            project.planning_answers,
+                            use_cache=False
+                        ))
                         project.planning_summary = summary
                         ProjectStorage.save_project(project)
                         st.rerun()
@@ -251,6 +586,71 @@ def render_planning_summary_step(project: Project):
                         st.error(f"Error regenerating summary: {str(e)}")
         
         st.success("✅ Planning summary is ready! You can now generate the final PRD document.")
+        if _prd_generation_mode() == PRD_MODE_SECTIONS:
+            speculate_prd = lambda summary=project.planning_summary, title=_prd_title(project): \
+                llm_manager.generate_prd_sections(summary, title).to_markdown()
+        else:
+            speculate_prd = lambda summary=project.planning_summary: \
+                llm_manager.generate_prd_document(summary)
+        _speculate(
+            "prd_document",
+            (_prd_generation_mode(), project.name, project.planning_summary),
+            speculate_prd
+        )
+
+
+def _render_revision_history(project: Project) -> None:
+    """Browse, compare and restore saved versions of the project texts."""
+    if not st.toggle(
+        "🕘 Revision history",
+        key=f"revision_history_{project.id}",
+        help="Every saved change of the project texts is kept as a revision. "
+             "Restoring one brings its texts back without generating anything again."
+    ):
+        return
+    
+    notice = st.session_state.pop("revision_notice", None)
+    if notice:
+        st.success(notice)
+    
+    revisions = ProjectStorage.list_revisions(project.id)
+    if not revisions:
+        st.caption("No revisions saved yet.")
+        return
+    
+    labels = {
+        revision.number: f"#{revision.number} · {revision.created_at:%Y-%m-%d %H:%M:%S} · "
+                         + ", ".join(name.replace("_", " ") for name in revision.fields)
+        for revision in revisions
+    }
+    numbers = [revision.number for revision in reversed(revisions)]
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        selected = st.selectbox("Revision", numbers, format_func=labels.get,
+                                key=f"revision_{project.id}")
+    with col2:
+        compare = st.selectbox("Compared with", numbers, index=min(1, len(numbers) - 1),
+                               format_func=labels.get, key=f"revision_compare_{project.id}")
+    with col3:
+        field = st.selectbox("Text", VERSIONED_FIELDS, index=VERSIONED_FIELDS.index("prd_document"),
+                             format_func=lambda name: name.replace("_", " "),
+                             key=f"revision_field_{project.id}")
+    
+    diff = ProjectStorage.diff_revisions(project.id, compare, selected, field)
+    if diff:
+        st.code(diff, language="diff")
+    else:
+        st.caption("This text is the same in both revisions.")
+    
+    if st.button(f"↩️ Restore revision #{selected}", key=f"restore_revision_{project.id}"):
+        restored = ProjectStorage.restore_revision(project, selected)
+        if restored:
+            st.session_state.revision_notice = (
+                f"Restored revision #{selected}: " + ", ".join(name.replace("_", " ") for name in restored)
+            )
+        else:
+            st.session_state.revision_notice = f"The texts already match revision #{selected}."
+        st.rerun()
 
 
 def render_prd_document_step(project: Project):
@@ -263,14 +663,38 @@ def render_prd_document_step(project: Project):
         with st.expander("📋 Planning Summary"):
             st.write(project.planning_summary)
     
+    llm_manager = st.session_state.llm_manager
+    speculation_inputs = (
+        _prd_generation_mode(),
+        project.name,
+        project.planning_summary
+    )
+    
+    # Use a PRD pre-generated while the summary was reviewed
+    if not project.prd_document and project.planning_summary:
+        prd_doc = _take_speculation("prd_document", speculation_inputs)
+        if prd_doc:
+            project.prd_document = prd_doc
+            project.prd_source_summary = project.planning_summary
+            ProjectStorage.save_project(project)
+    
     # Generate PRD button
     if not project.prd_document and project.planning_summary:
+        if _speculation_pending("prd_document", speculation_inputs):
+            st.info("⚡ The PRD is already being generated in the background.")
         if st.button("📄 Generate PRD Document", type="primary"):
-            with st.spinner("Generating PRD document..."):
+            def keep_prd(text: str) -> None:
+                project.prd_document = text
+                project.prd_source_summary = project.planning_summary
+                ProjectStorage.save_project(project)
+            
+            with _llm_spinner("Generating PRD document...", keep_partial=keep_prd):
                 try:
-                    llm_manager = st.session_state.llm_manager
-                    prd_doc = llm_manager.generate_prd_document(project.planning_summary)
+                    prd_doc = _take_speculation(
+                        "prd_document", speculation_inputs, wait=True
+                    ) or _generate_prd(llm_manager, project)
                     project.prd_document = prd_doc
+                    project.prd_source_summary = project.planning_summary
                     ProjectStorage.save_project(project)
                     st.rerun()
                 except Exception as e:
@@ -300,20 +724,51 @@ def render_prd_document_step(project: Project):
             col1, col2 = st.columns([1, 1])
             with col1:
                 if st.button("🔄 Regenerate PRD"):
-                    with st.spinner("Regenerating PRD..."):
+                    with _llm_spinner("Regenerating PRD..."):
                         try:
-                            llm_manager = st.session_state.llm_manager
-                            prd_doc = llm_manager.generate_prd_document(project.planning_summary)
+                            prd_doc = _generate_prd(llm_manager, project, use_cache=False)
                             project.prd_document = prd_doc
+                            project.prd_source_summary = project.planning_summary
                             ProjectStorage.save_project(project)
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error regenerating PRD: {str(e)}")
+            
+            # Incremental update after the planning summary was edited
+            if project.prd_source_summary and project.prd_source_summary != project.planning_summary:
+                affected = affected_prd_fields(project.prd_source_summary, project.planning_summary)
+                update_clicked = False
+                if not affected:
+                    # Only whitespace changed: the PRD is still up to date
+                    project.prd_source_summary = project.planning_summary
+                    ProjectStorage.save_project(project)
+                else:
+                    with col2:
+                        st.info("The planning summary changed since this PRD was generated. Affected sections: "
+                                + ", ".join(name.replace("_", " ") for name in affected))
+                        update_clicked = st.button("🧩 Update Affected Sections")
+                if update_clicked:
+                    with _llm_spinner(f"Regenerating {len(affected)} section(s)..."):
+                        try:
+                            prd_doc, _ = _run_async(llm_manager.aupdate_prd_document(
+                                project.prd_document,
+                                project.prd_source_summary,
+                                project.planning_summary,
+                                use_cache=False
+                            ))
+                            project.prd_document = prd_doc
+                            project.prd_source_summary = project.planning_summary
+                            ProjectStorage.save_project(project)
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error updating PRD: {str(e)}")
         
         with tab2:
             # Preview PRD
             st.markdown(project.prd_document)
         
+        _render_revision_history(project)
+        
         # Export options
         st.subheader("📥 Export Options")
         col1, col2, col3 = st.columns(3)
@@ -337,8 +792,8 @@ def render_prd_document_step(project: Project):
             )
         
         with col3:
-            # Project export
-            project_json = ProjectStorage.export_project(project.id)
+            # Project export of the edited project, so its pending saves are not flushed on every rerun
+            project_json = project.model_dump_json(indent=2)
             if project_json:
                 st.download_button(
                     label="📦 Export Project",
@@ -351,17 +806,27 @@ def render_prd_document_step(project: Project):
         
         # Quality metrics
         st.subheader("📊 Document Quality")
+        document = _prd_structure(project)
         word_count = len(project.prd_document.split())
-        sections = project.prd_document.count('##')
-        user_stories = project.prd_document.count('US-')
+        user_stories = document.user_stories
+        criteria_count = sum(len(story.acceptance_criteria) for story in user_stories)
         
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric("Word Count", word_count)
         with col2:
-            st.metric("Sections", sections)
+            st.metric("Completeness", f"{document.get_completion_score():.0f}%")
         with col3:
-            st.metric("User Stories", user_stories)
+            st.metric("User Stories", len(user_stories))
+        with col4:
+            st.metric("Acceptance Criteria", criteria_count)
+        
+        missing = [name.replace("_", " ") for name, filled in document.validate_completeness().items() if not filled]
+        if missing:
+            st.warning(f"Missing or empty sections: {', '.join(missing)}")
+        untestable = [story.id for story in user_stories if not story.acceptance_criteria]
+        if untestable:
+            st.warning(f"User stories without acceptance criteria: {', '.join(untestable)}")
 
 
 def render_tech_stack_analysis_step(project: Project):
@@ -401,13 +866,16 @@ Additional: Redis for caching, SendGrid for emails""",
     # Generate analysis button
     if not project.tech_stack_analysis and project.tech_stack_proposal.strip() and project.prd_document:
         if st.button("🔍 Analyze Tech Stack", type="primary"):
-            with st.spinner("Analyzing technology stack against PRD requirements..."):
+            llm_manager = st.session_state.llm_manager
+            spinner_text = "Analyzing technology stack against PRD requirements..."
+            if llm_manager.should_chunk_tech_stack(project.prd_document):
+                spinner_text = "Large PRD: analyzing its sections in parallel before merging the findings..."
+            with _llm_spinner(spinner_text, keep_partial=_keep_field(project, "tech_stack_analysis")):
                 try:
-                    llm_manager = st.session_state.llm_manager
-                    analysis = llm_manager.analyze_tech_stack(
+                    analysis = _write_stream(llm_manager.stream_tech_stack_analysis(
                         project.prd_document,
                         project.tech_stack_proposal
-                    )
+                    ))
                     project.tech_stack_analysis = analysis
                     ProjectStorage.save_project(project)
                     st.rerun()
@@ -438,13 +906,14 @@ Additional: Redis for caching, SendGrid for emails""",
             col1, col2 = st.columns([1, 1])
             with col1:
                 if st.button("🔄 Regenerate Analysis"):
-                    with st.spinner("Regenerating tech stack analysis..."):
+                    with _llm_spinner("Regenerating tech stack analysis..."):
                         try:
                             llm_manager = st.session_state.llm_manager
-                            analysis = llm_manager.analyze_tech_stack(
+                            analysis = _write_stream(llm_manager.stream_tech_stack_analysis(
                                 project.prd_document,
-                                project.tech_stack_proposal
-                            )
+                                project.tech_stack_proposal,
+                                use_cache=False
+                            ))
                             project.tech_stack_analysis = analysis
                             ProjectStorage.save_project(project)
                             st.rerun()
@@ -479,8 +948,8 @@ Additional: Redis for caching, SendGrid for emails""",
             )
         
         with col3:
-            # Project export
-            project_json = ProjectStorage.export_project(project.id)
+            # Project export of the edited project, so its pending saves are not flushed on every rerun
+            project_json = project.model_dump_json(indent=2)
             if project_json:
                 st.download_button(
                     label="📦 Export Full Project",
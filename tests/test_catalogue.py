@@ -0,0 +1,177 @@
+"""Keyset paging of the project catalogue, in memory and in SQLite."""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pytest
+
+from src.prd_maker.core.catalogue import ProjectCatalogue, ProjectPage, matches
+from src.prd_maker.core.storage_backends import SQLiteBackend, _summary
+from src.prd_maker.models.project import Project, ProjectStep
+
+NAMES = ["Alpha", "alpine", "Beta", "Łódź planner", "łódka", "Gamma", ""]
+STEPS = list(ProjectStep)
+START = datetime(2026, 1, 1)
+
+
+def make_projects(count: int, seed: int = 7) -> List[Project]:
+    rng = random.Random(seed)
+    return [
+        Project(
+            id=f"p{i:03d}",
+            name=f"{rng.choice(NAMES)} {i}".strip(),
+            # Repeated timestamps: ties are broken by id
+            updated_at=START + timedelta(minutes=rng.randrange(count // 2)),
+            current_step=rng.choice(STEPS),
+            is_template=rng.random() < 0.2,
+        )
+        for i in range(count)
+    ]
+
+
+def all_pages(list_page: Callable[..., ProjectPage], limit: int, **filters: Any) -> List[List[str]]:
+    pages: List[List[str]] = []
+    cursor: Optional[str] = None
+    while True:
+        page = list_page(limit, cursor, **filters)
+        pages.append([summary["id"] for summary in page.projects])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+def expected_ids(projects: List[Project], **filters: Any) -> List[str]:
+    ordered = sorted(projects, key=lambda project: (project.updated_at, project.id), reverse=True)
+    summaries = [_summary(project.id, project.model_dump()) for project in ordered]
+    return [summary["id"] for summary in summaries if matches(summary, **filters)]
+
+
+FILTERS: List[Dict[str, Any]] = [
+    {},
+    {"name_prefix": "al"},
+    {"name_prefix": "ŁÓD"},
+    {"name_prefix": "nothing"},
+    {"step": ProjectStep.PRD_DOCUMENT.value},
+    {"is_template": True},
+    {"is_template": False, "step": ProjectStep.PROJECT_IDEA.value},
+    {"name_prefix": "beta", "is_template": False},
+]
+
+
+@pytest.fixture
+def sqlite(tmp_path: Path) -> Iterator[SQLiteBackend]:
+    backend = SQLiteBackend(str(tmp_path / "projects.db"))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def catalogue(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[Callable[[List[Project]], Any]]:
+    """Builds a catalogue of projects; returns its ``list_page``, ``upsert`` and ``remove``."""
+    if request.param == "memory":
+        def build(projects: List[Project]) -> Any:
+            catalogue = ProjectCatalogue([_summary(project.id, project.model_dump()) for project in projects])
+            upsert = lambda project: catalogue.upsert(_summary(project.id, project.model_dump()))
+            return catalogue.page, upsert, catalogue.remove
+        yield build
+    else:
+        backend = SQLiteBackend(str(tmp_path / "projects.db"))
+
+        def build(projects: List[Project]) -> Any:
+            for project in projects:
+                backend.save(project)
+            return backend.list_page, backend.save, backend.delete
+        yield build
+        backend.close()
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("limit", [1, 7, 500])
+def test_pages_cover_matches_in_order(catalogue: Any, filters: Dict[str, Any], limit: int) -> None:
+    projects = make_projects(120)
+    list_page, _, _ = catalogue(projects)
+    pages = all_pages(list_page, limit, **filters)
+    assert [project_id for page in pages for project_id in page] == expected_ids(projects, **filters)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert len(pages[-1]) <= limit
+
+
+def test_last_page_has_no_cursor(catalogue: Any) -> None:
+    list_page, _, _ = catalogue(make_projects(10))
+    page = list_page(10)
+    assert len(page.projects) == 10
+    assert page.next_cursor is None
+    assert list_page(5).next_cursor is not None
+
+
+def test_empty_catalogue(catalogue: Any) -> None:
+    list_page, _, _ = catalogue([])
+    assert list_page(5) == ProjectPage()
+
+
+def test_cursor_is_stable_under_updates_and_deletes(catalogue: Any) -> None:
+    projects = make_projects(40)
+    list_page, upsert, remove = catalogue(projects)
+    first = list_page(10)
+    ordered = expected_ids(projects)
+
+    # A project from a later page is updated (moves to the front), one is deleted
+    # and a new one is created: the next page continues where the first ended
+    moved = next(project for project in projects if project.id == ordered[25])
+    moved.updated_at = START + timedelta(days=30)
+    upsert(moved)
+    remove(ordered[12])
+    upsert(Project(id="new", updated_at=START + timedelta(days=31)))
+
+    second = list_page(10, first.next_cursor)
+    remaining = [project_id for project_id in ordered[10:] if project_id not in (ordered[12], moved.id)]
+    assert [summary["id"] for summary in second.projects] == remaining[:10]
+    assert [summary["id"] for summary in list_page(2).projects] == ["new", moved.id]
+
+
+def test_rename_updates_prefix_search(catalogue: Any) -> None:
+    project = Project(id="p", name="Old name")
+    list_page, upsert, _ = catalogue([project])
+    project.name = "Zeta"
+    upsert(project)
+    assert list_page(5, name_prefix="old").projects == []
+    assert [summary["id"] for summary in list_page(5, name_prefix="ZE").projects] == ["p"]
+
+
+def test_partial_save_updates_catalogue_columns(sqlite: SQLiteBackend) -> None:
+    project = Project(id="p", name="Before")
+    sqlite.save(project)
+    project.name = "After"
+    project.advance_step()
+    sqlite.save_fields(project, {"name", "current_step", "completed_steps", "updated_at"})
+    page = sqlite.list_page(5, name_prefix="aft", step=ProjectStep.PROJECT_DESCRIPTION.value)
+    assert [summary["name"] for summary in page.projects] == ["After"]
+    assert sqlite.load("p").name == "After"
+
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "projects_catalogue"),
+    ({"step": ProjectStep.PRD_DOCUMENT.value}, "projects_catalogue_step"),
+    ({"is_template": True}, "projects_catalogue_template"),
+])
+def test_pages_are_read_from_the_catalogue_indexes(sqlite: SQLiteBackend, filters: Dict[str, Any],
+                                                   index: str) -> None:
+    for project in make_projects(300):
+        sqlite.save(project)
+    cursor = sqlite.list_page(5, **filters).next_cursor
+    assert cursor is not None
+    statements: List[str] = []
+    with sqlite._connection() as conn:
+        conn.set_trace_callback(statements.append)
+    # The pool is last in, first out, so the page is read on the traced connection
+    sqlite.list_page(5, cursor, **filters)
+    with sqlite._connection() as conn:
+        conn.set_trace_callback(None)
+        query = next(statement for statement in statements if statement.lstrip().startswith("SELECT"))
+        plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+    # The cursor seeks into the index instead of skipping the earlier pages
+    assert f"USING INDEX {index} (" in plan
+    assert "(updated_at,id)<(?,?)" in plan
+    assert "TEMP B-TREE" not in plan
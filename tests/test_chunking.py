@@ -0,0 +1,98 @@
+"""Chunking large PRDs for the map-reduce tech stack analysis."""
+
+import re
+from typing import List
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.chunking import HEADING_PATTERN, chunk_markdown, estimate_tokens, split_sections
+from src.prd_maker.core.fake_provider import FakeChatModel
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.telemetry import Telemetry
+
+LARGE_PRD = FakeChatModel(seed=1, story_count=40)._prd(1)
+STORIES = split_sections(split_sections(LARGE_PRD)[5], level=3)[1:]
+
+
+def heading_lines(markdown: str) -> List[str]:
+    return [line for line in markdown.splitlines() if HEADING_PATTERN.match(line)]
+
+
+def body_lines(markdown: str) -> List[str]:
+    return [line for line in markdown.splitlines() if line.strip() and not line.startswith("## ")]
+
+
+@pytest.mark.parametrize("budget", [150, 300, 1000, 5000])
+def test_chunks_stay_within_budget_and_keep_stories_whole(budget: int) -> None:
+    assert len(STORIES) == 40
+    chunks = chunk_markdown(LARGE_PRD, budget)
+    assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+    for chunk in chunks:
+        # Every chunk starts at a heading, and headings are never cut
+        assert HEADING_PATTERN.match(chunk.lstrip("\n").split("\n", 1)[0])
+        assert set(heading_lines(chunk)) <= set(heading_lines(LARGE_PRD))
+    for story in STORIES:
+        assert sum(story.strip() in chunk for chunk in chunks) == 1
+    # Nothing is lost or reordered; only section headings are repeated
+    assert [line for chunk in chunks for line in body_lines(chunk)] == body_lines(LARGE_PRD)
+
+
+def test_section_heading_is_repeated_in_split_sections() -> None:
+    chunks = chunk_markdown(LARGE_PRD, 300)
+    story_chunks = [chunk for chunk in chunks if "### US-" in chunk]
+    assert len(story_chunks) > 1
+    assert all(chunk.startswith("## 5. Historyjki użytkowników\n") for chunk in story_chunks)
+
+
+def test_small_sections_are_packed_with_the_preamble() -> None:
+    chunks = chunk_markdown("# Title\n\n## A\ntext\n\n## B\nmore\n", 1000)
+    assert chunks == ["# Title\n\n## A\ntext\n\n## B\nmore\n"]
+
+
+def test_oversized_paragraph_is_cut_at_whitespace() -> None:
+    paragraph = " ".join(f"word{i}" for i in range(2000))
+    chunks = chunk_markdown(f"## Section\n{paragraph}\n", 200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert all(chunk.startswith("## Section\n") for chunk in chunks)
+    words = [word for chunk in chunks for word in chunk.split("\n", 1)[1].split()]
+    assert words == paragraph.split()
+
+
+def make_manager(threshold: int, chunk_tokens: int) -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(
+        models={}, fallback_chain=[],
+        tech_stack_chunk_threshold_tokens=threshold, tech_stack_chunk_tokens=chunk_tokens,
+    ), telemetry=Telemetry())
+    manager.set_current_model(manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1},
+    )))
+    return manager
+
+
+def calls(manager: LLMManager, operation: str) -> int:
+    stats = manager.telemetry.latency_stats("fake_fake", operation)
+    return stats.samples if stats is not None else 0
+
+
+def test_small_prd_takes_the_single_call_path() -> None:
+    manager = make_manager(threshold=estimate_tokens(LARGE_PRD) + 1, chunk_tokens=300)
+    assert not manager.should_chunk_tech_stack(LARGE_PRD)
+    assert manager.analyze_tech_stack(LARGE_PRD, "Python + PostgreSQL", use_cache=False)
+    assert calls(manager, "tech_stack_chunk") == 0
+    assert calls(manager, "tech_stack") == 1
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_large_prd_is_analysed_per_chunk_then_merged(streamed: bool) -> None:
+    manager = make_manager(threshold=estimate_tokens(LARGE_PRD) - 1, chunk_tokens=1000)
+    assert manager.should_chunk_tech_stack(LARGE_PRD)
+    if streamed:
+        analysis = "".join(manager.stream_tech_stack_analysis(LARGE_PRD, "Python", use_cache=False))
+    else:
+        analysis = manager.analyze_tech_stack(LARGE_PRD, "Python", use_cache=False)
+    assert re.search(r"^## ", analysis, re.M)
+    assert calls(manager, "tech_stack_chunk") == len(chunk_markdown(LARGE_PRD, 1000)) > 1
+    assert calls(manager, "tech_stack") == 1
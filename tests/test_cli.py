@@ -0,0 +1,120 @@
+"""The batch CLI end to end on the fake provider, with resumable checkpoints."""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from src.prd_maker import cli
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.telemetry import Telemetry
+from src.prd_maker.models.project import Project, ProjectStep
+
+IDEAS = [
+    {"id": "notes", "name": "Notes", "idea": "Aplikacja do notatek z przypomnieniami"},
+    {"idea": "Planer podróży dla rodzin"},
+]
+
+# LLMManager method run by each pipeline stage
+STAGE_METHODS = {
+    "project_description": "agenerate_project_description",
+    "planning_questions": "agenerate_questions",
+    "planning_answers": "agenerate_draft_answers",
+    "planning_summary": "agenerate_planning_summary",
+    "prd_document": "agenerate_prd_document",
+}
+
+
+def make_manager(calls: Counter, fail_stage: str = "") -> LLMManager:
+    """A fake-provider manager counting the calls of each stage; ``fail_stage`` raises."""
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]), telemetry=Telemetry())
+    manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1},
+    ))
+    for stage, name in STAGE_METHODS.items():
+        method = getattr(manager, name)
+
+        async def counted(*args: Any, _stage: str = stage, _method: Any = method, **kwargs: Any) -> Any:
+            calls[_stage] += 1
+            if _stage == fail_stage:
+                raise ConnectionError("provider went away")
+            return await _method(*args, **kwargs)
+
+        setattr(manager, name, counted)
+    return manager
+
+
+def run_cli(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, manager: LLMManager) -> int:
+    monkeypatch.setattr(cli, "LLMManager", lambda cache=None: manager)
+    monkeypatch.setattr(cli.config, "cache_enabled", False)
+    monkeypatch.setattr(cli.config, "metrics_file", None)
+    return cli.main(["batch", str(tmp_path / "ideas.jsonl"), "--output-dir", str(tmp_path / "out"),
+                     "--concurrency", "2"])
+
+
+@pytest.fixture
+def ideas_file(tmp_path: Path) -> Path:
+    path = tmp_path / "ideas.jsonl"
+    path.write_text("\n".join(json.dumps(idea, ensure_ascii=False) for idea in IDEAS) + "\n\n", encoding="utf-8")
+    return path
+
+
+def outputs(tmp_path: Path) -> List[Path]:
+    return sorted((tmp_path / "out").glob("*.json"))
+
+
+def checkpoint(tmp_path: Path, idea_id: str) -> Dict[str, Any]:
+    return json.loads((tmp_path / "out" / ".checkpoints" / f"{idea_id}.json").read_text(encoding="utf-8"))
+
+
+def test_batch_writes_complete_projects(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, ideas_file: Path) -> None:
+    calls: Counter = Counter()
+    assert run_cli(monkeypatch, tmp_path, make_manager(calls)) == 0
+    assert calls == Counter({stage: 2 for stage in STAGE_METHODS})
+
+    projects = [Project.model_validate_json(path.read_text(encoding="utf-8")) for path in outputs(tmp_path)]
+    assert len(projects) == 2
+    notes = next(project for project in projects if project.id == "notes")
+    assert notes.name == "Notes"
+    assert notes.current_step == ProjectStep.PRD_DOCUMENT
+    assert notes.prd_document.startswith("# ")
+    assert notes.prd_source_summary == notes.planning_summary
+    assert len(notes.planning_answers) == len(notes.planning_questions) > 0
+
+
+def test_rerun_resumes_after_the_last_completed_stage(monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
+                                                      ideas_file: Path, capsys: pytest.CaptureFixture) -> None:
+    # The first run stops at the planning summary
+    calls: Counter = Counter()
+    assert run_cli(monkeypatch, tmp_path, make_manager(calls, fail_stage="planning_summary")) == 1
+    assert "provider went away" in capsys.readouterr().err
+    assert outputs(tmp_path) == []
+    saved = checkpoint(tmp_path, "notes")
+    assert list(saved["stages"]) == ["project_description", "planning_questions", "planning_answers"]
+
+    # The rerun only runs the stages that were not checkpointed
+    calls = Counter()
+    assert run_cli(monkeypatch, tmp_path, make_manager(calls)) == 0
+    assert calls == Counter({"planning_summary": 2, "prd_document": 2})
+    assert len(outputs(tmp_path)) == 2
+    project = Project.model_validate_json((tmp_path / "out" / "notes.json").read_text(encoding="utf-8"))
+    assert project.project_description == saved["stages"]["project_description"]
+
+    # Finished ideas are skipped altogether
+    calls = Counter()
+    assert run_cli(monkeypatch, tmp_path, make_manager(calls)) == 0
+    assert calls == Counter()
+    assert "skipped (already done): 2" in capsys.readouterr().out
+
+
+def test_changed_idea_discards_its_checkpoint(monkeypatch: pytest.MonkeyPatch, tmp_path: Path,
+                                              ideas_file: Path) -> None:
+    assert run_cli(monkeypatch, tmp_path, make_manager(Counter(), fail_stage="planning_answers")) == 1
+    ideas_file.write_text(json.dumps({"id": "notes", "idea": "Inny pomysł"}, ensure_ascii=False), encoding="utf-8")
+    calls: Counter = Counter()
+    assert run_cli(monkeypatch, tmp_path, make_manager(calls)) == 0
+    assert calls == Counter({stage: 1 for stage in STAGE_METHODS})
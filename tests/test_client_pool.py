@@ -0,0 +1,55 @@
+"""Sharing of provider clients and their HTTP connection pools."""
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.client_pool import ClientPool
+
+
+def openai_model(name: str, base_url: str = "") -> ModelConfig:
+    return ModelConfig(name=name, provider="openai", api_key="sk-test", base_url=base_url or None)
+
+
+def test_same_config_gets_same_client() -> None:
+    pool = ClientPool()
+    try:
+        assert pool.get_client(openai_model("gpt-4o")) is pool.get_client(openai_model("gpt-4o"))
+        assert pool.get_client(openai_model("gpt-4o"), timeout=5) is not pool.get_client(openai_model("gpt-4o"))
+        assert len(pool) == 2
+    finally:
+        pool.close()
+
+
+def test_openai_clients_share_sync_and_async_connection_pools() -> None:
+    pool = ClientPool()
+    try:
+        first = pool.get_client(openai_model("gpt-4o"))
+        second = pool.get_client(openai_model("gpt-4o-mini"))
+        other_server = pool.get_client(openai_model("gpt-4o", base_url="http://localhost:9999/v1"))
+        assert first.http_client is second.http_client
+        assert first.http_async_client is second.http_async_client
+        assert first.http_async_client is not other_server.http_async_client
+    finally:
+        pool.close()
+
+
+def test_close_closes_shared_connection_pools() -> None:
+    pool = ClientPool()
+    client = pool.get_client(openai_model("gpt-4o"))
+    pool.close()
+    assert client.http_client.is_closed
+    assert client.http_async_client.is_closed
+    assert len(pool) == 0
+
+
+def test_ollama_clients_follow_the_app_config() -> None:
+    pool = ClientPool()
+    model = ModelConfig(name="llama3", provider="ollama")
+    local = AppConfig(models={}, fallback_chain=[], ollama_base_url="http://localhost:11434", ollama_keep_alive="5m")
+    remote = AppConfig(models={}, fallback_chain=[], ollama_base_url="http://gpu:11434", ollama_keep_alive=None)
+    try:
+        client = pool.get_client(model, app_config=local)
+        assert (client.base_url, client.keep_alive) == ("http://localhost:11434", "5m")
+        other = pool.get_client(model, app_config=remote)
+        assert (other.base_url, other.keep_alive) == ("http://gpu:11434", None)
+        assert pool.get_client(model, app_config=local) is client
+    finally:
+        pool.close()
@@ -0,0 +1,58 @@
+"""LLMManager behaviour with the deterministic fake provider."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+
+
+def make_manager(**settings: object) -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[], **settings))
+    key = manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1},
+    ))
+    manager.set_current_model(key)
+    return manager
+
+
+async def track_concurrency(limit_of: LLMManager, count: int, max_concurrency: int = 0) -> int:
+    running: List[int] = [0, 0]
+
+    async def job() -> None:
+        running[0] += 1
+        running[1] = max(running[1], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+
+    await limit_of.run_concurrently([job() for _ in range(count)], max_concurrency=max_concurrency or None)
+    return running[1]
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_run_concurrently_uses_the_managers_own_limit(limit: int) -> None:
+    manager = make_manager(llm_max_concurrency=limit)
+    assert asyncio.run(track_concurrency(manager, 10)) == limit
+
+
+def test_run_concurrently_explicit_limit_wins() -> None:
+    manager = make_manager(llm_max_concurrency=1)
+    assert asyncio.run(track_concurrency(manager, 10, max_concurrency=4)) == 4
+
+
+def test_run_concurrently_keeps_input_order_and_raises_first_error() -> None:
+    manager = make_manager()
+
+    async def value(delay: float, result: int) -> int:
+        await asyncio.sleep(delay)
+        return result
+
+    async def failing() -> int:
+        raise ValueError("boom")
+
+    assert asyncio.run(manager.run_concurrently([value(0.02, 1), value(0.0, 2), value(0.01, 3)])) == [1, 2, 3]
+    with pytest.raises(ValueError):
+        asyncio.run(manager.run_concurrently([value(0.05, 1), failing()]))
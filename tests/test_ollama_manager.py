@@ -0,0 +1,182 @@
+"""OllamaManager against a stub Ollama HTTP server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from src.prd_maker.core.ollama_manager import OllamaManager, keep_alive_seconds
+
+
+class StubOllama(ThreadingHTTPServer):
+    """Answers /api/tags with ``models`` and records /api/generate payloads."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.models: List[str] = []
+        self.tags_requests = 0
+        self.generate_payloads: List[Dict[str, Any]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubOllama
+
+    def do_GET(self) -> None:
+        if self.path != "/api/tags":
+            self.send_error(404)
+            return
+        self.server.tags_requests += 1
+        self._reply({"models": [{"name": name, "model": name} for name in self.server.models]})
+
+    def do_POST(self) -> None:
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.generate_payloads.append(json.loads(self.rfile.read(length)))
+        self._reply({"done": True})
+
+    def _reply(self, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[StubOllama]:
+    stub = StubOllama()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+def unused_url() -> str:
+    stub = StubOllama()
+    url = stub.url
+    stub.server_close()
+    return url
+
+
+def test_unreachable_server() -> None:
+    manager = OllamaManager(unused_url(), probe_timeout=0.5)
+    assert manager.has_model("llama3") is None
+    assert manager.probe() is False
+    assert manager.reachable is False
+    assert manager.has_model("llama3") is False
+
+
+def test_model_present_or_absent(server: StubOllama) -> None:
+    server.models = ["llama3:latest", "mistral:7b"]
+    manager = OllamaManager(server.url)
+    manager.probe_in_background()
+    manager.wait_for_probe(timeout=5)
+    assert manager.reachable is True
+    assert manager.has_model("llama3:latest") is True
+    # ":latest" may be left out, other tags may not
+    assert manager.has_model("llama3") is True
+    assert manager.has_model("mistral") is False
+    assert manager.has_model("phi3") is False
+
+
+def test_reprobe_after_probe_interval(server: StubOllama) -> None:
+    manager = OllamaManager(server.url, probe_interval=0.2)
+    assert manager.probe() is True
+    assert manager.has_model("llama3") is False
+
+    server.models = ["llama3"]
+    # Within the interval the cached list is used
+    assert manager.has_model("llama3") is False
+    assert server.tags_requests == 1
+
+    time.sleep(0.3)
+    manager.has_model("llama3")
+    manager.wait_for_probe(timeout=5)
+    assert server.tags_requests == 2
+    assert manager.has_model("llama3") is True
+
+
+def test_warm_up_sends_keep_alive(server: StubOllama) -> None:
+    manager = OllamaManager(server.url, keep_alive="30m")
+    assert manager.warm_up("llama3") is True
+    assert server.generate_payloads == [{"model": "llama3", "keep_alive": "30m"}]
+
+
+def test_warm_up_without_keep_alive(server: StubOllama) -> None:
+    manager = OllamaManager(server.url, keep_alive=None)
+    assert manager.warm_up("llama3") is True
+    assert server.generate_payloads == [{"model": "llama3"}]
+
+
+def test_warm_up_in_background_once_within_keep_alive(server: StubOllama) -> None:
+    manager = OllamaManager(server.url, keep_alive="30m")
+    manager.warm_up_in_background("llama3")
+    deadline = time.monotonic() + 5
+    while not server.generate_payloads and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Loaded within keep_alive: not sent again
+    time.sleep(0.1)
+    manager.warm_up_in_background("llama3")
+    time.sleep(0.1)
+    assert len(server.generate_payloads) == 1
+
+
+def test_warm_up_unreachable_server() -> None:
+    manager = OllamaManager(unused_url(), warm_up_timeout=0.5)
+    assert manager.warm_up("llama3") is False
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("30m", 1800.0),
+    ("1h", 3600.0),
+    ("45s", 45.0),
+    ("500ms", 0.5),
+    ("90", 90.0),
+    ("-1", float("inf")),
+    ("", 0.0),
+    (None, 0.0),
+    ("soon", 0.0),
+])
+def test_keep_alive_seconds(value: Any, seconds: float) -> None:
+    assert keep_alive_seconds(value) == seconds
+
+
+def test_cold_start_waits_for_first_probe(server: StubOllama) -> None:
+    from src.prd_maker.config.settings import AppConfig, ModelConfig
+    from src.prd_maker.core.llm_manager import LLMManager
+
+    server.models = ["llama3"]
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]))
+    present = manager.register_model(ModelConfig(name="llama3", provider="ollama", base_url=server.url))
+    absent = manager.register_model(ModelConfig(name="phi3", provider="ollama", base_url=server.url))
+    assert manager.list_models() == [present]
+    assert absent not in manager.list_models()
+
+
+def test_manager_uses_its_own_ollama_settings(server: StubOllama) -> None:
+    from src.prd_maker.config.settings import AppConfig, ModelConfig
+    from src.prd_maker.core.llm_manager import LLMManager
+
+    server.models = ["llama3"]
+    app_config = AppConfig(models={}, fallback_chain=[], ollama_base_url=server.url, ollama_keep_alive="5m")
+    manager = LLMManager(app_config=app_config)
+    key = manager.register_model(ModelConfig(name="llama3", provider="ollama"))
+    ollama = manager._ollama(manager._registry[key])
+    assert (ollama.base_url, ollama.keep_alive) == (server.url, "5m")
+    client = manager._get_client(key)
+    assert (client.base_url, client.keep_alive) == (server.url, "5m")
+    assert manager.list_models() == [key]
@@ -0,0 +1,123 @@
+"""Regenerating only the PRD sections affected by a planning summary edit."""
+
+from typing import Dict, List
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.chunking import split_sections
+from src.prd_maker.core.fake_provider import FakeChatModel
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.prd_diff import REGENERABLE_FIELDS, affected_prd_fields, splice_prd_sections
+from src.prd_maker.core.prd_parser import parse_prd, section_field
+from src.prd_maker.core.telemetry import Telemetry
+
+SUMMARY = FakeChatModel._summary(1)
+PRD = FakeChatModel(seed=1, story_count=3)._prd(1)
+
+
+def edit(text: str, old: str, new: str) -> str:
+    assert old in text
+    return text.replace(old, new, 1)
+
+
+def prd_sections(markdown: str) -> Dict[str, str]:
+    """Section texts keyed by field (or heading for unmapped ones)."""
+    sections = {}
+    for section in split_sections(markdown, level=2):
+        heading = section.lstrip("\n").split("\n", 1)[0].lstrip("# ").strip()
+        sections[section_field(heading) or heading] = section
+    return sections
+
+
+def make_manager() -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]), telemetry=Telemetry())
+    manager.set_current_model(manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 2, "story_count": 3},
+    )))
+    return manager
+
+
+@pytest.mark.parametrize("edited", [
+    SUMMARY + "\n\n\n",
+    SUMMARY.replace("\n", "  \n"),
+    SUMMARY.replace("\n\n", "\n\n\n"),
+    SUMMARY.replace("\n", "\r\n"),
+    SUMMARY.replace("## Decyzje podjęte podczas sesji", "##  Decyzje podjęte podczas sesji "),
+])
+def test_whitespace_only_edits_affect_nothing(edited: str) -> None:
+    assert affected_prd_fields(SUMMARY, edited) == []
+
+
+@pytest.mark.parametrize("old, new, fields", [
+    ("3. Pierwsza wersja", "3. Druga wersja",
+     ["product_overview", "functional_requirements", "product_boundaries", "user_stories"]),
+    ("- Wyszukiwanie i filtrowanie wpisów", "- Wyszukiwanie wpisów",
+     ["functional_requirements", "product_boundaries", "user_stories"]),
+    ("aby nie tracić czasu", "aby oszczędzać czas", ["user_problem", "user_stories"]),
+    ("poniżej 30 sekund", "poniżej 20 sekund", ["success_metrics"]),
+    ("Zespół dwóch programistów", "Zespół trzech programistów", ["product_boundaries"]),
+    ("Model monetyzacji", "Cennik", ["product_boundaries"]),
+])
+def test_summary_sections_map_to_their_prd_fields(old: str, new: str, fields: List[str]) -> None:
+    assert affected_prd_fields(SUMMARY, edit(SUMMARY, old, new)) == fields
+
+
+def test_unknown_or_added_sections_affect_the_whole_prd() -> None:
+    assert affected_prd_fields(SUMMARY, SUMMARY + "\n\n## Ryzyka\n- Brak budżetu") == REGENERABLE_FIELDS
+    assert affected_prd_fields("Wstęp\n" + SUMMARY, SUMMARY) == REGENERABLE_FIELDS
+
+
+def test_splice_leaves_other_sections_byte_identical() -> None:
+    edited = edit(PRD, "Główną wartością jest", "Ręcznie dopisane zdanie. Główną wartością jest")
+    spliced = splice_prd_sections(edited, {"success_metrics": "- Nowa metryka", "user_problem": "Nowy problem."})
+    before, after = prd_sections(edited), prd_sections(spliced)
+    assert list(after) == list(before)
+    for field in before:
+        if field in ("success_metrics", "user_problem"):
+            assert after[field] != before[field]
+        else:
+            assert after[field] == before[field], field
+    assert after["success_metrics"] == "## 6. Metryki sukcesu\n\n- Nowa metryka\n\n"
+    assert spliced.startswith(edited[:edited.index("## 2.")])
+
+
+def test_splice_inserts_missing_sections_in_document_order() -> None:
+    document = "# PRD\n\n## 1. Przegląd produktu\nOpis\n## 6. Metryki sukcesu\n- M"
+    spliced = splice_prd_sections(document, {"user_problem": "Problem", "product_boundaries": "Granice"})
+    headings = [section.split("\n", 1)[0] for section in split_sections(spliced)]
+    assert headings == ["# PRD", "## 1. Przegląd produktu", "## Problem użytkownika",
+                        "## Granice produktu", "## 6. Metryki sukcesu"]
+    assert "Opis\n\n## Problem użytkownika\n\nProblem\n\n" in spliced
+
+
+def test_partial_regeneration_keeps_unaffected_sections_and_manual_edits() -> None:
+    manager = make_manager()
+    prd = edit(PRD, "Główną wartością jest", "Ręczna poprawka. Główną wartością jest")
+    new_summary = edit(SUMMARY, "poniżej 30 sekund", "poniżej 20 sekund")
+
+    updated, fields = manager.update_prd_document(prd, SUMMARY, new_summary, use_cache=False)
+
+    assert fields == ["success_metrics"]
+    before, after = prd_sections(prd), prd_sections(updated)
+    assert list(after) == list(before)
+    assert all(after[field] == before[field] for field in before if field != "success_metrics")
+    assert "Ręczna poprawka." in updated
+    assert after["success_metrics"].startswith("## 6. Metryki sukcesu\n\n- Retencja tygodniowa")
+
+
+def test_regenerated_user_stories_replace_the_old_ones() -> None:
+    manager = make_manager()
+    new_summary = edit(SUMMARY, "aby nie tracić czasu", "aby oszczędzać czas")
+    updated, fields = manager.update_prd_document(PRD, SUMMARY, new_summary, use_cache=False)
+    assert fields == ["user_problem", "user_stories"]
+    stories = parse_prd(updated).user_stories
+    assert stories and [story.id for story in stories] == [f"US-{i:03d}" for i in range(1, len(stories) + 1)]
+    assert prd_sections(updated)["functional_requirements"] == prd_sections(PRD)["functional_requirements"]
+
+
+def test_nothing_is_generated_without_affected_fields() -> None:
+    manager = make_manager()
+    assert manager.update_prd_document(PRD, SUMMARY, SUMMARY + "\n") == (PRD, [])
+    assert manager.telemetry.latency_stats("fake_fake") is None
@@ -0,0 +1,172 @@
+"""Incremental parsing of streamed PRD markdown into a PRDDocument."""
+
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.prd_parser import IncrementalPRDParser, parse_prd, section_field
+from src.prd_maker.models.prd import PRDDocument
+
+PRD = """# PRD - Planer podróży
+
+## 1. Przegląd produktu
+Aplikacja pomaga planować **podróże**.
+
+Drugi akapit przeglądu.
+
+## **2. Problem użytkownika**
+Planowanie jest czasochłonne.
+
+## 3. Wymagania funkcjonalne
+- Tworzenie planu
+- Udostępnianie planu
+
+```markdown
+## 4. To nie jest nagłówek
+```
+
+## 4. Granice produktu
+Bez rezerwacji biletów.
+
+## 5. Historyjki użytkowników
+### US-001: Utworzenie planu
+**Tytuł**: Utworzenie planu
+**Opis**: Jako podróżnik chcę utworzyć plan,
+aby mieć wszystko w jednym miejscu.
+**Kryteria akceptacji**:
+- Plan ma nazwę
+- Plan ma daty
+
+- ID: US-002
+- Tytuł: Udostępnienie planu
+- Opis: Jako podróżnik chcę udostępnić plan.
+- Kryteria akceptacji:
+  - Link działa bez logowania
+
+## 6. Metryki sukcesu
+80% planów ma co najmniej jeden punkt.
+
+## 7. Uwagi techniczne
+Aplikacja mobilna.
+
+## 8. Inne
+Ta sekcja nie ma pola.
+
+## Założenia
+- Użytkownicy mają smartfony
+- Dostęp do internetu
+
+## Ograniczenia
+1. Budżet
+2. Czas"""
+
+
+def dump(document: PRDDocument) -> Dict[str, Any]:
+    return document.model_dump(exclude={"created_at", "updated_at", "version"})
+
+
+def parse_chunks(chunks: Iterable[str]) -> PRDDocument:
+    parser = IncrementalPRDParser()
+    for _ in parser.consume(chunks):
+        pass
+    return parser.document
+
+
+def split(text: str, positions: List[int]) -> List[str]:
+    bounds = [0, *sorted(positions), len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def test_parse_full_document() -> None:
+    document = parse_prd(PRD)
+    assert document.title == "PRD - Planer podróży"
+    assert document.product_overview == "Aplikacja pomaga planować **podróże**.\n\nDrugi akapit przeglądu."
+    assert document.user_problem == "Planowanie jest czasochłonne."
+    # The heading inside the code block stays in the section
+    assert "## 4. To nie jest nagłówek" in document.functional_requirements
+    assert document.product_boundaries == "Bez rezerwacji biletów."
+    assert [story.id for story in document.user_stories] == ["US-001", "US-002"]
+    first, second = document.user_stories
+    assert first.description == "Jako podróżnik chcę utworzyć plan, aby mieć wszystko w jednym miejscu."
+    assert first.acceptance_criteria == ["Plan ma nazwę", "Plan ma daty"]
+    assert second.title == "Udostępnienie planu"
+    assert second.acceptance_criteria == ["Link działa bez logowania"]
+    assert document.success_metrics == "80% planów ma co najmniej jeden punkt."
+    assert document.technical_considerations == "Aplikacja mobilna."
+    assert document.assumptions == ["Użytkownicy mają smartfony", "Dostęp do internetu"]
+    # The last line has no newline
+    assert document.constraints == ["Budżet", "Czas"]
+
+
+@pytest.mark.parametrize("marker", [
+    "## 5. Histor",       # mid-heading
+    "## 1",               # mid-heading number
+    "### US-0",           # story header
+    "### US-001: Utwo",   # story title
+    "**Opis**: Jako",     # mid-line field
+    "- ID: US-00",        # story id line
+    "## Ogranicz",        # last heading
+    "1. Bud",             # trailing partial line
+])
+def test_chunk_split_inside_a_line(marker: str) -> None:
+    position = PRD.index(marker) + len(marker)
+    assert dump(parse_chunks(split(PRD, [position]))) == dump(parse_prd(PRD))
+
+
+def test_every_two_chunk_split() -> None:
+    expected = dump(parse_prd(PRD))
+    for position in range(len(PRD) + 1):
+        assert dump(parse_chunks(split(PRD, [position]))) == expected, position
+
+
+def test_random_and_single_character_chunks() -> None:
+    expected = dump(parse_prd(PRD))
+    rng = random.Random(2)
+    for _ in range(50):
+        positions = rng.sample(range(1, len(PRD)), rng.randrange(1, 60))
+        assert dump(parse_chunks(split(PRD, positions))) == expected
+    assert dump(parse_chunks(iter(PRD))) == expected
+
+
+def test_snapshot_shows_the_section_being_written() -> None:
+    parser = IncrementalPRDParser()
+    parser.feed("# T\n## 1. Przegląd produktu\nPierwsza linia\nDruga ")
+    assert parser.snapshot().product_overview == "Pierwsza linia"
+    parser.feed("linia\n## 2. Problem")
+    assert parser.snapshot().product_overview == "Pierwsza linia\nDruga linia"
+    assert parser.close().user_problem == ""
+    assert parser.sections == ["1. Przegląd produktu", "2. Problem"]
+
+
+def test_round_trip_through_markdown() -> None:
+    document = parse_prd(PRD)
+    assert dump(parse_prd(document.to_markdown())) == dump(document)
+    streamed = parse_chunks(split(document.to_markdown(), [100, 333, 777]))
+    assert streamed.to_markdown() == document.to_markdown()
+
+
+@pytest.mark.parametrize("heading, field", [
+    ("1. Przegląd produktu", "product_overview"),
+    ("**5. Historyjki użytkowników**", "user_stories"),
+    ("V) User Stories", "user_stories"),
+    ("Technical considerations", "technical_considerations"),
+    ("9. Inne", None),
+])
+def test_section_field(heading: str, field: Optional[str]) -> None:
+    assert section_field(heading) == field
+
+
+def test_streamed_fake_prd_matches_the_full_parse() -> None:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]))
+    manager.set_current_model(manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1, "story_count": 12},
+    )))
+    parser = IncrementalPRDParser()
+    text = "".join(parser.consume(manager.stream_prd_document("Podsumowanie planowania", use_cache=False)))
+    assert dump(parser.document) == dump(parse_prd(text))
+    assert [story.id for story in parser.document.user_stories] == [f"US-{i:03d}" for i in range(1, 13)]
+    assert all(story.acceptance_criteria for story in parser.document.user_stories)
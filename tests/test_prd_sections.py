@@ -0,0 +1,102 @@
+"""Concurrent section-wise PRD generation with the fake provider."""
+
+import asyncio
+import re
+import time
+from typing import Any, List, Optional
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.prd_parser import parse_prd
+from src.prd_maker.core.prd_sections import PRD_SECTIONS, STORY_BATCHES
+from src.prd_maker.core.telemetry import Telemetry
+
+STORY_COUNT = 9
+
+
+def make_manager() -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]), telemetry=Telemetry())
+    manager.set_current_model(manager.register_model(ModelConfig(
+        name="fake", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 3, "story_count": STORY_COUNT},
+    )))
+    return manager
+
+
+def request_label(prompt: str) -> str:
+    section = re.search(r'Napisz sekcję PRD "([^"]+)"', prompt)
+    if section:
+        return section.group(1)
+    return re.search(r"US-\d+", prompt).group(0)
+
+
+def test_sections_are_assembled_in_document_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = make_manager()
+    generate = manager.agenerate_text
+    finished: List[str] = []
+    labels = [section.heading for section in PRD_SECTIONS] + [f"US-{batch.first_number:03d}" for batch in STORY_BATCHES]
+
+    async def reversed_completion(prompt: str, system_message: Optional[str] = None, **kwargs: Any) -> str:
+        label = request_label(prompt)
+        # The first requests finish last
+        await asyncio.sleep(0.02 * (len(labels) - labels.index(label)))
+        text = await generate(prompt, system_message, **kwargs)
+        finished.append(label)
+        return text
+
+    monkeypatch.setattr(manager, "agenerate_text", reversed_completion)
+    document = manager.generate_prd_sections("Podsumowanie planowania", "PRD - Test", use_cache=False)
+
+    assert finished == labels[::-1]
+    assert document.title == "PRD - Test"
+    assert document.product_overview.startswith("Produkt to aplikacja webowa")
+    assert document.user_problem.startswith("Użytkownicy tracą czas")
+    assert document.functional_requirements.startswith("1. System umożliwia")
+    assert document.product_boundaries.startswith("W zakresie MVP")
+    assert document.success_metrics.startswith("- Retencja tygodniowa")
+    markdown = document.to_markdown()
+    positions = [markdown.index(heading) for heading in
+                 ["Przegląd produktu", "Problem użytkownika", "Wymagania funkcjonalne",
+                  "Granice produktu", "Historyjki użytkowników", "Metryki sukcesu"]]
+    assert positions == sorted(positions)
+
+
+def test_stories_are_renumbered_across_batches() -> None:
+    manager = make_manager()
+    document = manager.generate_prd_sections("Podsumowanie planowania", "PRD", use_cache=False)
+    per_batch = max(1, STORY_COUNT // 3)
+    assert [story.id for story in document.user_stories] == [
+        f"US-{number:03d}" for number in range(1, per_batch * len(STORY_BATCHES) + 1)
+    ]
+    assert all(story.description and story.acceptance_criteria for story in document.user_stories)
+    # The assembled markdown parses back to the same stories
+    assert [story.id for story in parse_prd(document.to_markdown()).user_stories] == \
+        [story.id for story in document.user_stories]
+
+
+def test_failing_section_propagates_and_cancels_the_rest(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = make_manager()
+    generate = manager.agenerate_text
+    cancelled: List[str] = []
+
+    async def failing(prompt: str, system_message: Optional[str] = None, **kwargs: Any) -> str:
+        label = request_label(prompt)
+        if label == "Metryki sukcesu":
+            raise ValueError("section failed")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(label)
+            raise
+        return await generate(prompt, system_message, **kwargs)
+
+    monkeypatch.setattr(manager, "agenerate_text", failing)
+    with pytest.raises(ValueError, match="section failed"):
+        manager.generate_prd_sections("Podsumowanie planowania", "PRD", use_cache=False)
+    # The other requests are cancelled on the runner's loop, not left running
+    deadline = time.monotonic() + 2
+    while len(cancelled) < len(PRD_SECTIONS) - 1 + len(STORY_BATCHES) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(cancelled) == len(PRD_SECTIONS) - 1 + len(STORY_BATCHES)
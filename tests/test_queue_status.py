@@ -0,0 +1,55 @@
+"""The queue position shown while a generation waits for a rate limited model."""
+
+import threading
+from typing import List, Tuple
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.cancellation import CancellationToken, cancellation_scope
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.rate_limiter import queue_listener
+from src.prd_maker.ui import steps
+
+
+class Placeholder:
+    def __init__(self) -> None:
+        self.calls: List[Tuple[str, str, threading.Thread]] = []
+
+    def info(self, text: str) -> None:
+        self.calls.append(("info", text, threading.current_thread()))
+
+    def empty(self) -> None:
+        self.calls.append(("empty", "", threading.current_thread()))
+
+
+def make_manager() -> Tuple[LLMManager, str]:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]))
+    key = manager.register_model(ModelConfig(
+        name="queued", provider="fake", max_in_flight=1,
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1},
+    ))
+    manager.set_current_model(key)
+    return manager, key
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_queued_call_on_the_async_runner_updates_the_placeholder(streamed: bool) -> None:
+    manager, key = make_manager()
+    busy = manager.client_pool.get_limiter(key, manager.get_rate_limit(key)).acquire(0)
+    threading.Timer(0.5, busy.release).start()
+
+    status = steps._QueueStatus()
+    placeholder = status.placeholder = Placeholder()
+    with queue_listener(status), cancellation_scope(CancellationToken()):
+        if streamed:
+            text = "".join(manager.generate_text_stream("Describe the project", use_cache=False))
+        else:
+            text = manager.generate_text("Describe the project", use_cache=False)
+
+    assert text
+    kinds = [kind for kind, _, _ in placeholder.calls]
+    assert kinds == ["info", "empty"]
+    assert "position 1" in placeholder.calls[0][1]
+    # Drawn by the waiting (script) thread, not the async runner's
+    assert all(thread is threading.current_thread() for _, _, thread in placeholder.calls)
@@ -0,0 +1,168 @@
+"""Shared per-model rate limiting: buckets, in-flight cap, FIFO queue."""
+
+import asyncio
+import threading
+import time
+from typing import Callable, List
+
+import pytest
+
+from src.prd_maker.core.cancellation import CancellationToken, GenerationCancelled, cancellation_scope
+from src.prd_maker.core.rate_limiter import RateLimit, RateLimiter, TokenBucket, queue_listener
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_token_bucket_refills_at_its_rate() -> None:
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)
+    assert bucket.capacity == 10
+    assert bucket.wait_time(10) == 0
+    bucket.take(10)
+    assert bucket.wait_time(1) == pytest.approx(0.1, abs=0.02)
+    # A request larger than the bucket only waits for a full bucket
+    assert bucket.wait_time(1000) == pytest.approx(1.0, abs=0.02)
+
+
+def test_token_bucket_debt_delays_later_calls() -> None:
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)
+    bucket.take(15)
+    assert bucket.wait_time(1) == pytest.approx(0.6, abs=0.02)
+    bucket.refund(100)
+    assert bucket.level == bucket.capacity
+
+
+def test_unlimited() -> None:
+    assert RateLimit().unlimited
+    assert not RateLimit(max_in_flight=1).unlimited
+
+
+def test_in_flight_cap_blocks_until_release() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=2))
+    first, second = limiter.acquire(), limiter.acquire()
+    admitted = threading.Event()
+
+    def third() -> None:
+        with limiter.acquire():
+            admitted.set()
+
+    thread = threading.Thread(target=third)
+    thread.start()
+    wait_until(lambda: limiter.queue_length == 1)
+    assert not admitted.wait(0.2)
+    first.release()
+    assert admitted.wait(5)
+    thread.join(5)
+    second.release()
+    assert limiter.in_flight == 0
+
+
+def test_waiters_are_admitted_in_arrival_order() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=1))
+    holder = limiter.acquire()
+    order: List[int] = []
+
+    def waiter(index: int) -> None:
+        with limiter.acquire():
+            order.append(index)
+
+    threads = []
+    for index in range(5):
+        thread = threading.Thread(target=waiter, args=(index,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.queue_length == index + 1)
+    holder.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_requests_per_minute_spreads_calls() -> None:
+    limiter = RateLimiter(RateLimit(requests_per_minute=600, burst_seconds=0.1))
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire().release()
+    # One call per 0.1 s after the first
+    assert time.monotonic() - started >= 0.18
+
+
+def test_tokens_are_settled_with_reported_usage() -> None:
+    limiter = RateLimiter(RateLimit(tokens_per_minute=6000, burst_seconds=1))
+    permit = limiter.acquire(tokens=50)
+    permit.release(used_tokens=80)
+    assert limiter.tokens.level == pytest.approx(20, abs=1)
+    limiter.acquire(tokens=10).release(used_tokens=2)
+    assert limiter.tokens.level == pytest.approx(18, abs=1)
+
+
+def test_release_is_idempotent() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=1))
+    permit = limiter.acquire()
+    permit.release()
+    permit.release()
+    assert limiter.in_flight == 0
+
+
+def test_queue_positions_are_reported() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=1))
+    holder = limiter.acquire()
+    positions: List[int] = []
+
+    def waiter() -> None:
+        with queue_listener(positions.append), limiter.acquire():
+            pass
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_until(lambda: positions == [1])
+    holder.release()
+    thread.join(5)
+    assert positions == [1, 0]
+
+
+def test_cancelled_waiter_leaves_the_queue() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=1))
+    holder = limiter.acquire()
+    token = CancellationToken()
+    errors: List[BaseException] = []
+
+    def waiter() -> None:
+        try:
+            with cancellation_scope(token):
+                limiter.acquire()
+        except GenerationCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_until(lambda: limiter.queue_length == 1)
+    token.cancel()
+    thread.join(5)
+    assert len(errors) == 1
+    assert limiter.queue_length == 0
+    holder.release()
+    limiter.acquire().release()
+
+
+def test_async_and_sync_callers_share_the_limit() -> None:
+    limiter = RateLimiter(RateLimit(max_in_flight=1))
+    holder = limiter.acquire()
+
+    async def acquire_async() -> float:
+        permit = await limiter.aacquire()
+        permit.release()
+        return permit.waited
+
+    result: List[float] = []
+    thread = threading.Thread(target=lambda: result.append(asyncio.run(acquire_async())))
+    thread.start()
+    wait_until(lambda: limiter.queue_length == 1)
+    time.sleep(0.1)
+    holder.release()
+    thread.join(5)
+    assert result and result[0] >= 0.1
@@ -0,0 +1,183 @@
+"""Retries, the circuit breaker and model fallback."""
+
+import asyncio
+import time
+from typing import Any, Callable, List
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.fake_provider import FakeProviderError
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResiliencePolicy,
+    acall_with_retry,
+    call_with_retry,
+    is_retryable,
+)
+
+NO_BACKOFF = ResiliencePolicy(max_retries=2, backoff_base=0.0, backoff_max=0.0)
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+
+def failing(times: int, error: Exception, calls: List[int]) -> Callable[[], str]:
+    def func() -> str:
+        calls.append(1)
+        if len(calls) <= times:
+            raise error
+        return "ok"
+    return func
+
+
+def test_breaker_opens_after_threshold_and_recovers_through_one_trial() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # Only a single trial call is let through while half-open
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_breaker() -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count() -> None:
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (TimeoutError(), True),
+    (ConnectionError(), True),
+    (HTTPError(429), True),
+    (HTTPError(503), True),
+    (HTTPError(400), False),
+    (HTTPError(401), False),
+    (type("RateLimitError", (Exception,), {})(), True),
+    (ValueError("bad prompt"), False),
+])
+def test_is_retryable(error: Exception, retryable: bool) -> None:
+    assert is_retryable(error) is retryable
+
+
+def test_retries_transient_errors_until_success() -> None:
+    calls: List[int] = []
+    delays: List[float] = []
+    result = call_with_retry(failing(2, HTTPError(503), calls), NO_BACKOFF, sleep=delays.append)
+    assert result == "ok"
+    assert len(calls) == 3
+    assert len(delays) == 2
+
+
+def test_gives_up_after_max_retries() -> None:
+    calls: List[int] = []
+    with pytest.raises(HTTPError):
+        call_with_retry(failing(10, HTTPError(503), calls), NO_BACKOFF, sleep=lambda _: None)
+    assert len(calls) == NO_BACKOFF.max_retries + 1
+
+
+def test_does_not_retry_permanent_errors() -> None:
+    calls: List[int] = []
+    with pytest.raises(HTTPError):
+        call_with_retry(failing(1, HTTPError(400), calls), NO_BACKOFF, sleep=lambda _: None)
+    assert len(calls) == 1
+
+
+def test_open_breaker_stops_retries() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    calls: List[int] = []
+    with pytest.raises(HTTPError):
+        call_with_retry(failing(10, HTTPError(503), calls), NO_BACKOFF, breaker, sleep=lambda _: None)
+    assert len(calls) == 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_async_retry() -> None:
+    calls: List[int] = []
+    breaker = CircuitBreaker(failure_threshold=5)
+
+    async def func() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError()
+        return "ok"
+
+    assert asyncio.run(acall_with_retry(func, NO_BACKOFF, breaker)) == "ok"
+    assert len(calls) == 3
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_backoff_is_capped() -> None:
+    policy = ResiliencePolicy(backoff_base=1.0, backoff_max=2.0)
+    assert all(0 <= policy.backoff_delay(attempt) <= 2.0 for attempt in range(10))
+
+
+def make_manager(**settings: Any) -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(
+        models={}, fallback_chain=[], retry_backoff_base=0.0, retry_backoff_max=0.0, **settings
+    ))
+    broken = manager.register_model(ModelConfig(
+        name="broken", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "error_rate": 1.0},
+    ))
+    healthy = manager.register_model(ModelConfig(
+        name="healthy", provider="fake",
+        model_params={"time_to_first_token": 0, "tokens_per_second": 0, "seed": 1},
+    ))
+    manager.fallback_chain = [broken, healthy]
+    manager.set_current_model(broken)
+    return manager
+
+
+def test_manager_falls_back_when_the_current_model_fails() -> None:
+    manager = make_manager(max_retries=1, circuit_failure_threshold=10)
+    assert manager.generate_text("Describe the project", use_cache=False)
+    assert manager.last_model_used == "fake_healthy"
+    assert manager.is_model_healthy("fake_broken")
+
+
+def test_manager_skips_a_model_with_an_open_breaker() -> None:
+    manager = make_manager(max_retries=0, circuit_failure_threshold=1, circuit_reset_seconds=60)
+    manager.generate_text("first", use_cache=False)
+    assert not manager.is_model_healthy("fake_broken")
+
+    manager._get_client("fake_broken").error_rate = 0.0
+    manager.generate_text("second", use_cache=False)
+    # The breaker is still open, so the recovered model is not tried yet
+    assert manager.last_model_used == "fake_healthy"
+
+
+def test_manager_raises_when_every_model_fails() -> None:
+    manager = make_manager(max_retries=0, circuit_failure_threshold=1, circuit_reset_seconds=60)
+    manager.fallback_chain = ["fake_broken"]
+    with pytest.raises(FakeProviderError):
+        manager.generate_text("first", use_cache=False)
+    with pytest.raises(CircuitOpenError):
+        manager.generate_text("second", use_cache=False)
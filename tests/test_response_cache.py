@@ -0,0 +1,116 @@
+"""Two-tier response cache: hits, expiry, eviction and concurrent writes."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.prd_maker.core.response_cache import ResponseCache
+
+
+def disk_files(cache_dir: Path) -> int:
+    return len(list(cache_dir.glob("*.json")))
+
+
+def test_memory_and_disk_hits(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path))
+    key = ResponseCache.make_key("model", "system", "prompt", {"temperature": 0.7})
+    assert cache.get(key) is None
+    cache.set(key, "answer")
+    assert cache.get(key) == "answer"
+    assert cache.stats.memory_hits == 1
+
+    # A new process only has the disk tier
+    restarted = ResponseCache(disk_dir=str(tmp_path))
+    assert restarted.get(key) == "answer"
+    assert restarted.stats.disk_hits == 1
+
+
+def test_key_depends_on_every_input() -> None:
+    key = ResponseCache.make_key("model", "system", "prompt", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("other", "system", "prompt", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("model", "", "prompt", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("model", "system", "prompt!", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("model", "system", "prompt", {"temperature": 0.2})
+
+
+def test_expired_entries_are_dropped(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path), ttl_seconds=-1)
+    cache.set("k", "v")
+    assert cache.get("k") is None
+    assert disk_files(tmp_path) == 0
+
+
+def test_memory_tier_is_lru(tmp_path: Path) -> None:
+    cache = ResponseCache(max_memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+
+def test_disk_tier_keeps_its_limit(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path), max_memory_entries=1, max_disk_entries=5)
+    for i in range(12):
+        cache.set(f"key{i}", str(i))
+    assert disk_files(tmp_path) == cache._disk_count <= 5
+
+
+def test_concurrent_writes_keep_disk_count_exact(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path), max_disk_entries=40)
+    barrier = threading.Barrier(8)
+
+    def write(worker: int) -> None:
+        barrier.wait()
+        for i in range(60):
+            # Overlapping keys: several threads create the same file at once
+            cache.set(f"key{(worker * 7 + i) % 50}", str(i))
+            cache.get(f"key{i % 50}")
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache._disk_count == disk_files(tmp_path)
+    assert cache._disk_count <= 40
+
+
+def test_clear(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path))
+    cache.set("a", "1")
+    cache.clear()
+    assert cache.get("a") is None
+    assert disk_files(tmp_path) == cache._disk_count == 0
+
+
+def test_disk_tier_prunes_to_its_low_water_mark(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path), max_memory_entries=1, max_disk_entries=20)
+    scans = []
+    prune = cache._prune_disk
+    monkeypatch.setattr(cache, "_prune_disk", lambda: scans.append(1) or prune())
+    for i in range(21):
+        cache.set(f"key{i}", str(i))
+    assert len(scans) == 1
+    assert disk_files(tmp_path) == cache._disk_count == 18
+    assert cache.stats.evictions == 3 + 20
+
+    # The next writes fill the headroom without scanning the directory again
+    for i in range(21, 23):
+        cache.set(f"key{i}", str(i))
+    assert len(scans) == 1
+    assert cache.get("key0") is None
+    assert cache.get("key22") == "22"
+
+
+def test_disk_work_does_not_block_memory_reads(tmp_path: Path) -> None:
+    cache = ResponseCache(disk_dir=str(tmp_path))
+    cache.set("a", "1")
+    results = []
+    with cache._disk_lock:
+        reader = threading.Thread(target=lambda: results.append(cache.get("a")))
+        reader.start()
+        reader.join(timeout=2)
+    assert results == ["1"]
@@ -0,0 +1,208 @@
+"""Revision history: line deltas, snapshots and rebuilding old texts."""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pytest
+
+from src.prd_maker.core.revisions import (
+    DELTA,
+    SNAPSHOT,
+    VERSIONED_FIELDS,
+    RevisionLog,
+    apply_delta,
+    rebuild_text,
+    text_delta,
+)
+from src.prd_maker.core.storage_backends import SQLiteBackend
+from src.prd_maker.models.project import Project
+
+WORDS = ["Goal", "User story", "- item", "## Section", "", "Acceptance criteria", "Łódź"]
+
+
+def random_document(rng: random.Random, lines: int) -> str:
+    text = "".join(f"{rng.choice(WORDS)} {rng.randrange(100)}\n" for _ in range(lines))
+    # Some documents do not end with a newline
+    return text.rstrip("\n") if rng.random() < 0.3 else text
+
+
+def random_edit(rng: random.Random, text: str) -> str:
+    lines = text.splitlines(keepends=True)
+    for _ in range(rng.randrange(1, 4)):
+        position = rng.randrange(len(lines) + 1)
+        action = rng.choice(["insert", "delete", "replace"])
+        if action == "insert" or not lines:
+            lines.insert(position, f"inserted {rng.randrange(1000)}\n")
+        elif action == "delete":
+            del lines[min(position, len(lines) - 1)]
+        else:
+            lines[min(position, len(lines) - 1)] = f"replaced {rng.randrange(1000)}\n"
+    return "".join(lines)
+
+
+def write_prd(log: RevisionLog, project: Project, text: str) -> int:
+    project.prd_document = text
+    number = log.record(project, ["prd_document"])
+    assert number is not None
+    return number
+
+
+@pytest.fixture
+def backend(tmp_path: Path) -> Iterator[SQLiteBackend]:
+    backend = SQLiteBackend(str(tmp_path / "projects.db"))
+    yield backend
+    backend.close()
+
+
+@pytest.mark.parametrize("old, new", [
+    ("", ""),
+    ("", "a\nb\n"),
+    ("a\nb\n", ""),
+    ("a\nb\nc\n", "a\nB\nc\n"),
+    ("a\nb\nc", "x\na\nb\nc\ny"),
+    ("same\n", "same"),
+])
+def test_delta_round_trip(old: str, new: str) -> None:
+    assert apply_delta(old, text_delta(old, new)) == new
+
+
+def test_delta_round_trip_random_edits() -> None:
+    rng = random.Random(3)
+    for _ in range(300):
+        old = random_document(rng, rng.randrange(0, 30))
+        new = random_edit(rng, old)
+        assert apply_delta(old, json.loads(json.dumps(text_delta(old, new)))) == new
+
+
+def test_delta_of_a_local_edit_is_small() -> None:
+    old = "".join(f"line {i}\n" for i in range(1000))
+    new = old.replace("line 500\n", "line five hundred\n")
+    assert text_delta(old, new) == [[500, 501, "line five hundred\n"]]
+    assert text_delta(old, old) == []
+
+
+def test_rebuild_text_applies_deltas_to_the_snapshot() -> None:
+    texts = ["a\nb\n", "a\nB\n", "a\nB\nc\n"]
+    chain = [(SNAPSHOT, texts[0])] + [
+        (DELTA, json.dumps(text_delta(old, new))) for old, new in zip(texts, texts[1:])
+    ]
+    assert rebuild_text(chain) == texts[-1]
+    assert rebuild_text([]) == ""
+
+
+def test_record_appends_only_changed_fields(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend)
+    project = Project(id="p1", project_idea="An idea", prd_document="# PRD\n")
+    assert log.record(project) == 1
+    assert log.record(project) is None
+
+    project.planning_summary = "Summary"
+    assert log.record(project) == 2
+    revisions = log.revisions("p1")
+    assert [revision.number for revision in revisions] == [1, 2]
+    assert sorted(revisions[0].fields) == ["prd_document", "project_idea"]
+    assert revisions[1].fields == ["planning_summary"]
+
+
+def test_every_revision_rebuilds_to_its_texts(backend: SQLiteBackend) -> None:
+    rng = random.Random(11)
+    log = RevisionLog(backend, snapshot_interval=4)
+    project = Project(id="p1")
+    history: Dict[int, str] = {}
+    text = random_document(rng, 200)
+    for _ in range(30):
+        history[write_prd(log, project, text)] = text
+        text = random_edit(rng, text)
+
+    for number, expected in history.items():
+        assert log.texts_at("p1", number)["prd_document"] == expected
+    # A fresh log (e.g. after a restart) reads the same history back
+    reopened = RevisionLog(backend, snapshot_interval=4)
+    for number, expected in history.items():
+        assert reopened.texts_at("p1", number)["prd_document"] == expected
+
+
+def test_edits_are_stored_as_deltas_with_periodic_snapshots(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend, snapshot_interval=4)
+    project = Project(id="p1")
+    text = "".join(f"requirement {i}\n" for i in range(200))
+    numbers = []
+    for i in range(10):
+        text = text.replace(f"requirement {i}\n", f"requirement {i} (revised)\n")
+        numbers.append(write_prd(log, project, text))
+
+    sizes = [revision.size for revision in log.revisions("p1")]
+    # Only the first write and each snapshot after four deltas store the whole text
+    assert [size >= len(text) - 200 for size in sizes] == [
+        True, False, False, False, False, True, False, False, False, False
+    ]
+    for number in numbers:
+        chain = backend.revision_chain("p1", "prd_document", number)
+        assert chain[0][0] == SNAPSHOT
+        assert len(chain) <= 5
+
+
+def test_numbering_and_deltas_continue_after_reopening(backend: SQLiteBackend) -> None:
+    project = Project(id="p1")
+    text = "".join(f"line {i}\n" for i in range(100))
+    write_prd(RevisionLog(backend), project, text)
+
+    reopened = RevisionLog(backend)
+    text = text.replace("line 50\n", "line fifty\n")
+    assert write_prd(reopened, project, text) == 2
+    assert backend.revision_chain("p1", "prd_document", 2)[-1][0] == DELTA
+    assert reopened.texts_at("p1", 2)["prd_document"] == text
+
+
+def test_diff_between_revisions(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend)
+    project = Project(id="p1")
+    first = write_prd(log, project, "a\nb\n")
+    second = write_prd(log, project, "a\nc\n")
+    diff = log.diff("p1", first, second)
+    assert diff.splitlines() == ["--- #1", "+++ #2", "@@ -1,2 +1,2 @@", " a", "-b", "+c"]
+    assert log.diff("p1", first, first) == ""
+
+
+def test_restore_sets_old_texts_and_is_recorded(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend)
+    project = Project(id="p1", project_idea="Idea", prd_document="v1\n")
+    first = log.record(project)
+    project.prd_document = "v2\n"
+    project.tech_stack_proposal = "Python"
+    log.record(project)
+
+    assert sorted(log.restore(project, first)) == ["prd_document", "tech_stack_proposal"]
+    assert project.prd_document == "v1\n"
+    assert project.tech_stack_proposal == ""
+    assert log.record(project) == 3
+    assert log.texts_at("p1", 3) == log.texts_at("p1", first)
+    assert set(log.texts_at("p1", 3)) == set(VERSIONED_FIELDS)
+
+
+def test_deleted_project_starts_a_new_history(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend)
+    project = Project(id="p1", prd_document="old\n")
+    backend.save(project)
+    log.record(project)
+    log.diff("p1", 1, 1)
+
+    backend.delete("p1")
+    log.forget("p1")
+    assert log.revisions("p1") == []
+    project.prd_document = "new\n"
+    assert log.record(project) == 1
+    assert backend.revision_chain("p1", "prd_document", 1) == [(SNAPSHOT, "new\n")]
+
+
+def test_history_is_kept_per_project(backend: SQLiteBackend) -> None:
+    log = RevisionLog(backend, max_projects=1)
+    projects: List[Project] = [Project(id=f"p{i}") for i in range(3)]
+    for round_number in range(3):
+        for project in projects:
+            write_prd(log, project, f"{project.id} round {round_number}\n")
+    for project in projects:
+        assert [revision.number for revision in log.revisions(project.id)] == [1, 2, 3]
+        assert log.texts_at(project.id, 2)["prd_document"] == f"{project.id} round 1\n"
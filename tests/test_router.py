@@ -0,0 +1,95 @@
+"""Choice of a model per pipeline step from live telemetry."""
+
+import random
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.prd_maker.config.settings import ModelConfig
+from src.prd_maker.core.router import ModelRouter
+from src.prd_maker.core.telemetry import CallRecord, Telemetry
+
+MODELS = {
+    "light": ModelConfig(name="light", provider="fake", tier=1),
+    "standard": ModelConfig(name="standard", provider="fake", tier=2),
+    "top": ModelConfig(name="top", provider="fake", tier=3),
+}
+
+
+def make_router(explore_rate: float = 0.0, **route: Any) -> ModelRouter:
+    spec: Dict[str, Any] = {"prefer": "fastest", "explore_rate": explore_rate, **route}
+    return ModelRouter(Telemetry(), {"step": spec, "best": {"prefer": "highest_tier"}}, rng=random.Random(5))
+
+
+def record(router: ModelRouter, model_key: str, latency: float, calls: int = 3,
+           outcome: str = "ok", operation: str = "step") -> None:
+    for _ in range(calls):
+        router.telemetry.record(CallRecord(operation=operation, model_key=model_key, outcome=outcome, latency=latency))
+
+
+def choose(router: ModelRouter, operation: str = "step", models: Optional[Dict[str, ModelConfig]] = None) -> str:
+    chosen = router.choose(operation, MODELS if models is None else models)
+    assert chosen is not None
+    return chosen
+
+
+def test_unrouted_step_is_not_chosen() -> None:
+    router = make_router()
+    assert router.choose("other", MODELS) is None
+    assert router.choose("step", {}) is None
+
+
+def test_every_model_is_measured_before_the_fastest_wins() -> None:
+    router = make_router()
+    latencies = {"light": 3.0, "standard": 1.0, "top": 2.0}
+    chosen = []
+    for _ in range(12):
+        model_key = choose(router)
+        chosen.append(model_key)
+        record(router, model_key, latencies[model_key], calls=1)
+    # Least measured first, light tiers first among equals
+    assert chosen[:9] == ["light", "standard", "top"] * 3
+    assert chosen[9:] == ["standard"] * 3
+
+
+def test_exploration_keeps_trying_other_models() -> None:
+    router = make_router(explore_rate=0.2)
+    record(router, "light", 1.0)
+    record(router, "standard", 2.0)
+    record(router, "top", 3.0)
+    counts = Counter(choose(router) for _ in range(1000))
+    assert 750 < counts["light"] < 850
+    assert counts["standard"] > 50 and counts["top"] > 50
+
+
+def test_tier_filter() -> None:
+    router = make_router(min_tier=2)
+    record(router, "light", 0.1)
+    record(router, "standard", 2.0)
+    record(router, "top", 1.0)
+    assert choose(router) == "top"
+    # With no model of the tier the filter is dropped
+    assert choose(router, models={"light": MODELS["light"]}) == "light"
+
+
+def test_unhealthy_models_are_excluded() -> None:
+    router = make_router(max_p95_seconds=1.5)
+    record(router, "light", 0.5, outcome="error")
+    record(router, "standard", 2.0)
+    record(router, "top", 1.0)
+    # light fails the error rate and standard the p95 limit
+    assert choose(router) == "top"
+
+    record(router, "top", 5.0, calls=10)
+    # Without a healthy model the fastest one is used anyway
+    assert choose(router) == "standard"
+
+
+def test_highest_tier_prefers_tier_then_latency() -> None:
+    router = make_router()
+    assert choose(router, "best") == "top"
+    record(router, "top", 1.0, outcome="error", operation="best")
+    assert choose(router, "best") == "standard"
+
+    models = dict(MODELS, top2=ModelConfig(name="top2", provider="fake", tier=3))
+    record(router, "top2", 2.0, operation="best")
+    assert choose(router, "best", models) == "top2"
@@ -0,0 +1,49 @@
+"""The check for a pending stop or rerun of the Streamlit script run."""
+
+import logging
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests, ScriptRequestType
+
+from src.prd_maker.ui import steps
+
+
+@pytest.fixture(autouse=True)
+def reset_warning(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(steps, "_interrupt_check_unavailable", False)
+
+
+def run_context(monkeypatch: pytest.MonkeyPatch, ctx: Any) -> None:
+    monkeypatch.setattr(steps, "get_script_run_ctx", lambda: ctx)
+
+
+def test_outside_a_script_run_never_interrupted(monkeypatch: pytest.MonkeyPatch) -> None:
+    run_context(monkeypatch, None)
+    assert steps._script_interrupted()() is False
+
+
+@pytest.mark.parametrize("request_type", [ScriptRequestType.STOP, ScriptRequestType.RERUN])
+def test_pending_request_interrupts(monkeypatch: pytest.MonkeyPatch, request_type: ScriptRequestType) -> None:
+    requests = ScriptRequests()
+    run_context(monkeypatch, SimpleNamespace(script_requests=requests))
+    interrupted = steps._script_interrupted()
+    assert interrupted() is False
+    requests._state = request_type
+    assert interrupted() is True
+
+
+@pytest.mark.parametrize("ctx", [
+    SimpleNamespace(),
+    SimpleNamespace(script_requests=SimpleNamespace()),
+    SimpleNamespace(script_requests=SimpleNamespace(_state="CONTINUE")),
+])
+def test_unknown_streamlit_internals_fall_back_to_no_op(monkeypatch: pytest.MonkeyPatch,
+                                                        caplog: pytest.LogCaptureFixture, ctx: Any) -> None:
+    run_context(monkeypatch, ctx)
+    with caplog.at_level(logging.WARNING, logger=steps.__name__):
+        first = steps._script_interrupted()
+        second = steps._script_interrupted()
+    assert first() is False and second() is False
+    assert len(caplog.records) == 1
@@ -0,0 +1,123 @@
+"""Coalescing of identical in-flight requests."""
+
+import asyncio
+import threading
+import time
+from typing import List
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.single_flight import SingleFlight
+from src.prd_maker.core.telemetry import Telemetry
+
+
+def test_first_caller_leads_and_others_follow() -> None:
+    registry = SingleFlight()
+    flight, leading = registry.begin("key")
+    joined, joined_leading = registry.begin("key")
+    other, other_leading = registry.begin("other")
+    assert leading and not joined_leading and other_leading
+    assert joined is flight and other is not flight
+
+
+def test_key_is_released_when_the_flight_finishes() -> None:
+    registry = SingleFlight()
+    flight, _ = registry.begin("key")
+    flight.complete("done")
+    assert len(registry) == 0
+    _, leading = registry.begin("key")
+    assert leading
+
+
+def test_late_follower_replays_published_chunks() -> None:
+    flight, _ = SingleFlight().begin("key")
+    flight.publish("Hel")
+    received: List[str] = []
+    follower = threading.Thread(target=lambda: received.extend(flight.follow()))
+    follower.start()
+    flight.publish("lo")
+    flight.complete()
+    follower.join(5)
+    assert "".join(received) == "Hello"
+
+
+def test_complete_with_whole_text() -> None:
+    flight, _ = SingleFlight().begin("key")
+    flight.complete("whole")
+    assert list(flight.follow()) == ["whole"]
+
+
+def test_followers_receive_the_leaders_error() -> None:
+    flight, _ = SingleFlight().begin("key")
+    flight.publish("partial")
+    flight.fail(TimeoutError("provider timed out"))
+    chunks = flight.follow()
+    assert next(chunks) == "partial"
+    with pytest.raises(TimeoutError):
+        next(chunks)
+
+
+def test_async_follower_on_another_thread() -> None:
+    flight, _ = SingleFlight().begin("key")
+
+    async def follow() -> str:
+        return "".join([chunk async for chunk in flight.afollow()])
+
+    result: List[str] = []
+    follower = threading.Thread(target=lambda: result.append(asyncio.run(follow())))
+    follower.start()
+    for chunk in ("a", "b", "c"):
+        flight.publish(chunk)
+    flight.complete()
+    follower.join(5)
+    assert result == ["abc"]
+
+
+def make_manager(telemetry: Telemetry) -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]), telemetry=telemetry,
+                         single_flight=SingleFlight())
+    manager.set_current_model(manager.register_model(ModelConfig(
+        name="slow", provider="fake", model_params={"time_to_first_token": 0.3, "tokens_per_second": 0}
+    )))
+    return manager
+
+
+def test_concurrent_identical_requests_make_one_provider_call() -> None:
+    telemetry = Telemetry()
+    manager = make_manager(telemetry)
+    barrier = threading.Barrier(4)
+    results: List[str] = []
+
+    def generate() -> None:
+        barrier.wait()
+        results.append(manager.generate_text("same prompt", "system"))
+
+    threads = [threading.Thread(target=generate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(results) == 4 and len(set(results)) == 1
+    outcomes = [call.outcome for call in telemetry.recent]
+    assert outcomes.count("ok") == 1
+    assert outcomes.count("coalesced") == 3
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_forced_generation_does_not_join_a_running_flight(streamed: bool) -> None:
+    telemetry = Telemetry()
+    manager = make_manager(telemetry)
+    leader = threading.Thread(target=manager.generate_text, args=("same prompt", "system"))
+    leader.start()
+    while not len(manager.single_flight):
+        time.sleep(0.01)
+    if streamed:
+        "".join(manager.generate_text_stream("same prompt", "system", use_cache=False))
+    else:
+        manager.generate_text("same prompt", "system", use_cache=False)
+    leader.join(10)
+    outcomes = [call.outcome for call in telemetry.recent]
+    assert outcomes == ["ok", "ok"]
+    assert len(manager.single_flight) == 0
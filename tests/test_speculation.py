@@ -0,0 +1,111 @@
+"""Speculative generations: matching by inputs and model, and model pinning."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+
+from src.prd_maker.config.settings import AppConfig, ModelConfig
+from src.prd_maker.core.async_runner import get_async_runner
+from src.prd_maker.core.llm_manager import LLMManager
+from src.prd_maker.core.speculation import SpeculativeGenerator
+
+
+@pytest.fixture
+def speculator() -> Iterator[SpeculativeGenerator]:
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield SpeculativeGenerator(executor=executor)
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def manager() -> LLMManager:
+    manager = LLMManager(app_config=AppConfig(models={}, fallback_chain=[]))
+    for name in ("a", "b"):
+        manager.register_model(ModelConfig(name=name, provider="fake"))
+    manager.set_current_model("fake_a")
+    return manager
+
+
+def test_result_is_handed_out_once_for_same_inputs_and_model(speculator: SpeculativeGenerator) -> None:
+    speculator.start("summary", ("description",), lambda: "result", model_key="m1")
+    assert speculator.take("summary", ("description",), timeout=None, model_key="m1") == "result"
+    assert speculator.take("summary", ("description",), timeout=None, model_key="m1") is None
+
+
+@pytest.mark.parametrize("inputs, model_key", [(("changed",), "m1"), (("description",), "m2")])
+def test_changed_inputs_or_model_discard_the_result(speculator: SpeculativeGenerator,
+                                                   inputs: tuple, model_key: str) -> None:
+    speculator.start("summary", ("description",), lambda: "result", model_key="m1")
+    assert speculator.take("summary", inputs, timeout=None, model_key=model_key) is None
+    # Discarded, not kept for the old key
+    assert speculator.take("summary", ("description",), timeout=None, model_key="m1") is None
+
+
+def test_same_speculation_is_not_started_twice(speculator: SpeculativeGenerator) -> None:
+    release = threading.Event()
+    calls = []
+
+    def job() -> str:
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    speculator.start("summary", ("x",), job, model_key="m1")
+    speculator.start("summary", ("x",), job, model_key="m1")
+    assert speculator.is_pending("summary", ("x",), model_key="m1")
+    assert not speculator.is_pending("summary", ("x",), model_key="m2")
+    release.set()
+    assert speculator.take("summary", ("x",), timeout=None, model_key="m1") == "result"
+    assert len(calls) == 1
+
+
+def test_unfinished_result_is_not_waited_for_by_default(speculator: SpeculativeGenerator) -> None:
+    release = threading.Event()
+    speculator.start("summary", ("x",), lambda: release.wait(5) and "result")
+    assert speculator.take("summary", ("x",)) is None
+    release.set()
+    assert speculator.take("summary", ("x",), timeout=None) == "result"
+
+
+def test_failed_speculation_returns_none(speculator: SpeculativeGenerator) -> None:
+    def fail() -> str:
+        raise RuntimeError("provider down")
+
+    speculator.start("summary", ("x",), fail)
+    assert speculator.take("summary", ("x",), timeout=None) is None
+
+
+def test_pinned_job_keeps_its_model_after_the_selection_changes(manager: LLMManager) -> None:
+    started, switched = threading.Event(), threading.Event()
+    used = []
+
+    def job() -> None:
+        with manager.pinned({"planning_summary": manager.model_for("planning_summary")}):
+            started.set()
+            switched.wait(5)
+            used.append(manager.model_for("planning_summary"))
+            # Also on the async runner, where calls under a cancellation token run
+            used.append(get_async_runner().run(_model_for(manager, "planning_summary")))
+
+    thread = threading.Thread(target=job)
+    thread.start()
+    started.wait(5)
+    manager.set_current_model("fake_b")
+    switched.set()
+    thread.join(5)
+    assert used == ["fake_a", "fake_a"]
+    # Only the job's context was pinned
+    assert manager.model_for("planning_summary") == "fake_b"
+    assert manager.pinned_models == {}
+
+
+def test_pinned_rejects_unknown_models(manager: LLMManager) -> None:
+    with pytest.raises(ValueError):
+        with manager.pinned({"questions": "missing"}):
+            pass
+
+
+async def _model_for(manager: LLMManager, operation: str) -> str:
+    return manager.model_for(operation)
@@ -0,0 +1,55 @@
+"""Aggregation and Prometheus export of LLM call records."""
+
+from src.prd_maker.core.telemetry import CallRecord, Histogram, Telemetry
+
+
+def call(**overrides: object) -> CallRecord:
+    values: dict = {"operation": "prd", "model_key": "gpt", "outcome": "ok", "latency": 1.2}
+    values.update(overrides)
+    return CallRecord(**values)
+
+
+def test_token_counters_include_prompt_cache_reads_and_writes() -> None:
+    telemetry = Telemetry()
+    telemetry.record(call(input_tokens=1000, output_tokens=200, cache_read_tokens=600, cache_write_tokens=300))
+    telemetry.record(call(input_tokens=1000, output_tokens=100, cache_read_tokens=900))
+    text = telemetry.prometheus_text()
+    assert 'llm_tokens_total{operation="prd",model="gpt",direction="input"} 2000' in text
+    assert 'llm_tokens_total{operation="prd",model="gpt",direction="output"} 300' in text
+    assert 'llm_tokens_total{operation="prd",model="gpt",direction="cache_read"} 1500' in text
+    assert 'llm_tokens_total{operation="prd",model="gpt",direction="cache_write"} 300' in text
+
+
+def test_calls_by_outcome_and_latency_histogram() -> None:
+    telemetry = Telemetry()
+    telemetry.record(call(latency=0.3))
+    telemetry.record(call(outcome="cached", latency=0.0))
+    telemetry.record(call(outcome="error", latency=5.0, error="TimeoutError"))
+    text = telemetry.prometheus_text()
+    assert 'llm_calls_total{operation="prd",model="gpt",outcome="ok"} 1' in text
+    assert 'llm_calls_total{operation="prd",model="gpt",outcome="error"} 1' in text
+    # Only successful calls are timed
+    assert 'llm_request_duration_seconds_count{operation="prd",model="gpt"} 1' in text
+    row = telemetry.summary()[0]
+    assert (row["calls"], row["errors"], row["cached"]) == (3, 1, 1)
+
+
+def test_latency_stats_over_recent_window() -> None:
+    telemetry = Telemetry(window_size=4)
+    for latency in (9.0, 1.0, 2.0, 3.0):
+        telemetry.record(call(latency=latency))
+    telemetry.record(call(outcome="error", latency=4.0))
+    stats = telemetry.latency_stats("gpt")
+    assert stats is not None
+    assert stats.samples == 4
+    assert (stats.p50, stats.p95, stats.error_rate) == (2.0, 3.0, 0.25)
+    assert telemetry.latency_stats("other") is None
+
+
+def test_histogram_quantile_is_bucket_upper_bound() -> None:
+    histogram = Histogram((1, 2, 5))
+    for value in (0.5, 1.5, 1.8, 4.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(1.0) == 5
+    assert histogram.cumulative() == [("1", 1), ("2", 3), ("5", 4), ("+Inf", 4)]
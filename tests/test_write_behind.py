@@ -0,0 +1,201 @@
+"""Write-behind saves: dirty-field tracking, coalescing and snapshots."""
+
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+import pytest
+
+from src.prd_maker.core.storage_backends import SQLiteBackend
+from src.prd_maker.core.write_behind import DirtyTracker, WriteBehindStore
+from src.prd_maker.models.project import Project, ProjectStep
+
+
+class RecordingBackend(SQLiteBackend):
+    """SQLite backend that records which fields each write carried."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.writes: List[Tuple[str, Optional[Set[str]]]] = []
+
+    def save(self, project: Project) -> None:
+        self.writes.append((project.id, None))
+        super().save(project)
+
+    def save_fields(self, project: Project, fields: Iterable[str]) -> None:
+        self.writes.append((project.id, set(fields)))
+        super().save_fields(project, fields)
+
+
+@pytest.fixture
+def backend(tmp_path: Path) -> Iterator[RecordingBackend]:
+    backend = RecordingBackend(str(tmp_path / "projects.db"))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def store(backend: RecordingBackend) -> Iterator[WriteBehindStore]:
+    # Long enough that nothing is written by the background thread during a test
+    store = WriteBehindStore(backend, debounce_seconds=60)
+    yield store
+    store.close()
+
+
+def test_tracker_reports_changed_fields() -> None:
+    tracker = DirtyTracker()
+    project = Project(id="p", name="A")
+    assert tracker.dirty_fields(project) is None
+
+    tracker.mark_written(project)
+    assert tracker.dirty_fields(project) == set()
+
+    project.prd_document = "# PRD"
+    project.planning_answers.append({"question": "Q", "answer": "A"})
+    assert tracker.dirty_fields(project) == {"prd_document", "planning_answers"}
+
+    tracker.mark_written(project, {"prd_document"})
+    assert tracker.dirty_fields(project) == {"planning_answers"}
+
+
+def test_tracker_sees_in_place_edits_of_list_items() -> None:
+    tracker = DirtyTracker()
+    project = Project(id="p", planning_answers=[{"question": "Q", "answer": ""}])
+    tracker.mark_written(project)
+    project.planning_answers[0]["answer"] = "edited"
+    assert tracker.dirty_fields(project) == {"planning_answers"}
+
+
+def test_tracker_evicts_least_recently_used() -> None:
+    tracker = DirtyTracker(max_projects=2)
+    projects = [Project(id=str(i)) for i in range(3)]
+    for project in projects:
+        tracker.mark_written(project)
+    assert tracker.dirty_fields(projects[0]) is None
+    assert tracker.dirty_fields(projects[2]) == set()
+
+
+def test_new_project_is_written_at_once(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    store.save(Project(id="p", name="New"))
+    assert backend.writes == [("p", None)]
+    assert backend.load("p").name == "New"
+
+
+def test_edits_are_coalesced_into_one_partial_write(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p", name="A")
+    store.save(project)
+    for text in ("d", "de", "des"):
+        project.project_description = text
+        store.save(project)
+    project.prd_document = "# PRD"
+    store.save(project)
+    assert backend.writes == [("p", None)]
+
+    store.flush("p")
+    assert backend.writes[1:] == [("p", {"project_description", "prd_document"})]
+    stored = backend.load("p")
+    assert (stored.project_description, stored.prd_document) == ("des", "# PRD")
+
+
+def test_unchanged_save_writes_nothing(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p")
+    store.save(project)
+    store.save(project, flush=True)
+    assert backend.writes == [("p", None)]
+
+
+def test_summary_fields_are_written_at_once(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p", name="A")
+    store.save(project)
+    project.project_idea = "idea"
+    store.save(project)
+    project.advance_step()
+    store.save(project)
+    assert backend.writes[1] == ("p", {"project_idea", "current_step", "completed_steps", "updated_at"})
+    assert backend.list_summaries()[0]["current_step"] == ProjectStep.PROJECT_DESCRIPTION.value
+
+
+def test_pending_save_keeps_the_state_at_save_time(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p", planning_answers=[{"question": "Q1", "answer": "A1"}])
+    store.save(project)
+    project.planning_answers.append({"question": "Q2", "answer": "A2"})
+    store.save(project)
+    # Edited in place after the save, not saved yet
+    project.planning_answers.append({"question": "Q3", "answer": "A3"})
+    project.planning_answers[0]["answer"] = "changed"
+
+    store.flush()
+    assert backend.load("p").planning_answers == [
+        {"question": "Q1", "answer": "A1"},
+        {"question": "Q2", "answer": "A2"},
+    ]
+    # The later edits are still dirty and go out with the next save
+    store.save(project, flush=True)
+    assert backend.load("p").planning_answers == project.planning_answers
+
+
+def test_load_flushes_pending_changes(store: WriteBehindStore) -> None:
+    project = Project(id="p")
+    store.save(project)
+    project.planning_summary = "summary"
+    store.save(project)
+    assert store.load("p").planning_summary == "summary"
+
+
+def test_background_thread_writes_after_debounce(backend: RecordingBackend) -> None:
+    store = WriteBehindStore(backend, debounce_seconds=0.05)
+    try:
+        written = threading.Event()
+        original = backend.save_fields
+
+        def save_fields(project: Project, fields: Iterable[str]) -> None:
+            original(project, fields)
+            written.set()
+
+        backend.save_fields = save_fields  # type: ignore[method-assign]
+        project = Project(id="p")
+        store.save(project)
+        project.prd_document = "# PRD"
+        store.save(project)
+        assert written.wait(5)
+        assert backend.load("p").prd_document == "# PRD"
+    finally:
+        store.close()
+
+
+def test_failed_write_is_requeued(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p")
+    store.save(project)
+    project.prd_document = "# PRD"
+    store.save(project)
+
+    def fail(project: Project, fields: Iterable[str]) -> None:
+        raise OSError("disk full")
+
+    original = backend.save_fields
+    backend.save_fields = fail  # type: ignore[method-assign]
+    with pytest.raises(OSError):
+        store.flush("p")
+    backend.save_fields = original  # type: ignore[method-assign]
+
+    store.flush("p")
+    assert backend.load("p").prd_document == "# PRD"
+
+
+def test_delete_drops_pending_save(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p")
+    store.save(project)
+    project.prd_document = "# PRD"
+    store.save(project)
+    assert store.delete("p")
+    store.flush()
+    assert backend.load("p") is None
+
+
+def test_closed_store_writes_through(store: WriteBehindStore, backend: RecordingBackend) -> None:
+    project = Project(id="p")
+    store.save(project)
+    store.close()
+    project.prd_document = "# PRD"
+    store.save(project)
+    assert backend.load("p").prd_document == "# PRD"